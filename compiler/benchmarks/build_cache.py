@@ -0,0 +1,44 @@
+import sys
+import os
+import platform
+import shutil
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from drivers import Driver, BuildCache
+from constant_folding_savings import generate_program
+
+# A cold build of N generated sources against a no-op rebuild of the same
+# sources, which only hashes them and copies the cached artifact out. The
+# full as/ld build needs the arm64 macOS toolchain, elsewhere the default
+# stage stops at assembly.
+# Usage: python3 build_cache.py [files] [statements per file] [assembly|object|binary]
+
+if __name__ == "__main__":
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    statement_count = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    default_stage = 'binary' if platform.system() == 'Darwin' and platform.machine() == 'arm64' else 'assembly'
+    stage = sys.argv[3] if len(sys.argv) > 3 else default_stage
+
+    project = tempfile.mkdtemp()
+    try:
+        sources = []
+        for i in range(file_count):
+            path = os.path.join(project, f"unit{i}.gala")
+            with open(path, 'w') as f:
+                f.write(generate_program(statement_count, seed=i))
+            sources.append(path)
+        cache = BuildCache(os.path.join(project, 'cache'))
+
+        print(f"{file_count} files, {statement_count} statements each, stage {stage}")
+        for label in ('cold', 'no-op', 'no-op'):
+            driver = Driver(os.path.join(project, 'build'), cache, ('fold', 'peephole'))
+            start = time.perf_counter()
+            for path in sources:
+                driver.build(path, stage=stage)
+            elapsed = time.perf_counter() - start
+            print(f"  {label:<6}{elapsed:>8.3f}s  {elapsed / file_count * 1e3:>7.2f}ms/file  "
+                  f"hits {driver.cache_hits}  misses {driver.cache_misses}")
+    finally:
+        shutil.rmtree(project)
@@ -0,0 +1,72 @@
+import sys
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from compile_client import compile_inputs, stop
+from constant_folding_savings import generate_program
+
+# Latency of compiling one short source to assembly three ways: a cold
+# drivers.py run, a compile_client.py run against a warm compile_server.py
+# and a request from a process that already has the client imported.
+# Usage: python3 compile_server_latency.py [runs] [statements]
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+def measure(runs, compile_once):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        compile_once()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+def run(command):
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+
+def wait_for(socket_path, server):
+    deadline = time.monotonic() + 30
+    while not os.path.exists(socket_path):
+        if server.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError("Compile server didn't start")
+        time.sleep(0.01)
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    statement_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    work = tempfile.mkdtemp()
+    socket_path = os.path.join(work, 'server.sock')
+    server = subprocess.Popen([sys.executable, os.path.join(SRC, 'compile_server.py'), '--socket', socket_path],
+                              stderr=subprocess.DEVNULL)
+    try:
+        source_path = os.path.join(work, 'program.gala')
+        output_path = os.path.join(work, 'program.s')
+        with open(source_path, 'w') as f:
+            f.write(generate_program(statement_count))
+        wait_for(socket_path, server)
+
+        cases = [
+            ("cold drivers.py", lambda: run([sys.executable, os.path.join(SRC, 'drivers.py'), source_path,
+                                             '-S', '--no-cache', '-o', output_path])),
+            ("compile_client.py", lambda: run([sys.executable, os.path.join(SRC, 'compile_client.py'), source_path,
+                                               '--socket', socket_path, '-o', output_path])),
+            ("in-process client", lambda: compile_inputs([{'path': source_path}], socket_path=socket_path)),
+        ]
+        print(f"{statement_count} statements, {runs} runs each")
+        print(f"{'':<20}{'median':>10}{'p95':>10}")
+        cold = None
+        for label, compile_once in cases:
+            median, p95 = measure(runs, compile_once)
+            cold = cold or median
+            print(f"{label:<20}{median * 1e3:>8.1f}ms{p95 * 1e3:>8.1f}ms  {cold / median:>6.1f}x")
+    finally:
+        if server.poll() is None:
+            stop(socket_path)
+        server.wait()
+        shutil.rmtree(work)
@@ -0,0 +1,76 @@
+import sys
+import os
+import random
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer import Lexer
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from constant_folding import ConstantFolder
+from codegen import Codegen
+
+# Instructions emitted with and without the ConstantFolder pass for
+# examples/test_old.gala and for a generated program mixing register and
+# stack variables, nested adds and copies.
+# Usage: python3 constant_folding_savings.py [statements]
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), '..', 'examples', 'test_old.gala')
+REGISTERS = ['x9', 'x10', 'x11', 'x12', 'x13', 'x14', 'x15']
+
+def generate_program(statement_count, seed=0):
+    # Every value stays at 0 or 1 so any mix of adds fits in uint8
+    rng = random.Random(seed)
+    lines = [f"alloc(stack, {statement_count * 4})"]
+    names = []
+    for i, register in enumerate(REGISTERS):
+        lines.append(f"reg r{i}: uint8 @ {register} = 0")
+        names.append(f"r{i}")
+
+    def operand():
+        return rng.choice(names) if rng.random() < 0.6 else '0'
+
+    while len(lines) < statement_count:
+        kind = rng.random()
+        if kind < 0.2:
+            name = f"s{len(lines)}"
+            lines.append(f"stack {name}: uint8 = add({operand()}, 1)")
+            names.append(name)
+        elif kind < 0.5:
+            lines.append(f"{rng.choice(names)} = {rng.choice(names)}")
+        elif kind < 0.8:
+            lines.append(f"{rng.choice(names)} = add({operand()}, add({operand()}, 0))")
+        else:
+            lines.append(f"{rng.choice(names)} = {operand()} + 0 + {operand()}")
+    return '\n'.join(lines)
+
+def count_instructions(assembly):
+    return sum(1 for line in assembly.split('\n') if line.startswith('    '))
+
+def compile_source(source_code, fold):
+    program = Parser(Lexer(source_code).tokenize()).parse()
+    symbol_table = SemanticAnalyzer().analyze(program)
+    folder = None
+    elapsed = 0.0
+    if fold:
+        start = time.perf_counter()
+        folder = ConstantFolder(symbol_table)
+        folder.fold(program)
+        elapsed = time.perf_counter() - start
+    return Codegen(symbol_table, program.statements).generate(), folder, elapsed
+
+def report(label, source_code):
+    plain, _, _ = compile_source(source_code, fold=False)
+    folded, folder, elapsed = compile_source(source_code, fold=True)
+    before = count_instructions(plain)
+    after = count_instructions(folded)
+    print(f"{label}:")
+    print(f"  instructions: {before} -> {after}  ({before - after} removed, {(before - after) / before:.0%})")
+    print(f"  folded adds:  {folder.folded_adds}  propagated reads: {folder.propagated_reads}  "
+          f"saved instructions: {folder.saved_instructions}  pass time with counting: {elapsed:.3f}s")
+
+if __name__ == "__main__":
+    statement_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    with open(EXAMPLE, 'r') as f:
+        report("examples/test_old.gala", f.read())
+    report(f"generated, {statement_count} statements", generate_program(statement_count))
@@ -0,0 +1,62 @@
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ast_nodes import RegisterDecleration, StackDecleration, VariableAssignment, MemoryAlloc, AddOperator
+from visitor import Visitor, visits
+
+# Cost of routing one node to its handler, per node type: the isinstance
+# chain analyze/generate used to run against a Visitor dispatch table.
+# Both sides call the same empty handler so only routing is measured.
+# Usage: python3 dispatch_overhead.py [nodes per type]
+
+NODE_TYPES = [RegisterDecleration, StackDecleration, VariableAssignment, MemoryAlloc, AddOperator]
+
+class IsinstanceChain:
+    def run(self, nodes):
+        for node in nodes:
+            if isinstance(node, RegisterDecleration):
+                self.handle(node)
+            elif isinstance(node, StackDecleration):
+                self.handle(node)
+            elif isinstance(node, VariableAssignment):
+                self.handle(node)
+            elif isinstance(node, MemoryAlloc):
+                self.handle(node)
+            elif isinstance(node, AddOperator):
+                self.handle(node)
+
+    def handle(self, node):
+        pass
+
+class CountingPass(Visitor):
+    # A pass plugged in from outside src, visit_all is the same loop the
+    # analyzer and codegen run
+    @visits(*NODE_TYPES)
+    def handle(self, node):
+        pass
+
+    def run(self, nodes):
+        self.visit_all(nodes)
+
+def best_of(run, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+if __name__ == "__main__":
+    node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    chain = IsinstanceChain()
+    visitor = CountingPass()
+
+    print(f"{'node type':<22}{'isinstance':>12}{'dispatch':>12}")
+    for node_type in NODE_TYPES:
+        nodes = [node_type()] * node_count
+        chain_time = best_of(lambda: chain.run(nodes))
+        dispatch_time = best_of(lambda: visitor.run(nodes))
+        print(f"{node_type.__name__:<22}{chain_time / node_count * 1e9:>10.1f}ns{dispatch_time / node_count * 1e9:>10.1f}ns")
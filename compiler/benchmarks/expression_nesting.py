@@ -0,0 +1,53 @@
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer import Lexer
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from codegen import Codegen
+
+# Parse, analyze and codegen time for a single declaration nested N levels
+# deep, well past the default recursion limit. Every shape adds 1 to a run
+# of 0s so the value stays in range for uint8.
+# Usage: python3 expression_nesting.py [depth ...]
+
+SHAPES = {
+    'add(0, add(0, ...))': lambda depth: 'add(0, ' * depth + '1' + ')' * depth,
+    'add(add(..., 0), 0)': lambda depth: 'add(' * depth + '1' + ', 0)' * depth,
+    '1 + 0 + 0 ...': lambda depth: '1' + ' + 0' * depth,
+    '((1 + 0) + 0) ...': lambda depth: '(' * depth + '1' + ' + 0)' * depth
+}
+
+def compile_stages(source_code):
+    timings = []
+    start = time.perf_counter()
+    tokens = Lexer(source_code).tokenize()
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    program = Parser(tokens).parse()
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    symbol_table = SemanticAnalyzer().analyze(program)
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    assembly = Codegen(symbol_table, program.statements).generate()
+    timings.append(time.perf_counter() - start)
+
+    assert symbol_table[0].value == 1
+    return timings, assembly
+
+if __name__ == "__main__":
+    depths = [int(arg) for arg in sys.argv[1:]] or [10_000, 20_000, 40_000, 80_000]
+    print(f"recursion limit: {sys.getrecursionlimit()}")
+    print(f"{'shape':<22}{'depth':>8}{'lex':>9}{'parse':>9}{'analyze':>9}{'codegen':>9}{'asm lines':>11}")
+    for shape, build in SHAPES.items():
+        for depth in depths:
+            source_code = f"reg total: uint8 @ x9 = {build(depth)}"
+            timings, assembly = compile_stages(source_code)
+            lex, parse, analyze, codegen = timings
+            print(f"{shape:<22}{depth:>8}{lex:>8.3f}s{parse:>8.3f}s{analyze:>8.3f}s{codegen:>8.3f}s{assembly.count(chr(10)) + 1:>11}")
@@ -0,0 +1,120 @@
+import sys
+import os
+import random
+import time
+from collections import Counter
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from assembly import immediate_value
+from immediates import materialize, add_immediate, is_logical_immediate, cost
+
+# Checks the sequences immediates.py picks over whole value ranges by
+# running them, then reports how many instructions constants cost.
+# Usage: python3 immediate_synthesis.py [random samples]
+
+MASK = {64: (1 << 64) - 1, 32: (1 << 32) - 1}
+
+def execute(instructions, registers, width):
+    # Just enough of the move-wide, orr and add/sub semantics to run what
+    # materialize and add_immediate emit
+    mask = MASK[width]
+
+    def read(operand):
+        if operand.startswith('#'):
+            return immediate_value(operand)
+        return 0 if operand[1:] == 'zr' else registers[operand]
+
+    for instruction in instructions:
+        opcode, operands = instruction.opcode, instruction.operands
+        shift = immediate_value(operands[-1].split()[1]) if operands[-1].startswith('lsl') else 0
+        destination = operands[0]
+        if opcode == 'mov':
+            value = read(operands[1])
+        elif opcode == 'movz':
+            value = read(operands[1]) << shift
+        elif opcode == 'movn':
+            value = ~(read(operands[1]) << shift)
+        elif opcode == 'movk':
+            value = registers[destination] & ~(0xffff << shift) | read(operands[1]) << shift
+        elif opcode == 'orr':
+            value = read(operands[1]) | read(operands[2])
+        elif opcode == 'add':
+            value = read(operands[1]) + (read(operands[2]) << shift)
+        elif opcode == 'sub':
+            value = read(operands[1]) - (read(operands[2]) << shift)
+        else:
+            raise ValueError(f"Unexpected {instruction}")
+        registers[destination] = value & mask
+    return registers
+
+def logical_immediates(width):
+    # Every element size, run length and rotation, replicated
+    values = set()
+    size = 2
+    while size <= width:
+        element_mask = (1 << size) - 1
+        for ones in range(1, size):
+            run = (1 << ones) - 1
+            for rotation in range(size):
+                element = ((run >> rotation) | (run << (size - rotation))) & element_mask
+                values.add(sum(element << shift for shift in range(0, width, size)))
+        size *= 2
+    return values
+
+def check_materialize(value, width, costs, limit):
+    register = 'x8' if width == 64 else 'w8'
+    instructions = materialize(register, value, width)
+    got = execute(instructions, {register: 0x5a5a5a5a5a5a5a5a & MASK[width]}, width)[register]
+    assert got == value & MASK[width], f"{value:#x}/{width}: {[str(i) for i in instructions]}"
+    assert cost(instructions) <= limit, f"{value:#x}/{width}: {[str(i) for i in instructions]}"
+    costs[cost(instructions)] += 1
+
+def check_add(value, costs, limit):
+    instructions = add_immediate('x9', 'x10', value, 'x17')
+    source = 0x123456789
+    got = execute(instructions, {'x9': 0, 'x10': source, 'x17': 0}, 64)['x9']
+    assert got == (source + value) & MASK[64], f"{value:#x}: {[str(i) for i in instructions]}"
+    assert cost(instructions) <= limit, f"{value:#x}: {[str(i) for i in instructions]}"
+    costs[cost(instructions)] += 1
+
+def halfword_count(value, width):
+    # What a plain movz/movk chain would spend
+    return max(1, sum(1 for shift in range(0, width, 16) if (value >> shift) & 0xffff))
+
+if __name__ == "__main__":
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rng = random.Random(0)
+    start = time.perf_counter()
+
+    for width in (64, 32):
+        bitmasks = logical_immediates(width)
+        costs = Counter()
+        for value in bitmasks:
+            assert is_logical_immediate(value, width)
+            check_materialize(value, width, costs, 1)
+        for value in range(0x10000):
+            assert is_logical_immediate(value, width) == (value in bitmasks)
+            check_materialize(value, width, costs, 1)
+            check_materialize(~value, width, costs, 1)
+            for shift in range(16, width, 16):
+                check_materialize(value << shift, width, costs, 1)
+                check_materialize(~(value << shift), width, costs, 1)
+        for _ in range(samples):
+            value = rng.getrandbits(width)
+            assert is_logical_immediate(value, width) == (value in bitmasks)
+            check_materialize(value, width, costs, halfword_count(value, width))
+        print(f"materialize {width:>2} bit: {len(bitmasks)} bitmask immediates, "
+              f"{sum(costs.values())} values, cost {dict(sorted(costs.items()))}")
+
+    costs = Counter()
+    for value in range(-0x10000, 0x10000):
+        check_add(value, costs, 2)
+    for high in range(0x1000):
+        check_add(high << 12, costs, 1)
+        check_add(-(high << 12), costs, 1)
+    for _ in range(samples):
+        check_add(rng.randrange(-(1 << 24) + 1, 1 << 24), costs, 2)
+        check_add(rng.getrandbits(64), costs, 5)
+    print(f"add_immediate: {sum(costs.values())} addends, cost {dict(sorted(costs.items()))}")
+
+    print(f"all checks passed in {time.perf_counter() - start:.1f}s")
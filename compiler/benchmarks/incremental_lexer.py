@@ -0,0 +1,55 @@
+import sys
+import os
+import random
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer import Lexer, IncrementalLexer
+from lexer_throughput import generate_source
+
+# Per-edit latency of IncrementalLexer against a full re-lex, for growing
+# files. Every few edits the cached stream is checked against a full re-lex.
+
+def random_edit(rng, lines):
+    line = rng.randrange(len(lines))
+    column = rng.randrange(len(lines[line]) + 1)
+    replacement = rng.choice(['a', '1', ' ', 'x9', '\n', 'reg y: int8 @ x10 = 3\n', ''])
+    end_line = min(line + rng.choice([0, 0, 0, 1]), len(lines) - 1)
+    end_column = column if end_line == line else 0
+    return line + 1, column, end_line + 1, end_column, replacement
+
+def apply_to_lines(lines, start_line, start_column, end_line, end_column, replacement):
+    text = lines[start_line - 1][:start_column] + replacement + lines[end_line - 1][end_column:]
+    lines[start_line - 1:end_line] = text.split('\n')
+
+def same_stream(left, right):
+    return [(t.type, t.value, t.line) for t in left] == [(t.type, t.value, t.line) for t in right]
+
+edits = 200
+print(f"{'size':>8} {'full re-lex':>12} {'incremental edit':>18}")
+for kilobytes in (64, 256, 1024, 4096):
+    rng = random.Random(kilobytes)
+    source_code = generate_source(kilobytes * 1024, seed=kilobytes)
+    lines = source_code.split('\n')
+    incremental = IncrementalLexer(source_code)
+
+    start = time.perf_counter()
+    Lexer(source_code).tokenize()
+    full = time.perf_counter() - start
+
+    elapsed = 0
+    for i in range(edits):
+        edit = random_edit(rng, lines)
+        apply_to_lines(lines, *edit)
+
+        start = time.perf_counter()
+        incremental.apply_edit(*edit)
+        incremental.tokens_for_line(edit[0])
+        elapsed += time.perf_counter() - start
+
+        if i % 50 == 0:
+            assert same_stream(incremental.tokens(), Lexer('\n'.join(lines)).tokenize())
+
+    assert incremental.source_code == '\n'.join(lines)
+    assert same_stream(incremental.tokens(), Lexer(incremental.source_code).tokenize())
+    print(f"{kilobytes:>6}KB {full * 1000:>10.2f}ms {elapsed / edits * 1e6:>16.1f}us")
@@ -0,0 +1,50 @@
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer import Lexer
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from codegen import Codegen
+from ir import IRBuilder
+from ir_codegen import IRCodegen
+from constant_folding_savings import EXAMPLE, generate_program
+
+# Checks IRCodegen emits the same assembly as Codegen and times lowering
+# to IR plus the IR backend against Codegen straight from the AST. Prints
+# the IR dump of examples/test_old.gala.
+# Usage: python3 ir_backend.py [statements]
+
+def compile_both(source_code):
+    program = Parser(Lexer(source_code).tokenize()).parse()
+    symbol_table = SemanticAnalyzer().analyze(program)
+
+    start = time.perf_counter()
+    direct = Codegen(symbol_table, program.statements).generate()
+    direct_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ir_program = IRBuilder(symbol_table).build(program)
+    lower_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    through_ir = IRCodegen(symbol_table, ir_program).generate()
+    backend_time = time.perf_counter() - start
+
+    assert direct == through_ir
+    return ir_program, direct_time, lower_time, backend_time
+
+if __name__ == "__main__":
+    statement_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    with open(EXAMPLE, 'r') as f:
+        ir_program, _, _, _ = compile_both(f.read())
+    print("examples/test_old.gala:")
+    print(ir_program.dump())
+    print()
+
+    ir_program, direct_time, lower_time, backend_time = compile_both(generate_program(statement_count))
+    print(f"generated, {statement_count} statements: identical assembly")
+    print(f"  ir: {len(ir_program.instructions)} instructions, {len(ir_program.registers)} virtual registers")
+    print(f"  codegen from AST:  {direct_time:.3f}s")
+    print(f"  lower + IR backend: {lower_time:.3f}s + {backend_time:.3f}s")
@@ -0,0 +1,41 @@
+import sys
+import os
+import mmap
+import tempfile
+import tracemalloc
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer import Lexer
+from lexer_throughput import generate_source
+
+# Peak traced memory of tokenize() on a string versus iter_tokens() over an
+# mmap'd file, for growing inputs. The streaming peak should stay flat.
+
+def peak(run):
+    tracemalloc.start()
+    count = run()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, peak_bytes
+
+def stream_file(path):
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        return sum(1 for _ in Lexer(buffer).iter_tokens())
+
+def read_file(path):
+    with open(path, 'r') as f:
+        return len(Lexer(f.read()).tokenize())
+
+print(f"{'size':>8} {'tokens':>10} {'tokenize peak':>15} {'iter_tokens peak':>18}")
+for megabytes in (1, 2, 4, 8):
+    with tempfile.NamedTemporaryFile('w', suffix='.gala', delete=False) as f:
+        f.write(generate_source(megabytes * 1024 * 1024))
+        path = f.name
+
+    try:
+        count, list_peak = peak(lambda: read_file(path))
+        _, stream_peak = peak(lambda: stream_file(path))
+    finally:
+        os.remove(path)
+
+    print(f"{megabytes:>6}MB {count:>10} {list_peak / 2**20:>13.1f}MB {stream_peak / 2**20:>16.2f}MB")
@@ -0,0 +1,56 @@
+import sys
+import os
+import random
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer import Lexer
+
+# Compares the character-at-a-time lexer against the master pattern engine
+# on a generated multi-megabyte source. Usage: python3 lexer_throughput.py [MB]
+
+def generate_source(target_bytes, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    while size < target_bytes:
+        name = f"value{rng.randrange(1_000_000)}"
+        register = rng.choice(Lexer.GENERAL_PURPOSE_REGISTERS)
+        line = f"reg {name}: int8 @ {register} = {rng.randrange(128)}"
+        lines.append(line)
+        size += len(line) + 1
+    return '\n'.join(lines)
+
+def measure(tokenize, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = tokenize()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return tokens, best
+
+if __name__ == "__main__":
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    source_code = generate_source(int(megabytes * 1024 * 1024))
+    size_mb = len(source_code) / (1024 * 1024)
+
+    engines = {
+        'scalar': lambda: Lexer(source_code)._tokenize_scalar(),
+        'pattern': lambda: Lexer(source_code)._tokenize_pattern(),
+    }
+    try:
+        import numpy
+        engines['vectorized'] = lambda: Lexer(source_code).tokenize_vectorized()
+    except ImportError:
+        print("numpy not installed, skipping the vectorized engine")
+
+    expected, scalar_time = measure(engines.pop('scalar'))
+    expected = [(token.type, token.value, token.line) for token in expected]
+    print(f"input: {size_mb:.2f} MB, {len(expected)} tokens")
+    print(f"scalar:     {scalar_time:.3f}s  {size_mb / scalar_time:.2f} MB/s")
+
+    for name, tokenize in engines.items():
+        tokens, elapsed = measure(tokenize)
+        assert [(token.type, token.value, token.line) for token in tokens] == expected
+        print(f"{name + ':':<11} {elapsed:.3f}s  {size_mb / elapsed:.2f} MB/s  ({scalar_time / elapsed:.2f}x)")
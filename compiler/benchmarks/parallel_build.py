@@ -0,0 +1,53 @@
+import sys
+import os
+import platform
+import shutil
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from drivers import Driver
+from constant_folding_savings import generate_program
+
+# Uncached builds of N generated sources through Driver.build_all at each
+# worker count, with the speedup over one worker. The full as/ld build
+# needs the arm64 macOS toolchain, elsewhere the default stage stops at
+# assembly.
+# Usage: python3 parallel_build.py [files] [statements per file] [assembly|object|binary]
+
+if __name__ == "__main__":
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    statement_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    default_stage = 'binary' if platform.system() == 'Darwin' and platform.machine() == 'arm64' else 'assembly'
+    stage = sys.argv[3] if len(sys.argv) > 3 else default_stage
+
+    cores = os.cpu_count() or 1
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= cores:
+        worker_counts.append(worker_counts[-1] * 2)
+    if worker_counts[-1] != cores:
+        worker_counts.append(cores)
+
+    project = tempfile.mkdtemp()
+    try:
+        sources = []
+        for i in range(file_count):
+            path = os.path.join(project, f"unit{i}.gala")
+            with open(path, 'w') as f:
+                f.write(generate_program(statement_count, seed=i))
+            sources.append(path)
+
+        print(f"{file_count} files, {statement_count} statements each, stage {stage}, {cores} cores")
+        print(f"{'workers':>8}{'time':>10}{'speedup':>9}{'efficiency':>12}")
+        baseline = None
+        for workers in worker_counts:
+            driver = Driver(os.path.join(project, 'build'), None, ('fold', 'peephole'))
+            start = time.perf_counter()
+            results = driver.build_all(sources, stage, workers)
+            elapsed = time.perf_counter() - start
+            errors = [error for _, error in results if error is not None]
+            assert not errors, errors[0]
+            baseline = baseline or elapsed
+            print(f"{workers:>8}{elapsed:>9.3f}s{baseline / elapsed:>8.2f}x{baseline / elapsed / workers:>12.0%}")
+    finally:
+        shutil.rmtree(project)
@@ -0,0 +1,48 @@
+import sys
+import os
+import shutil
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer import Lexer
+from parser import Parser
+from ast_cache import ParseCache, encode_program
+from drivers import COMPILER_VERSION
+from workload import generate_workload, parse_size, format_size
+
+# Lexing and parsing generated sources of each size against loading the
+# same program from the parse cache, with what storing it cost and how
+# big the entry is next to the source.
+# Usage: python3 parse_cache.py [sizes, e.g. 1M,4M,16M]
+
+if __name__ == "__main__":
+    sizes = [parse_size(size) for size in (sys.argv[1] if len(sys.argv) > 1 else '1M,4M,16M').split(',')]
+    directory = tempfile.mkdtemp()
+    try:
+        cache = ParseCache(directory, COMPILER_VERSION)
+        print(f"{'size':>6}{'lex+parse':>11}{'store':>9}{'load':>9}{'speedup':>9}{'entry':>9}")
+        for size in sizes:
+            source_code = generate_workload(size)
+
+            start = time.perf_counter()
+            tokens = Lexer(source_code).tokenize()
+            program = Parser(tokens).parse()
+            parsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            key = cache.key(source_code)
+            cache.put(key, tokens, program)
+            stored = time.perf_counter() - start
+
+            start = time.perf_counter()
+            loaded = cache.get(cache.key(source_code))
+            elapsed = time.perf_counter() - start
+
+            assert encode_program(loaded.program) == encode_program(program)
+            assert loaded.token_count == len(tokens)
+            entry = os.path.getsize(os.path.join(directory, key + '.ast'))
+            print(f"{format_size(size):>6}{parsed:>10.3f}s{stored:>8.3f}s{elapsed:>8.3f}s{parsed / elapsed:>8.1f}x"
+                  f"{entry / len(source_code):>8.1f}x")
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,83 @@
+import sys
+import os
+import importlib.util
+import random
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer import Lexer
+from parser import Parser
+
+# Statements per second of the table-driven Parser against the old one in
+# src/old, both fed their own lexer's tokens for the same generated program.
+# Usage: python3 parser_throughput.py [statements]
+
+OLD_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'old')
+
+def load_old_pipeline():
+    # The old modules import 'tokens' and 'ast_nodes' by their pre-rename
+    # names, so point those at the old files while loading them
+    saved = {name: sys.modules.get(name) for name in ('tokens', 'ast_nodes')}
+    modules = {}
+    try:
+        for name in ('tokens', 'ast_nodes', 'lexer', 'parser'):
+            spec = importlib.util.spec_from_file_location(f'{name}_old', os.path.join(OLD_DIR, f'{name}_old.py'))
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[name] = module
+            spec.loader.exec_module(module)
+            modules[name] = module
+    finally:
+        for name in ('lexer', 'parser'):
+            sys.modules.pop(name, None)
+        for name, module in saved.items():
+            if module is not None:
+                sys.modules[name] = module
+    return modules['lexer'].Lexer, modules['parser'].Parser
+
+def generate_program(statement_count, seed=0):
+    rng = random.Random(seed)
+    lines = [f"alloc(stack, {statement_count})"]
+    names = []
+    for i in range(statement_count - 1):
+        kind = rng.random()
+        if kind < 0.25 or not names:
+            name = f"r{i}"
+            register = rng.choice(Lexer.GENERAL_PURPOSE_REGISTERS)
+            lines.append(f"reg {name}: int8 @ {register} = {rng.randrange(64)}")
+            names.append(name)
+        elif kind < 0.45:
+            name = f"s{i}"
+            lines.append(f"stack {name}: uint8 = add({rng.randrange(64)}, {rng.randrange(64)})")
+            names.append(name)
+        elif kind < 0.55:
+            lines.append(f"reg c{i}: char @ x9 = 'c'")
+        elif kind < 0.80:
+            lines.append(f"{rng.choice(names)} = {rng.choice([str(rng.randrange(64)), rng.choice(names)])}")
+        else:
+            lines.append(f"{rng.choice(names)} = add({rng.choice(names)}, {rng.randrange(64)})")
+    return '\n'.join(lines)
+
+def best_of(run, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+if __name__ == "__main__":
+    statement_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    source_code = generate_program(statement_count)
+    OldLexer, OldParser = load_old_pipeline()
+
+    old_tokens = OldLexer(source_code).tokenize()
+    new_tokens = Lexer(source_code).tokenize()
+
+    old_program, old_time = best_of(lambda: OldParser(old_tokens).parse())
+    new_program, new_time = best_of(lambda: Parser(new_tokens).parse())
+    assert len(old_program.statements) == len(new_program.statements) == statement_count
+
+    print(f"statements: {statement_count}")
+    print(f"old parser: {old_time:.3f}s  {statement_count / old_time:,.0f} statements/s")
+    print(f"new parser: {new_time:.3f}s  {statement_count / new_time:,.0f} statements/s  ({old_time / new_time:.2f}x)")
@@ -0,0 +1,83 @@
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer import Lexer
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from constant_folding import ConstantFolder
+from codegen import Codegen
+from peephole import PeepholeOptimizer
+from assembly import AsmInstruction, count_instructions
+from constant_folding_savings import EXAMPLE, generate_program
+
+# Checks PeepholeOptimizer against golden outputs for one small program
+# per rule, then reports what each rule removes from
+# examples/test_old.gala and a generated program, with and without
+# ConstantFolder run first.
+# Usage: python3 peephole_savings.py [statements]
+
+GOLDEN = [
+    ("self move",
+     "reg a: uint8 @ x9 = 1\na = a",
+     ["mov x9, #1",
+      "mov x0, #0", "mov x16, #1", "svc #0x80"]),
+    ("constant already in x8",
+     "alloc(stack, 8)\nstack s: uint8 = 5\nreg a: uint8 @ x9 = 1\nstack t: uint8 = 5",
+     ["sub sp, sp, #16", "mov x8, #5", "strb w8, [sp, #0]", "mov x9, #1", "strb w8, [sp, #1]", "add sp, sp, #16",
+      "mov x0, #0", "mov x16, #1", "svc #0x80"]),
+    ("mov and add merged",
+     "reg a: uint8 @ x9 = 1 + 2",
+     ["mov x9, #3",
+      "mov x0, #0", "mov x16, #1", "svc #0x80"]),
+    ("add of known registers",
+     "alloc(stack, 4)\nreg a: uint8 @ x9 = 3\nstack s: uint8 = a + 4\na = s",
+     ["sub sp, sp, #16", "mov x8, #7", "strb w8, [sp, #0]", "ldrb w9, [sp, #0]", "add sp, sp, #16",
+      "mov x0, #0", "mov x16, #1", "svc #0x80"]),
+    ("zero stored from wzr",
+     "alloc(stack, 4)\nstack s: uint8 = 0 + 0",
+     ["sub sp, sp, #16", "strb wzr, [sp, #0]", "add sp, sp, #16",
+      "mov x0, #0", "mov x16, #1", "svc #0x80"]),
+    ("overwritten definition",
+     "reg a: uint8 @ x9 = 1\na = 2",
+     ["mov x9, #2",
+      "mov x0, #0", "mov x16, #1", "svc #0x80"]),
+]
+
+def generate_lines(source_code, fold):
+    program = Parser(Lexer(source_code).tokenize()).parse()
+    symbol_table = SemanticAnalyzer().analyze(program)
+    if fold:
+        ConstantFolder(symbol_table).fold(program)
+    return Codegen(symbol_table, program.statements).generate_lines()
+
+def check_golden():
+    for label, source_code, expected in GOLDEN:
+        lines = PeepholeOptimizer().optimize(generate_lines(source_code, fold=False))
+        got = [str(line).strip() for line in lines if isinstance(line, AsmInstruction)]
+        assert got == expected, f"{label}: {got}"
+    print(f"golden: {len(GOLDEN)} ok")
+
+def report(label, source_code):
+    print(f"{label}:")
+    for fold in (False, True):
+        lines = generate_lines(source_code, fold)
+        start = time.perf_counter()
+        optimizer = PeepholeOptimizer()
+        optimized = optimizer.optimize(lines)
+        elapsed = time.perf_counter() - start
+        before = count_instructions(lines)
+        after = count_instructions(optimized)
+        passes = 'fold + peephole' if fold else 'peephole'
+        print(f"  {passes:<16}instructions {before} -> {after} ({(before - after) / before:.0%} removed)  {elapsed:.3f}s")
+        print(f"  {'':<16}self moves {optimizer.self_moves}  reused constants {optimizer.reused_constants}  "
+              f"merged adds {optimizer.merged_adds}  zero stores {optimizer.zero_stores}  "
+              f"dead definitions {optimizer.dead_definitions}")
+
+if __name__ == "__main__":
+    statement_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    check_golden()
+    with open(EXAMPLE, 'r') as f:
+        report("examples/test_old.gala", f.read())
+    report(f"generated, {statement_count} statements", generate_program(statement_count))
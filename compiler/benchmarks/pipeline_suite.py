@@ -0,0 +1,116 @@
+import sys
+import os
+import argparse
+import json
+import platform
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from drivers import COMPILER_VERSION, FLAGS, compile_source
+from pass_timing import PassTimer
+from workload import generate_workload, parse_size, format_size
+
+# Times every compiler phase and the whole compile over generated
+# workloads of each mix and size, keeping the best of a few runs. --save
+# stores the results as a baseline, a later run compares against it and
+# exits 1 when any phase got slower than the threshold allows. Baselines
+# only compare on the machine they were taken on.
+# Usage: python3 pipeline_suite.py [--sizes 1K,64K,1M] [--mixes default,stack] [--save] [--threshold 0.2]
+# 100M inputs work but take minutes and several GB of memory per run.
+
+MIXES = {
+    'default': {},
+    'register': {'mix': {'reg': 0.3, 'stack': 0.0, 'assign': 0.4, 'add': 0.3}},
+    'stack': {'mix': {'reg': 0.05, 'stack': 0.35, 'assign': 0.3, 'add': 0.3}, 'alloc_slack': 4096},
+    'arithmetic': {'mix': {'reg': 0.1, 'stack': 0.1, 'assign': 0.1, 'add': 0.7}, 'add_depth': 6},
+}
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'pipeline_baseline.json')
+
+# Phases faster than this are left out of regression checks, their times
+# are mostly noise
+NOISE_SECONDS = 0.005
+
+def measure(source_code, flags, repeat):
+    # Best of repeat runs for each phase and for the compile as a whole
+    best = {}
+    for _ in range(repeat):
+        timer = PassTimer(trace_memory=False)
+        start = time.perf_counter()
+        compile_source(source_code, flags, timer)
+        elapsed = time.perf_counter() - start
+        for record in timer.phases:
+            best[record['name']] = min(best.get(record['name'], record['wall_seconds']), record['wall_seconds'])
+        best['total'] = min(best.get('total', elapsed), elapsed)
+    return best
+
+def compare(results, baseline, threshold):
+    # The (case, phase, before, after) of everything that got slower by
+    # more than threshold
+    regressions = []
+    for case, phases in results.items():
+        for phase, seconds in phases['seconds'].items():
+            before = baseline.get(case, {}).get('seconds', {}).get(phase)
+            if before is None or max(before, seconds) < NOISE_SECONDS:
+                continue
+            if seconds > before * (1 + threshold):
+                regressions.append((case, phase, before, seconds))
+    return regressions
+
+def main(argv=None):
+    argument_parser = argparse.ArgumentParser(description="Benchmark the compiler pipeline on generated workloads")
+    argument_parser.add_argument('--sizes', default='1K,16K,256K,1M', help="comma separated, K and M suffixes")
+    argument_parser.add_argument('--mixes', default=','.join(MIXES), help=f"comma separated from {', '.join(MIXES)}")
+    argument_parser.add_argument('--flags', default='', help=f"comma separated from {', '.join(FLAGS)}")
+    argument_parser.add_argument('--seed', type=int, default=0)
+    argument_parser.add_argument('--repeat', type=int, default=5)
+    argument_parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    argument_parser.add_argument('--save', action='store_true', help="store these results as the baseline")
+    argument_parser.add_argument('--threshold', type=float, default=0.2, help="slowdown flagged as a regression")
+    args = argument_parser.parse_args(argv)
+
+    flags = tuple(sorted(flag for flag in args.flags.split(',') if flag))
+    results = {}
+    for mix in args.mixes.split(','):
+        for size in [parse_size(size) for size in args.sizes.split(',')]:
+            case = f"{mix}/{format_size(size)}"
+            source_code = generate_workload(size, args.seed, **MIXES[mix])
+            seconds = measure(source_code, flags, args.repeat)
+            results[case] = {'bytes': len(source_code), 'seconds': seconds}
+
+            phases = '  '.join(f"{phase} {value * 1e3:.1f}" for phase, value in seconds.items() if phase != 'total')
+            throughput = len(source_code) / seconds['total'] / 1024 / 1024
+            print(f"{case:<18}{seconds['total'] * 1e3:>10.1f}ms {throughput:>6.2f}MB/s  {phases}")
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'compiler_version': COMPILER_VERSION,
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'flags': list(flags),
+                'seed': args.seed,
+                'results': results,
+            }, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, run with --save to store one")
+        return 0
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    if baseline['flags'] != list(flags) or baseline['seed'] != args.seed:
+        print(f"baseline was taken with flags {baseline['flags']} and seed {baseline['seed']}, not comparing")
+        return 0
+
+    regressions = compare(results, baseline['results'], args.threshold)
+    for case, phase, before, after in regressions:
+        print(f"REGRESSION {case} {phase}: {before * 1e3:.1f}ms -> {after * 1e3:.1f}ms ({after / before - 1:+.0%})")
+    if regressions:
+        return 1
+    print(f"no phase slower than the baseline by more than {args.threshold:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import sys
+import os
+import random
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer import Lexer
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from register_allocation import LinearScanAllocator
+from codegen import Codegen
+
+# LinearScanAllocator on programs of N unpinned register variables, each
+# read again a few statements later so 8-16 values are live at once, with
+# two pinned registers. Time per variable should stay flat as N doubles
+# and spill slots get reused, so the frame stays small.
+# Usage: python3 register_allocation_scaling.py [variables ...]
+
+def generate_program(variable_count, seed=0):
+    rng = random.Random(seed)
+    lines = ["alloc(stack, 16)", "reg first: uint8 @ x9 = 1", "reg last: uint8 @ x15 = 0"]
+    for i in range(variable_count):
+        if i < 16:
+            lines.append(f"reg v{i}: uint8 = {rng.randrange(2)}")
+        else:
+            lines.append(f"reg v{i}: uint8 = add(v{i - rng.randint(8, 16)}, 0)")
+    lines.append(f"last = v{variable_count - 1}")
+    return '\n'.join(lines)
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [12_500, 25_000, 50_000, 100_000, 200_000]
+    print(f"{'variables':>10}{'allocate':>10}{'per var':>10}{'growth':>8}{'spilled':>10}{'frame':>8}  registers")
+    previous = None
+    for count in counts:
+        program = Parser(Lexer(generate_program(count)).tokenize()).parse()
+        analyzer = SemanticAnalyzer()
+        symbol_table = analyzer.analyze(program)
+
+        start = time.perf_counter()
+        allocator = LinearScanAllocator(symbol_table, analyzer.stack_frame)
+        allocator.allocate(program)
+        elapsed = time.perf_counter() - start
+
+        codegen = Codegen(symbol_table, program.statements)
+        codegen.generate()
+
+        growth = f"{elapsed / previous:.2f}x" if previous else "-"
+        print(f"{count:>10}{elapsed:>9.3f}s{elapsed / count * 1e6:>8.2f}us{growth:>8}{allocator.spilled_symbols:>10}"
+              f"{codegen.stack_size:>7}B  {', '.join(sorted(allocator.registers_used, key=lambda register: int(register[1:])))}")
+        previous = elapsed
@@ -0,0 +1,41 @@
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer import Lexer
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+
+# SemanticAnalyzer time for programs made only of stack declarations. With
+# the frame tracked incrementally the time per declaration should stay flat
+# as the count doubles.
+# Usage: python3 stack_layout.py [declarations ...]
+
+def generate_program(declaration_count):
+    lines = [f"alloc(stack, {declaration_count})"]
+    for i in range(declaration_count):
+        lines.append(f"stack s{i}: uint8 = {i % 256}")
+    return '\n'.join(lines)
+
+def best_of(run, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [6_250, 12_500, 25_000, 50_000, 100_000]
+    print(f"{'declarations':>12}{'analyze':>10}{'per decl':>12}{'growth':>8}")
+    previous = None
+    for count in counts:
+        program = Parser(Lexer(generate_program(count)).tokenize()).parse()
+        symbol_table, elapsed = best_of(lambda: SemanticAnalyzer().analyze(program))
+        assert symbol_table[-1].offset == count - 1
+
+        growth = f"{elapsed / previous:.2f}x" if previous else "-"
+        print(f"{count:>12}{elapsed:>9.3f}s{elapsed / count * 1e6:>10.2f}us{growth:>8}")
+        previous = elapsed
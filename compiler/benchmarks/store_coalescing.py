@@ -0,0 +1,57 @@
+import sys
+import os
+import random
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer import Lexer
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from codegen import Codegen
+from assembly import count_instructions
+
+# Instructions Codegen spends initializing a block of N stack locals with
+# constants, coalesced into wide stores and stp pairs against the two
+# instruction per local mov/strb it takes a statement at a time.
+# Usage: python3 store_coalescing.py [locals ...]
+
+def generate_program(local_count, zero_ratio, seed=0):
+    rng = random.Random(seed)
+    lines = [f"alloc(stack, {local_count})"]
+    for i in range(local_count):
+        kind = rng.random()
+        if rng.random() < zero_ratio:
+            lines.append(f"stack s{i}: uint8 = 0")
+        elif kind < 0.6:
+            lines.append(f"stack s{i}: uint8 = {rng.randrange(1, 256)}")
+        elif kind < 0.8:
+            lines.append(f"stack s{i}: char = '{rng.choice('abcxyz')}'")
+        else:
+            lines.append(f"stack s{i}: bool = true")
+    return '\n'.join(lines)
+
+def one_at_a_time(symbol_table, statements):
+    # The frame and exit instructions of the whole program plus each
+    # statement generated on its own
+    total = count_instructions(Codegen(symbol_table, []).generate_lines())
+    for statement in statements:
+        codegen = Codegen(symbol_table, [])
+        codegen._generate_statements([statement])
+        total += count_instructions(codegen.assembly_code)
+    return total
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    print(f"{'locals':>8}{'zeros':>7}{'separate':>10}{'coalesced':>11}{'saved':>7}{'codegen':>10}")
+    for count in counts:
+        for zero_ratio in (0.0, 0.5, 1.0):
+            program = Parser(Lexer(generate_program(count, zero_ratio)).tokenize()).parse()
+            symbol_table = SemanticAnalyzer().analyze(program)
+
+            start = time.perf_counter()
+            lines = Codegen(symbol_table, program.statements).generate_lines()
+            elapsed = time.perf_counter() - start
+
+            separate = one_at_a_time(symbol_table, program.statements)
+            coalesced = count_instructions(lines)
+            print(f"{count:>8}{zero_ratio:>7.0%}{separate:>10}{coalesced:>11}{1 - coalesced / separate:>7.0%}{elapsed:>9.3f}s")
@@ -0,0 +1,49 @@
+import sys
+import os
+import random
+import time
+import tracemalloc
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer import Lexer
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from codegen import Codegen
+
+# Memory held by the symbol table and analyze/codegen time for a program of
+# N stack declarations followed by N assignments between them.
+# Usage: python3 symbol_table.py [declarations]
+
+def generate_program(declaration_count, seed=0):
+    rng = random.Random(seed)
+    lines = [f"alloc(stack, {declaration_count})"]
+    for i in range(declaration_count):
+        lines.append(f"stack s{i}: uint8 = {rng.randrange(100)}")
+    for i in range(declaration_count):
+        lines.append(f"s{i} = add(s{rng.randrange(declaration_count)}, 0)")
+    return '\n'.join(lines)
+
+if __name__ == "__main__":
+    declaration_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    program = Parser(Lexer(generate_program(declaration_count)).tokenize()).parse()
+
+    # Program is already allocated, what a traced analysis leaves behind is
+    # the symbol table, its name index and the ids written onto the AST
+    tracemalloc.start()
+    symbol_table = SemanticAnalyzer().analyze(program)
+    symbol_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del symbol_table
+
+    start = time.perf_counter()
+    symbol_table = SemanticAnalyzer().analyze(program)
+    analyze_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    Codegen(symbol_table, program.statements).generate()
+    codegen_time = time.perf_counter() - start
+
+    print(f"declarations: {declaration_count}")
+    print(f"symbol table: {symbol_bytes / 2**20:.1f} MiB  ({symbol_bytes / declaration_count:.0f} B/symbol)")
+    print(f"analyze:      {analyze_time:.3f}s")
+    print(f"codegen:      {codegen_time:.3f}s")
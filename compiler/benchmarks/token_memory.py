@@ -0,0 +1,41 @@
+import sys
+import os
+import time
+import tracemalloc
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from lexer import Lexer
+from lexer_throughput import generate_source
+
+# Bytes per token held by a list of Token objects, a TokenBuffer, and an
+# offsets-only TokenBuffer over a memoryview (tokenize_offsets).
+# The source string is allocated before tracing starts, so it isn't counted.
+
+def traced(run):
+    # Timed separately, tracemalloc slows allocation-heavy code down a lot
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = run()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+source_code = generate_source(int(megabytes * 1024 * 1024))
+
+tokens, list_bytes, list_time = traced(lambda: Lexer(source_code).tokenize())
+count = len(tokens)
+del tokens
+buffer, buffer_bytes, buffer_time = traced(lambda: Lexer(source_code).tokenize_buffer())
+buffer_arrays = buffer.nbytes()
+del buffer
+# Includes the ASCII bytes copy of the source the offsets point into
+offsets, offsets_bytes, offsets_time = traced(lambda: Lexer(source_code).tokenize_offsets())
+
+print(f"tokens: {count}")
+print(f"Token list:  {list_bytes / count:6.1f} bytes/token  {list_time:.3f}s")
+print(f"TokenBuffer: {buffer_bytes / count:6.1f} bytes/token  {buffer_time:.3f}s  (arrays alone: {buffer_arrays / count:.1f})")
+print(f"Offsets:     {offsets_bytes / count:6.1f} bytes/token  {offsets_time:.3f}s  (arrays alone: {offsets.nbytes() / count:.1f})")
@@ -0,0 +1,165 @@
+import sys
+import os
+import random
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from symbols import TYPES, INTEGER_TYPES
+
+# Seeded generator of valid .gala programs of a given size for the
+# pipeline benchmarks. The mix weights pick what each statement is, the
+# generator tracks every variable's value the way SemanticAnalyzer does so
+# no sum leaves its type's range.
+# Usage: python3 workload.py <size, e.g. 64K or 10M> [seed] > program.gala
+
+# Statement kinds: register and stack declarations, plain assignments and
+# assignments of nested adds
+DEFAULT_MIX = {'reg': 0.15, 'stack': 0.15, 'assign': 0.4, 'add': 0.3}
+DEFAULT_TYPES = {'uint8': 0.5, 'int8': 0.3, 'char': 0.1, 'bool': 0.1}
+
+# Declaration values are small so adds have room to grow
+LITERAL_MAX = 9
+PINNABLE_REGISTERS = ['x9', 'x10', 'x11', 'x12', 'x13', 'x14', 'x15']
+CHARACTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+def parse_size(text):
+    # 512, 64K, 10M
+    multipliers = {'K': 1024, 'M': 1024 * 1024}
+    suffix = text[-1].upper()
+    if suffix in multipliers:
+        return int(float(text[:-1]) * multipliers[suffix])
+    return int(text)
+
+def format_size(size):
+    for unit, multiplier in (('M', 1024 * 1024), ('K', 1024)):
+        if size >= multiplier and size % multiplier == 0:
+            return f"{size // multiplier}{unit}"
+    return str(size)
+
+class WorkloadGenerator:
+    # add_depth is how deep adds nest, alloc_slack the stack bytes allocated
+    # beyond what the stack declarations need and pinned_ratio the share of
+    # register declarations given one of x9-x15 while any is free.
+    def __init__(self, seed=0, mix=DEFAULT_MIX, types=DEFAULT_TYPES, add_depth=3, alloc_slack=0, pinned_ratio=0.1):
+        self.rng = random.Random(seed)
+        self.kinds, self.kind_weights = list(mix), list(mix.values())
+        self.types, self.type_weights = list(types), list(types.values())
+        self.add_depth = add_depth
+        self.alloc_slack = alloc_slack
+        self.pinned_ratio = pinned_ratio
+
+        self.values = {}
+        self.names = []
+        self.integer_names = []
+        self.type_of = {}
+        self.names_by_type = {type: [] for type in TYPES}
+        self.free_registers = list(PINNABLE_REGISTERS)
+        self.stack_bytes = 0
+
+    def generate(self, target_bytes):
+        # Statements until the program reaches target_bytes, the alloc that
+        # has to come first is sized once the stack declarations are known
+        lines = []
+        size = 0
+        while size < target_bytes:
+            line = self._statement()
+            lines.append(line)
+            size += len(line) + 1
+        alloc = f"alloc(stack, {self.stack_bytes + self.alloc_slack})"
+        return alloc + '\n' + '\n'.join(lines) + '\n'
+
+    def _statement(self):
+        kind = self.rng.choices(self.kinds, self.kind_weights)[0]
+        if kind in ('assign', 'add') and not self.names:
+            kind = 'reg'
+        if kind == 'reg' or kind == 'stack':
+            return self._declaration(kind)
+        if kind == 'add' and self.integer_names:
+            return self._add_assignment(self.rng.choice(self.integer_names))
+        return self._assignment()
+
+    def _declaration(self, kind):
+        type = self.rng.choices(self.types, self.type_weights)[0]
+        name = f"{kind[0]}{len(self.names)}"
+        if type in INTEGER_TYPES:
+            if self.rng.random() < 0.3 and self.names_by_type[type]:
+                value, text = self._add(type, TYPES[type].maximum, 1)
+            else:
+                value = self.rng.randint(0, LITERAL_MAX)
+                text = str(value)
+        elif type == 'char':
+            value = text = f"'{self.rng.choice(CHARACTERS)}'"
+        else:
+            value = text = self.rng.choice(('true', 'false'))
+
+        if kind == 'stack':
+            self.stack_bytes += TYPES[type].size
+            line = f"stack {name}: {type} = {text}"
+        elif self.free_registers and self.rng.random() < self.pinned_ratio:
+            line = f"reg {name}: {type} @ {self.free_registers.pop(0)} = {text}"
+        else:
+            line = f"reg {name}: {type} = {text}"
+        self.values[name] = value
+        self.names.append(name)
+        self.type_of[name] = type
+        self.names_by_type[type].append(name)
+        if type in INTEGER_TYPES:
+            self.integer_names.append(name)
+        return line
+
+    def _assignment(self):
+        name = self.rng.choice(self.names)
+        type = self.type_of[name]
+        if self.rng.random() < 0.5:
+            source = self.rng.choice(self.names_by_type[type])
+            self.values[name] = self.values[source]
+            return f"{name} = {source}"
+        if type in INTEGER_TYPES:
+            value = self.rng.randint(0, LITERAL_MAX)
+            self.values[name] = value
+            return f"{name} = {value}"
+        if type == 'char':
+            value = f"'{self.rng.choice(CHARACTERS)}'"
+        else:
+            value = self.rng.choice(('true', 'false'))
+        self.values[name] = value
+        return f"{name} = {value}"
+
+    def _add_assignment(self, name):
+        type = self.type_of[name]
+        if self.rng.random() < 0.3:
+            # The infix form, a flat chain the parser folds into adds
+            value, operands = 0, []
+            for _ in range(self.rng.randint(2, 4)):
+                operand_value, operand = self._leaf(type, TYPES[type].maximum - value)
+                value += operand_value
+                operands.append(operand)
+            text = ' + '.join(operands)
+        else:
+            value, text = self._add(type, TYPES[type].maximum, self.rng.randint(1, self.add_depth))
+        self.values[name] = value
+        return f"{name} = {text}"
+
+    def _add(self, type, budget, depth):
+        # A nested add whose sum stays within budget, the operands are
+        # walked left to right so each takes from what the earlier ones left
+        if depth == 0:
+            return self._leaf(type, budget)
+        left_value, left = self._add(type, budget, self.rng.randint(0, depth - 1))
+        right_value, right = self._add(type, budget - left_value, self.rng.randint(0, depth - 1))
+        return left_value + right_value, f"add({left}, {right})"
+
+    def _leaf(self, type, budget):
+        names = self.names_by_type[type]
+        for _ in range(3):
+            name = self.rng.choice(names)
+            if self.values[name] <= budget:
+                return self.values[name], name
+        value = self.rng.randint(0, min(budget, LITERAL_MAX))
+        return value, str(value)
+
+def generate_workload(target_bytes, seed=0, **options):
+    return WorkloadGenerator(seed, **options).generate(target_bytes)
+
+if __name__ == "__main__":
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    sys.stdout.write(generate_workload(parse_size(sys.argv[1]), seed))
@@ -0,0 +1,7 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# test.py and test_old.py are example drivers that build test.gala when
+# run, not tests
+collect_ignore = ['test.py', 'test_old.py']
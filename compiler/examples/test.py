@@ -5,12 +5,14 @@ sys.path.append('../src')
 
 from lexer import Lexer
 
-with open('test.gala', 'r') as f:
-    source_code = f.read()
+# Printing every token swamps the lexer's own time, pass --dump to see them
+DUMP = '--dump' in sys.argv
 
 print("\n##### LEXER #####")
-lexer = Lexer(source_code)
-tokens = lexer.tokenize()
-
-for token in tokens:
-    print(f"Token(type={token.type}, value='{token.value}', line={token.line})")
\ No newline at end of file
+token_count = 0
+with open('test.gala', 'r') as f:
+    for token in Lexer(f).iter_tokens():
+        token_count += 1
+        if DUMP:
+            print(f"Token(type={token.type}, value='{token.value}', line={token.line})")
+print(f"{token_count} tokens")
@@ -0,0 +1,54 @@
+import re
+
+import pytest
+
+from drivers import compile_source
+
+# Checks the immediates in emitted assembly fit their instruction's
+# encoding, which is what the assembler would reject them for
+
+ADDRESS = re.compile(r'\[(\w+), #(-?\d+)\]$')
+
+def encoding_errors(assembly):
+    errors = []
+    for line in assembly.splitlines():
+        opcode, _, operands = line.strip().partition(' ')
+        operands = operands.split(', ')
+        if opcode in ('add', 'sub') and (operands[-1].startswith('#') or operands[-1] == 'lsl #12'):
+            shifted = operands[-1] == 'lsl #12'
+            value = int((operands[-2] if shifted else operands[-1])[1:], 0)
+            if not 0 <= value <= 0xfff:
+                errors.append(line.strip())
+            continue
+        address = ADDRESS.search(line)
+        if address is None:
+            continue
+        offset = int(address.group(2))
+        if opcode == 'stp':
+            size, limit = 8, 504
+        else:
+            size = {'b': 1, 'h': 2}.get(opcode[-1], 8 if operands[0].startswith('x') and opcode[-1] != 'w' else 4)
+            limit = 4095 * size
+        if not 0 <= offset <= limit or offset % size:
+            errors.append(line.strip())
+    return errors
+
+FLAGS = [(), ('ir',), ('fold', 'peephole')]
+
+@pytest.mark.parametrize('size', [16, 4095, 4096, 5000, 0xfff000, 0x1000000])
+def test_frame_of_any_size_is_encodable(size):
+    assembly = compile_source(f"alloc(stack, {size})\nstack s: uint8 = 5\n")
+    assert encoding_errors(assembly) == []
+
+# Byte variables past 4095 and 8 byte coalesced stores past 32760, read
+# back signed and unsigned, on their own and as add operands
+FAR_SLOTS = ("alloc(stack, 40000)\n"
+             + ''.join(f"stack s{i}: uint8 = {i % 7 + 1}\n" for i in range(33000))
+             + "stack t: int8 = 3\nreg r: int8 @ x9 = add(t, 1)\nt = r\n"
+             + "s32999 = s32998\ns32999 = s1 + s32998\nreg u: uint8 = add(s4100, 0)\ns4101 = u\n")
+
+@pytest.mark.parametrize('flags', FLAGS)
+def test_far_stack_slots_are_encodable(flags):
+    assembly = compile_source(FAR_SLOTS, flags)
+    assert encoding_errors(assembly) == []
+    assert '[x17, #' in assembly
@@ -0,0 +1,48 @@
+import os
+import socket
+import threading
+
+import pytest
+
+import compile_server
+from compile_client import compile_inputs
+from drivers import compile_file
+
+def exit_on_crash(source_code, flags=()):
+    # Kills the worker process outright, nothing in it gets to report
+    if 'crash' in source_code:
+        os._exit(1)
+    return compile_file(source_code, flags)
+
+@pytest.fixture
+def serve(monkeypatch, tmp_path):
+    # Workers are forked when the server starts, after the patch. A
+    # request that never gets an answer fails on the client's timeout
+    # rather than hanging the suite.
+    monkeypatch.setattr(compile_server, 'compile_file', exit_on_crash)
+    socket_path = str(tmp_path / 'compile.sock')
+    server = compile_server.CompileServer(socket_path, jobs=1, max_pending=1)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    timeout = socket.getdefaulttimeout()
+    socket.setdefaulttimeout(30)
+    try:
+        yield lambda inputs: compile_inputs(inputs, socket_path=socket_path)
+    finally:
+        socket.setdefaulttimeout(timeout)
+        server.shutdown()
+        thread.join()
+        server.server_close()
+
+def test_worker_crash_is_a_per_input_error(serve, tmp_path):
+    results = serve([{'source': "reg crash: int8 @ x9 = 1\n"}, {'path': str(tmp_path / 'missing.gala')}])
+    assert results[0]['error'].startswith("INTERNAL ERROR: BrokenProcessPool")
+    assert 'No such file' in results[1]['error']
+
+def test_requests_after_a_worker_crash_succeed(serve):
+    serve([{'source': "reg crash: int8 @ x9 = 1\n"}])
+    # Only one input may be pending, a permit lost to the broken pool
+    # would block these for good
+    for _ in range(3):
+        results = serve([{'source': "reg a: int8 @ x9 = 1\n"}])
+        assert 'mov x9, #1' in results[0]['assembly']
@@ -0,0 +1,76 @@
+import pytest
+
+from constant_folding import ConstantFolder
+from drivers import compile_source
+from lexer import Lexer
+from parser import Parser
+from pass_timing import PassTimer
+from semantic_analyzer import SemanticAnalyzer
+from errors import SemanticError
+
+# Folding changes what gets emitted but never what a program leaves in its
+# registers. These programs only use pinned registers so running the few
+# instructions they compile to is enough to compare the two.
+
+PROGRAMS = [
+    # A char literal spelled like a variable is still the literal
+    "reg a: char @ x9 = 'b'\nreg c: char @ x10 = 'a'\nc = 'a'\nc = a\n",
+    "reg t: bool @ x9 = true\nreg f: bool @ x10 = false\nf = t\nt = false\n",
+    "reg a: int8 @ x9 = 5\nreg b: int8 @ x10 = 1\nb = a\nb = add(b, a)\n",
+    "reg x: uint8 @ x9 = 7\nreg y: uint8 @ x10 = add(x, 3)\nx = y + 2 + x\ny = x\nx = 0\n",
+    "reg a: char @ x9 = 'a'\nreg b: char @ x10 = 'b'\nb = a\na = 'b'\nb = 'a'\n",
+]
+
+def registers(assembly):
+    # Final x9-x15 of the mov and add instructions the programs above
+    # compile to, everything else is the exit sequence
+    values = {}
+    for line in assembly.splitlines():
+        opcode, _, operands = line.strip().partition(' ')
+        operands = operands.split(', ')
+        if opcode == 'svc':
+            break
+        if opcode == 'mov':
+            values[operands[0]] = _operand(values, operands[1])
+        elif opcode == 'add':
+            values[operands[0]] = _operand(values, operands[1]) + _operand(values, operands[2])
+    return {register: values[register] for register in values if register not in ('x0', 'x16')}
+
+def _operand(values, operand):
+    if operand.startswith('#'):
+        return int(operand[1:], 0)
+    return values[operand]
+
+@pytest.mark.parametrize('source_code', PROGRAMS)
+def test_fold_keeps_register_values(source_code):
+    assert registers(compile_source(source_code, ('fold',))) == registers(compile_source(source_code))
+
+def test_char_literal_in_integer_assignment_is_rejected_either_way():
+    source_code = "reg a: int8 @ x9 = 5\nreg b: int8 @ x10 = 1\nb = 'a'\n"
+    messages = []
+    for flags in ((), ('fold',)):
+        with pytest.raises(SemanticError) as error:
+            compile_source(source_code, flags)
+        messages.append(error.value.message)
+    assert messages[0] == messages[1]
+
+def _instructions(assembly):
+    return sum(1 for line in assembly.splitlines() if line.startswith('    '))
+
+# Two constant stack stores once folded, which codegen writes as one
+SAVING = ("alloc(stack, 4)\nreg x: uint8 @ x9 = 3\nreg u: uint8 = add(x, 1)\n"
+          "stack s: uint8 = add(x, 2)\nstack t: int8 = 1 + 2 + 3\nu = x\n")
+
+def test_saved_instructions_match_codegen():
+    program = Parser(Lexer(SAVING).tokenize()).parse()
+    folder = ConstantFolder(SemanticAnalyzer().analyze(program))
+    folder.fold(program)
+    saved = _instructions(compile_source(SAVING)) - _instructions(compile_source(SAVING, ('fold',)))
+    assert saved > 0 and folder.saved_instructions == saved
+
+def test_timed_fold_phase_reports_saved_instructions():
+    timer = PassTimer(trace_memory=False)
+    compile_source(SAVING, ('fold',), timer)
+    phase = next(record for record in timer.phases if record['name'] == 'fold')
+    saved = _instructions(compile_source(SAVING)) - _instructions(compile_source(SAVING, ('fold',)))
+    assert phase['saved_instructions'] == saved and phase['folded_adds'] == 4
@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import pytest
+
+import pipeline_suite
+from dead_store_elimination import DeadStoreEliminator
+from drivers import compile_source
+from lexer import Lexer
+from parser import Parser
+from pass_timing import PassTimer
+from semantic_analyzer import SemanticAnalyzer
+
+# Dead store elimination runs before register allocation, so whatever it
+# drops or keeps must not need a register yet
+
+def test_unpinned_register_read_from_stack():
+    source_code = "alloc(stack, 16)\nstack s: uint8 = 5\nreg u: uint8 = 1\nu = s\n"
+    assembly = compile_source(source_code, ('dse',))
+    assert 'None' not in assembly
+
+# The count is taken before allocation, exact while nothing spills. The
+# constant stores to s and t coalesce into one.
+COSTED = ("alloc(stack, 16)\nstack s: uint8 = 1\nstack t: uint8 = 2\nreg u: uint8 = 1\nu = s\n"
+          "reg v: uint8 @ x10 = add(u, 3)\nv = 4\n")
+
+def test_eliminated_instructions_match_codegen():
+    program = Parser(Lexer(COSTED).tokenize()).parse()
+    eliminator = DeadStoreEliminator(SemanticAnalyzer().analyze(program))
+    eliminator.eliminate(program)
+    before = _instructions(compile_source(COSTED))
+    after = _instructions(compile_source(COSTED, ('dse',)))
+    assert eliminator.eliminated_statements == 5
+    assert eliminator.eliminated_instructions == before - after
+
+def test_timed_dse_phase_reports_eliminated_instructions():
+    timer = PassTimer(trace_memory=False)
+    compile_source(COSTED, ('dse',), timer)
+    phase = next(record for record in timer.phases if record['name'] == 'dse')
+    assert phase['eliminated_statements'] == 5 and phase['eliminated_instructions'] == 5
+
+def _instructions(assembly):
+    return sum(1 for line in assembly.splitlines() if line.startswith('    '))
+
+@pytest.mark.parametrize('flags', ['dse', 'fold,dse'])
+def test_pipeline_suite_runs_with_dse(flags, tmp_path):
+    argv = ['--sizes', '4K', '--flags', flags, '--repeat', '1', '--baseline', str(tmp_path / 'baseline.json')]
+    assert pipeline_suite.main(argv) == 0
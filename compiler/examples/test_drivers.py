@@ -0,0 +1,67 @@
+import os
+
+import drivers
+from ast_cache import ParseCache
+from drivers import Driver, compile_file
+from pass_timing import PassTimer
+
+def test_compile_file_reports_internal_errors(monkeypatch):
+    def crash(*args, **kwargs):
+        raise RuntimeError("broken pass")
+    monkeypatch.setattr(drivers, 'compile_source', crash)
+    assert compile_file("reg a: int8 @ x9 = 1\n") == (None, "INTERNAL ERROR: RuntimeError: broken pass")
+
+def test_build_all_keeps_other_results_in_order(monkeypatch, tmp_path):
+    # The pool's workers are forked, so they see the patched compile_source
+    compile_source = drivers.compile_source
+    def crash_on_b(source_code, *args, **kwargs):
+        if 'b' in source_code:
+            raise RuntimeError("broken pass")
+        return compile_source(source_code, *args, **kwargs)
+    monkeypatch.setattr(drivers, 'compile_source', crash_on_b)
+
+    paths = []
+    for name, source_code in (('a', "reg a: int8 @ x9 = 1\n"), ('b', "reg b: int8 @ x9 = 1\n"),
+                              ('c', "reg c: int8 @ x9 = add(1, 2)\n"), ('d', "reg d: int8 @ x9 = 'd'\n")):
+        path = tmp_path / f"{name}.gala"
+        path.write_text(source_code)
+        paths.append(str(path))
+
+    results = Driver(str(tmp_path / 'build')).build_all(paths, stage='assembly', jobs=2)
+    assert [error for _, error in results] == [
+        None, "INTERNAL ERROR: RuntimeError: broken pass", None,
+        "SEMANTIC ERROR: Type int8 expects an integer value, got d"]
+    assert results[0][0].endswith('a.s') and results[2][0].endswith('c.s')
+
+def test_timed_builds_skip_the_parse_cache(tmp_path):
+    source_path = tmp_path / 'a.gala'
+    source_path.write_text("reg a: int8 @ x9 = add(1, 2)\n")
+    parse_cache = ParseCache(str(tmp_path / 'parse-cache'), drivers.COMPILER_VERSION)
+    driver = Driver(str(tmp_path / 'build'), parse_cache=parse_cache)
+    driver.build(str(source_path), stage='assembly')
+
+    timer = PassTimer(trace_memory=False)
+    driver.build(str(source_path), stage='assembly', timer=timer)
+    names = [record['name'] for record in timer.phases]
+    assert 'load' not in names and names[:2] == ['lex', 'parse']
+
+def test_build_all_survives_a_worker_dying(monkeypatch, tmp_path):
+    compile_source = drivers.compile_source
+    def exit_on_crash(source_code, *args, **kwargs):
+        if 'crash' in source_code:
+            os._exit(1)
+        return compile_source(source_code, *args, **kwargs)
+    monkeypatch.setattr(drivers, 'compile_source', exit_on_crash)
+
+    paths = []
+    for name in ('a', 'crash', 'c'):
+        path = tmp_path / f"{name}.gala"
+        path.write_text(f"reg {name}: int8 @ x9 = 1\n")
+        paths.append(str(path))
+
+    results = Driver(str(tmp_path / 'build')).build_all(paths, stage='assembly', jobs=2)
+    assert len(results) == 3
+    assert results[1][0] is None and results[1][1].startswith("INTERNAL ERROR: BrokenProcessPool")
+    # The others may have been lost with the pool, but each is reported
+    for output_path, error in results:
+        assert (output_path is None) != (error is None)
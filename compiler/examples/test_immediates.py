@@ -0,0 +1,83 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from collections import Counter
+
+import pytest
+
+from immediates import add_immediate, is_logical_immediate
+from immediate_synthesis import MASK, execute, logical_immediates, check_materialize
+
+# The value ranges immediate_synthesis.py checks, cut down to what runs
+# in a second or two: every addend around each edge of the 12 bit and 24
+# bit add/sub immediate split, every shifted 12 bit addend and every
+# bitmask immediate. The benchmark keeps the full halfword and random
+# sweeps.
+
+SOURCE = 0x123456789
+
+def add(value):
+    instructions = add_immediate('x9', 'x10', value, 'x17')
+    got = execute(instructions, {'x9': 0, 'x10': SOURCE, 'x17': 0}, 64)['x9']
+    assert got == (SOURCE + value) & MASK[64], f"{value:#x}: {[str(i) for i in instructions]}"
+    return instructions
+
+def edge(value, reach=0x200):
+    # Both signs of everything within reach of value
+    return [sign * magnitude for magnitude in range(max(0, value - reach), value + reach) for sign in (1, -1)]
+
+@pytest.mark.parametrize('value', [0xfff, 0x1000], ids=hex)
+def test_add_12_bit_edge(value):
+    for addend in edge(value):
+        instructions = add(addend)
+        if abs(addend) <= 0xfff:
+            assert len(instructions) == 1 and len(instructions[0].operands) == 3
+        else:
+            assert len(instructions) == (1 if abs(addend) % 0x1000 == 0 else 2)
+            assert all('x17' not in instruction.operands for instruction in instructions)
+
+@pytest.mark.parametrize('value', [0xfff000, 0x1000000], ids=hex)
+def test_add_24_bit_edge(value):
+    for addend in edge(value):
+        instructions = add(addend)
+        if abs(addend) <= 0xffffff:
+            # Split into a low and a shifted high immediate, no scratch
+            assert all('x17' not in instruction.operands for instruction in instructions)
+            assert len(instructions) == (1 if abs(addend) % 0x1000 == 0 else 2)
+        else:
+            assert instructions[-1].operands == ('x9', 'x10', 'x17')
+
+def test_add_every_shifted_12_bit_value():
+    for high in range(0x1000):
+        for addend in (high << 12, -(high << 12)):
+            instructions = add(addend)
+            assert len(instructions) == 1
+
+def test_add_across_24_bit_range():
+    # A stride prime to 0x1000 so every low 12 bit pattern turns up
+    for magnitude in range(0, 1 << 24, 0x1001):
+        assert len(add(magnitude)) <= 2 and len(add(-magnitude)) <= 2
+
+@pytest.mark.parametrize('width', [64, 32])
+def test_materialize_bitmask_immediates(width):
+    costs = Counter()
+    bitmasks = logical_immediates(width)
+    for value in bitmasks:
+        assert is_logical_immediate(value, width)
+        check_materialize(value, width, costs, 1)
+    for value in (0, MASK[width]):
+        assert not is_logical_immediate(value, width)
+    assert set(costs) == {1}
+
+@pytest.mark.parametrize('width', [64, 32])
+def test_materialize_single_halfwords(width):
+    # One halfword set, or clear under movn, in any position is one
+    # instruction
+    costs = Counter()
+    halfwords = sorted(set(range(0, 0x10000, 0x101)) | {0x7fff, 0x8000, 0xfffe, 0xffff})
+    for value in halfwords:
+        for shift in range(0, width, 16):
+            check_materialize(value << shift, width, costs, 1)
+            check_materialize(~(value << shift), width, costs, 1)
+    assert set(costs) == {1}
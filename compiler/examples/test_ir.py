@@ -0,0 +1,35 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import pytest
+
+import pipeline_suite
+from drivers import compile_source
+from workload import generate_workload
+
+# The IR backend emits the same assembly as Codegen, including after dead
+# store elimination has dropped declarations whose first value is never read
+
+PROGRAMS = [
+    "alloc(stack, 16)\nstack s: uint8 = 5\nreg u: uint8 = 1\nu = s\n",
+    "reg v: uint8 @ x9 = 2\nv = 3\n",
+    "alloc(stack, 2)\nstack a: int8 = 1\nreg b: int8 @ x9 = 2\na = 4\nb = a + 1\n",
+]
+
+FLAGS = [(), ('dse',), ('fold', 'dse')]
+
+@pytest.mark.parametrize('source_code', PROGRAMS)
+@pytest.mark.parametrize('flags', FLAGS)
+def test_ir_matches_codegen(source_code, flags):
+    assert compile_source(source_code, flags + ('ir',)) == compile_source(source_code, flags)
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('flags', FLAGS)
+def test_ir_matches_codegen_on_workloads(seed, flags):
+    source_code = generate_workload(4096, seed)
+    assert compile_source(source_code, flags + ('ir',)) == compile_source(source_code, flags)
+
+def test_pipeline_suite_runs_with_dse_and_ir(tmp_path):
+    argv = ['--sizes', '4K', '--flags', 'dse,ir', '--repeat', '1', '--baseline', str(tmp_path / 'baseline.json')]
+    assert pipeline_suite.main(argv) == 0
@@ -0,0 +1,193 @@
+import mmap
+
+import pytest
+
+import lexer as lexer_module
+from errors import LexerError
+from lexer import Lexer, IncrementalLexer
+from tokens import LineTable
+
+# Every lexer engine has to produce what the original character by
+# character lexer does: the same tokens on the same lines, or the same
+# error message on the same line
+
+def scalar(source_code):
+    return lexed(Lexer(source_code)._tokenize_scalar)
+
+def lexed(tokenize):
+    try:
+        return [(token.type, token.value, token.line) for token in tokenize()]
+    except LexerError as error:
+        return (error.message, error.line)
+
+VALID = [
+    "",
+    "\n\n",
+    "alloc(stack, 16)\nreg a: uint8 @ x9 = 5\nstack s: char = 'x'\na = add(a, 3)\n",
+    # Digits running into letters split, keywords and registers followed by
+    # more characters are identifiers
+    "reg x16: int8 = 12ab + reg1\n",
+    "  reg   c: char = ' '\nc = ''\n",
+    "c = ':@=(),+'\nc = 'a''b'",
+    "reg b: bool @ x15 = true\nb = false",
+    "a=add(b,c)+1+2\n\n\n   x9\n",
+    # Not ASCII, every engine falls back to the scalar lexer
+    "reg \u00e91: char = '\u00fc'\n\u00e91 = 'x'\n",
+]
+
+INVALID = [
+    "$",
+    "reg a: int8 = 1\n\treg b",
+    "a = 1\r\nb = 2\n",
+    "a = 1\n\nb = 'x' #\n",
+    "a = 1\nb = 2 \u20ac\n",
+    "reg \u00e9: char = 'x'\n$",
+    # A literal ends at its line, the quote on the next line opens another
+    "c = 'a\nb'",
+    "c = 'a\nc = 'b'\n",
+    "c = '''\n",
+    "a = 'x' 'y\n",
+]
+
+SOURCES = VALID + INVALID
+
+# Pattern lexing
+
+@pytest.mark.parametrize('source_code', SOURCES)
+def test_tokenize_matches_scalar(source_code):
+    assert lexed(Lexer(source_code).tokenize) == scalar(source_code)
+
+# Streaming lexing
+
+@pytest.fixture
+def open_source(tmp_path):
+    # The source as a str, bytes, a text or binary file, or an mmap of one.
+    # Files are opened without newline translation so they hold the same
+    # characters as the str.
+    opened = []
+
+    def open_source(source_code, kind):
+        if kind == 'str':
+            return source_code
+        if kind == 'bytes':
+            return source_code.encode('utf-8')
+
+        path = tmp_path / f"source{len(opened)}.gala"
+        path.write_bytes(source_code.encode('utf-8'))
+        opened.append(open(path, newline='') if kind == 'text_file' else open(path, 'rb'))
+        if kind == 'mmap':
+            if not source_code:
+                pytest.skip("an empty file can't be mapped")
+            opened.append(mmap.mmap(opened[-1].fileno(), 0, access=mmap.ACCESS_READ))
+        return opened[-1]
+
+    yield open_source
+    for source in reversed(opened):
+        source.close()
+
+STREAMS = ['str', 'text_file', 'binary_file', 'mmap']
+
+@pytest.mark.parametrize('kind', STREAMS)
+@pytest.mark.parametrize('source_code', SOURCES)
+def test_iter_tokens_matches_scalar(source_code, kind, open_source):
+    expected = scalar(source_code)
+    assert lexed(Lexer(open_source(source_code, kind)).iter_tokens) == expected
+    if kind != 'str':
+        assert lexed(Lexer(open_source(source_code, kind)).tokenize) == expected
+
+    # Every chunk size up to the whole source, which puts a chunk boundary
+    # inside each token, between the bytes of a multi-byte character and
+    # right after each newline
+    for chunk_size in range(1, len(source_code.encode('utf-8')) + 1):
+        assert lexed(lambda: Lexer(open_source(source_code, kind)).iter_tokens(chunk_size)) == expected
+
+# Token buffers
+
+@pytest.mark.parametrize('kind', STREAMS)
+@pytest.mark.parametrize('source_code', SOURCES)
+def test_tokenize_buffer_matches_scalar(source_code, kind, open_source):
+    expected = scalar(source_code)
+    assert lexed(Lexer(open_source(source_code, kind)).tokenize_buffer) == expected
+    if not isinstance(expected, tuple):
+        buffer = Lexer(open_source(source_code, kind)).tokenize_buffer()
+        assert lexed(lambda: [buffer[index] for index in range(len(buffer))]) == expected
+
+# Offsets-only lexing
+
+@pytest.mark.parametrize('kind', STREAMS + ['bytes'])
+@pytest.mark.parametrize('source_code', SOURCES)
+def test_tokenize_offsets_matches_scalar(source_code, kind, open_source):
+    expected = scalar(source_code)
+    assert lexed(Lexer(open_source(source_code, kind)).tokenize_offsets) == expected
+    if not isinstance(expected, tuple):
+        buffer = Lexer(open_source(source_code, kind)).tokenize_offsets()
+        assert lexed(lambda: [buffer[index] for index in range(len(buffer))]) == expected
+
+@pytest.mark.parametrize('source_code', SOURCES)
+def test_line_table_matches_newline_count(source_code):
+    source = source_code.encode('utf-8')
+    line_table = LineTable(memoryview(source))
+    assert [line_table.line(offset) for offset in range(len(source) + 1)] == \
+           [source.count(b'\n', 0, offset) + 1 for offset in range(len(source) + 1)]
+
+# Vectorized lexing
+
+needs_numpy = pytest.mark.skipif(lexer_module.np is None, reason="numpy not installed")
+
+@needs_numpy
+@pytest.mark.parametrize('source_code', SOURCES)
+def test_tokenize_vectorized_matches_scalar(source_code):
+    assert lexed(Lexer(source_code).tokenize_vectorized) == scalar(source_code)
+
+def test_tokenize_vectorized_without_numpy(monkeypatch):
+    monkeypatch.setattr(lexer_module, 'np', None)
+    with pytest.raises(ImportError, match="requires numpy"):
+        Lexer("a = 1\n").tokenize_vectorized()
+
+# Incremental lexing
+
+SOURCE = "alloc(stack, 16)\nreg a: uint8 @ x9 = 5\nstack s: char = 'x'\na = add(a, 3)\n"
+
+# (start_line, start_column, end_line, end_column, replacement), applied in order
+EDITS = {
+    'insert': [(2, 21, 2, 21, '7')],
+    'insert_splits_word': [(4, 5, 4, 5, ' ')],
+    'delete': [(4, 4, 4, 13, '3')],
+    'delete_joins_words': [(2, 3, 2, 4, '')],
+    'multi_line': [(2, 4, 3, 5, "b: int8 @ x10 = 1\nstack")],
+    'adds_lines': [(1, 16, 1, 16, "\nreg b: bool = true\nreg c: int8 = 2")],
+    'removes_lines': [(2, 0, 3, 0, '')],
+    'removes_then_adds_lines': [(1, 16, 3, 19, ''), (2, 0, 2, 0, "reg d: char = 'q'\n\n")],
+    'unterminated_literal': [(3, 16, 3, 19, "'x")],
+    'unexpected_character': [(2, 4, 2, 5, '$')],
+    'error_moved_by_added_lines': [(3, 8, 3, 8, '#'), (1, 0, 1, 0, "reg e: int8 = 1\n\n")],
+    'error_fixed': [(3, 8, 3, 8, '#'), (3, 8, 3, 9, '')],
+}
+
+@pytest.mark.parametrize('edits', EDITS.values(), ids=EDITS.keys())
+def test_incremental_lexer_matches_full_relex(edits):
+    lexer = IncrementalLexer(SOURCE)
+    source_code = SOURCE
+    for edit in edits:
+        lexer.apply_edit(*edit)
+        source_code = _edited(source_code, *edit)
+    assert lexer.source_code == source_code
+
+    # Single lines first, their line numbers are fixed up on their own
+    # when the stream hasn't been read since the edit
+    expected = scalar(source_code)
+    for line in range(1, source_code.count('\n') + 2):
+        if isinstance(expected, tuple) and expected[1] == line:
+            assert lexed(lambda: lexer.tokens_for_line(line)) == expected
+        elif not isinstance(expected, tuple):
+            assert lexed(lambda: lexer.tokens_for_line(line)) == [token for token in expected if token[2] == line]
+    assert lexed(lexer.tokens) == expected
+
+def _edited(source_code, start_line, start_column, end_line, end_column, replacement):
+    lines = source_code.split('\n')
+    text = lines[start_line - 1][:start_column] + replacement + lines[end_line - 1][end_column:]
+    return '\n'.join(lines[:start_line - 1] + [text] + lines[end_line:])
+
+def test_incremental_lexer_rejects_edit_outside_source():
+    with pytest.raises(IndexError):
+        IncrementalLexer(SOURCE).apply_edit(5, 0, 6, 0, '')
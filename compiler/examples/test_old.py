@@ -9,6 +9,10 @@ from ast_nodes import RegisterDecleration, StackDecleration, VariableAssignment,
 from semantic_analyzer import SemanticAnalyzer
 from codegen import Codegen
 
+# The token, AST, symbol and assembly dumps are printed with --dump only,
+# they take longer than compiling the example
+DUMP = '--dump' in sys.argv
+
 # Read source code from .gala file
 with open('test.gala', 'r') as f:
     source_code = f.read()
@@ -17,79 +21,84 @@ print("\n##### LEXER #####")
 lexer = Lexer(source_code)
 tokens = lexer.tokenize()
 
-for token in tokens:
-    print(f"Type: {token.type.name}, Value: '{token.value}'\n")
+print(f"{len(tokens)} tokens")
+if DUMP:
+    for token in tokens:
+        print(f"Type: {token.type}, Value: '{token.value}'\n")
 
 print("\n##### PARSER #####")
 parser = Parser(tokens) 
 program = parser.parse()
 
-for statement in program.statements:
-    if isinstance(statement, RegisterDecleration):
-        print(f"RegisterDeclaration:")
-        print(f"  name: {statement.name}")
-        print(f"  storage: {statement.storage}")
-        print(f"  type: {statement.type}")
-        print(f"  register: {statement.register}")
-        print(f"  value: {statement.value}")
+print(f"{len(program.statements)} statements")
+if DUMP:
+    for statement in program.statements:
+        if isinstance(statement, RegisterDecleration):
+            print(f"RegisterDeclaration:")
+            print(f"  name: {statement.name}")
+            print(f"  storage: {statement.storage}")
+            print(f"  type: {statement.type}")
+            print(f"  register: {statement.register}")
+            print(f"  value: {statement.value}")
         
-        # If value is an AddOperator, show its details
-        if isinstance(statement.value, AddOperator):
-            print(f"    AddOperator:")
-            print(f"      left: {statement.value.left}")
-            print(f"      right: {statement.value.right}")
-        print()
+            # If value is an AddOperator, show its details
+            if isinstance(statement.value, AddOperator):
+                print(f"    AddOperator:")
+                print(f"      left: {statement.value.left}")
+                print(f"      right: {statement.value.right}")
+            print()
     
-    elif isinstance(statement, StackDecleration):
-        print(f"StackDecleration:")
-        print(f"  name: {statement.name}")
-        print(f"  storage: {statement.storage}")
-        print(f"  type: {statement.type}")
-        print(f"  value: {statement.value}")
+        elif isinstance(statement, StackDecleration):
+            print(f"StackDecleration:")
+            print(f"  name: {statement.name}")
+            print(f"  storage: {statement.storage}")
+            print(f"  type: {statement.type}")
+            print(f"  value: {statement.value}")
         
-        # If value is an AddOperator, show its details
-        if isinstance(statement.value, AddOperator):
-            print(f"    AddOperator:")
-            print(f"      left: {statement.value.left}")
-            print(f"      right: {statement.value.right}")
-        print()
-
-    elif isinstance(statement, VariableAssignment):
-        print(f"VariableAssignment:")
-        print(f"  identifier: {statement.identifier}")
-        print(f"  value: {statement.value}")
-        print(f"  value type: {statement.value_type}")
-
-        if isinstance(statement.value, AddOperator):
-            print(f"    AddOperator:")
-            print(f"      left: {statement.value.left}")
-            print(f"      right: {statement.value.right}")
-        print()
-
-    elif isinstance(statement, MemoryAlloc):
-        print(f"MemoryAlloc:")
-        print(f"  storage: {statement.storage}")
-        print(f"  value: {statement.value}")
-        print()
+            # If value is an AddOperator, show its details
+            if isinstance(statement.value, AddOperator):
+                print(f"    AddOperator:")
+                print(f"      left: {statement.value.left}")
+                print(f"      right: {statement.value.right}")
+            print()
+
+        elif isinstance(statement, VariableAssignment):
+            print(f"VariableAssignment:")
+            print(f"  identifier: {statement.identifier}")
+            print(f"  value: {statement.value}")
+            print(f"  value type: {statement.value_type}")
+
+            if isinstance(statement.value, AddOperator):
+                print(f"    AddOperator:")
+                print(f"      left: {statement.value.left}")
+                print(f"      right: {statement.value.right}")
+            print()
+
+        elif isinstance(statement, MemoryAlloc):
+            print(f"MemoryAlloc:")
+            print(f"  storage: {statement.storage}")
+            print(f"  value: {statement.value}")
+            print()
 
 print("\n##### SEMANTIC ANALYZER #####")
 analyzer = SemanticAnalyzer()
 semantic_table = analyzer.analyze(program)
 
-print(semantic_table)
-
-for name, info in semantic_table.items():
-    if info['storage'] == 'stack':
-        print(f"\nStack variable: {name}")
-        print(f"  Type: {info['type']}")
-        print(f"  Offset: {info['offset']}")     # ← Here's the offset!
-        print(f"  Size: {info['size']}")         # ← Here's the size!
-        print(f"  Value: {info['value']}")
+print(f"{len(semantic_table)} symbols")
+if DUMP:
+    for symbol in semantic_table:
+        print(f"\n{symbol.storage.capitalize()} variable: {symbol.name}")
+        print(f"  Type: {symbol.type.name}")
+        print(f"  Register: {symbol.register}")
+        print(f"  Offset: {symbol.offset}")
+        print(f"  Size: {symbol.size}")
+        print(f"  Value: {symbol.value}")
 
 print("\n##### CODEGEN #####")
 codegen = Codegen(semantic_table, program.statements)
 assembly = codegen.generate()
-print(assembly)
+if DUMP:
+    print(assembly)
 
 
 build_dir = '../build'
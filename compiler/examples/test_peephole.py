@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import pytest
+
+from assembly import AsmInstruction, Address
+from peephole import PeepholeOptimizer
+from peephole_savings import GOLDEN, generate_lines
+
+# One case per rewrite, each small enough that no other rule fires, so a
+# broken rule fails its own test and leaves the others passing. The
+# counts say which rule did the work.
+
+def optimize(lines):
+    optimizer = PeepholeOptimizer()
+    optimized = [str(line).strip() for line in optimizer.optimize(lines)]
+    return optimized, {name: count for name, count in vars(optimizer).items() if count}
+
+def test_mov_and_add_merged():
+    lines = [AsmInstruction('mov', 'x9', '#1'), AsmInstruction('strb', 'w9', Address('sp', 0)),
+             AsmInstruction('add', 'x9', 'x9', '#2')]
+    assert optimize(lines) == (["mov x9, #1", "strb w9, [sp, #0]", "mov x9, #3"], {'merged_adds': 1})
+
+def test_add_needing_two_instructions_is_kept():
+    lines = [AsmInstruction('mov', 'x9', '#1'), AsmInstruction('strb', 'w9', Address('sp', 0)),
+             AsmInstruction('add', 'x9', 'x9', '#0x12340')]
+    assert optimize(lines) == (["mov x9, #1", "strb w9, [sp, #0]", "add x9, x9, #0x12340"], {})
+
+def test_x8_constant_reused():
+    lines = [AsmInstruction('mov', 'x8', '#5'), AsmInstruction('strb', 'w8', Address('sp', 0)),
+             AsmInstruction('mov', 'x8', '#5'), AsmInstruction('strb', 'w8', Address('sp', 1))]
+    assert optimize(lines) == (["mov x8, #5", "strb w8, [sp, #0]", "strb w8, [sp, #1]"], {'reused_constants': 1})
+
+def test_constant_forgotten_after_label():
+    lines = [AsmInstruction('mov', 'x8', '#5'), AsmInstruction('strb', 'w8', Address('sp', 0)), "loop:",
+             AsmInstruction('mov', 'x8', '#5'), AsmInstruction('strb', 'w8', Address('sp', 1))]
+    assert optimize(lines)[1] == {}
+
+def test_self_move_removed():
+    lines = [AsmInstruction('mov', 'x9', 'x9'), AsmInstruction('strb', 'w9', Address('sp', 0))]
+    assert optimize(lines) == (["strb w9, [sp, #0]"], {'self_moves': 1})
+
+def test_zero_stored_from_xzr():
+    lines = [AsmInstruction('mov', 'x8', '#0'), AsmInstruction('strb', 'w8', Address('sp', 0)),
+             AsmInstruction('str', 'x8', Address('sp', 8))]
+    assert optimize(lines) == (["mov x8, #0", "strb wzr, [sp, #0]", "str xzr, [sp, #8]"], {'zero_stores': 2})
+
+def test_overwritten_definition_removed():
+    lines = [AsmInstruction('mov', 'x9', '#1'), AsmInstruction('mov', 'x9', '#2')]
+    assert optimize(lines) == (["mov x9, #2"], {'dead_definitions': 1})
+
+@pytest.mark.parametrize('label, source_code, expected', GOLDEN, ids=[label for label, _, _ in GOLDEN])
+def test_golden_programs(label, source_code, expected):
+    lines = PeepholeOptimizer().optimize(generate_lines(source_code, fold=False))
+    assert [str(line).strip() for line in lines if isinstance(line, AsmInstruction)] == expected
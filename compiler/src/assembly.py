@@ -0,0 +1,49 @@
+# Structured AArch64 assembly. Codegen builds a list of lines where
+# instructions are AsmInstruction objects and labels, directives and
+# blank separators stay plain strings, so later passes can match on
+# opcodes and operands instead of text.
+
+PRE_INDEX = "pre"
+POST_INDEX = "post"
+
+class Address:
+    # [base, #offset], [base, #offset]! or [base], #offset
+    __slots__ = ('base', 'offset', 'mode')
+
+    def __init__(self, base, offset=0, mode=None):
+        self.base = base
+        self.offset = offset
+        self.mode = mode
+
+    def __str__(self):
+        if self.mode == PRE_INDEX:
+            return f"[{self.base}, #{self.offset}]!"
+        if self.mode == POST_INDEX:
+            return f"[{self.base}], #{self.offset}"
+        return f"[{self.base}, #{self.offset}]"
+
+class AsmInstruction:
+    __slots__ = ('opcode', 'operands')
+
+    def __init__(self, opcode, *operands):
+        self.opcode = opcode
+        self.operands = operands
+
+    def __str__(self):
+        return f"    {self.opcode} {', '.join(str(operand) for operand in self.operands)}"
+
+def is_immediate(operand):
+    return isinstance(operand, str) and operand.startswith('#')
+
+def immediate_value(operand):
+    return int(operand[1:], 0)
+
+def w_register(register):
+    # The 32 bit view of an x register
+    return 'w' + register[1:]
+
+def render(lines):
+    return '\n'.join(str(line) for line in lines)
+
+def count_instructions(lines):
+    return sum(1 for line in lines if isinstance(line, AsmInstruction))
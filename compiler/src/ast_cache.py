@@ -0,0 +1,222 @@
+import gc
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+from array import array
+
+from ast_nodes import RegisterDecleration, StackDecleration, VariableAssignment, MemoryAlloc, AddOperator, Program
+from tokens import Token, TOKEN_TYPES, TOKEN_TYPE_CODES, KEYWORDS, SYMBOLS
+
+# On-disk cache of parsed sources, so a source seen before skips the Lexer
+# and Parser. An entry is the marshal of plain tuples and strings, never
+# a pickle: each statement a tuple led by its kind, add trees flattened to
+# postfix and the token stream as parallel columns. Strings are interned
+# before dumping so marshal writes each name once and loading shares it.
+
+# Bump with any change to the encoding below
+FORMAT_VERSION = 2
+
+DEFAULT_PARSE_CACHE_BYTES = 256 * 1024 * 1024
+
+# Token types whose value is always the same lexeme
+FIXED_LEXEMES = {type: lexeme for lexeme, type in {**KEYWORDS, **SYMBOLS}.items()}
+
+REGISTER_DECLARATION = 0
+STACK_DECLARATION = 1
+ASSIGNMENT = 2
+ALLOC = 3
+
+def encode_program(program):
+    intern = sys.intern
+    statements = []
+    for statement in program.statements:
+        if isinstance(statement, RegisterDecleration):
+            statements.append((REGISTER_DECLARATION, intern(statement.name), intern(statement.type),
+                               statement.register and intern(statement.register), _encode_value(statement.value),
+                               statement.value_type))
+        elif isinstance(statement, StackDecleration):
+            statements.append((STACK_DECLARATION, intern(statement.name), intern(statement.type),
+                               _encode_value(statement.value), statement.value_type))
+        elif isinstance(statement, VariableAssignment):
+            statements.append((ASSIGNMENT, intern(statement.identifier), _encode_value(statement.value),
+                               statement.value_type))
+        else:
+            statements.append((ALLOC, statement.storage, statement.value))
+    return statements
+
+def decode_program(statements):
+    program = Program()
+    decoded = program.statements
+    for statement in statements:
+        kind = statement[0]
+        if kind == REGISTER_DECLARATION:
+            _, name, type, register, value, value_type = statement
+            decoded.append(RegisterDecleration(name, "register", type, register, _decode_value(value), value_type))
+        elif kind == STACK_DECLARATION:
+            _, name, type, value, value_type = statement
+            decoded.append(StackDecleration(name, "stack", type, _decode_value(value), value_type=value_type))
+        elif kind == ASSIGNMENT:
+            _, identifier, value, value_type = statement
+            decoded.append(VariableAssignment(identifier, _decode_value(value), value_type))
+        else:
+            decoded.append(MemoryAlloc(statement[1], statement[2]))
+    return program
+
+def _encode_value(value):
+    # A plain value stays a string. An add tree becomes a tuple of its
+    # operands in postfix order with None for each add, walked with an
+    # explicit stack like the parser and analyzer so depth isn't bounded by
+    # the recursion limit, and marshal only ever sees a flat tuple.
+    if not isinstance(value, AddOperator):
+        return value if value is None else sys.intern(value)
+    postfix = []
+    pending = [(value, False)]
+    while pending:
+        node, operands_done = pending.pop()
+        if not isinstance(node, AddOperator):
+            postfix.append(sys.intern(node))
+        elif operands_done:
+            postfix.append(None)
+        else:
+            pending.append((node, True))
+            pending.append((node.right, False))
+            pending.append((node.left, False))
+    return tuple(postfix)
+
+def _decode_value(value):
+    if not isinstance(value, tuple):
+        return value
+    operands = []
+    for item in value:
+        if item is None:
+            right = operands.pop()
+            operands.append(AddOperator(operands.pop(), right))
+        else:
+            operands.append(item)
+    return operands[0]
+
+def encode_tokens(tokens):
+    # Keywords and symbols always have the same lexeme so only the other
+    # tokens keep their values. Lines are stored as the step from the
+    # previous token's line, a byte each unless some step is wider.
+    intern = sys.intern
+    types = bytes(TOKEN_TYPE_CODES[token.type] for token in tokens)
+    values = [intern(token.value) for token in tokens if token.type not in FIXED_LEXEMES]
+    steps = []
+    line = 1
+    for token in tokens:
+        steps.append(token.line - line)
+        line = token.line
+    typecode = 'B' if max(steps, default=0) < 256 else 'I'
+    return types, values, typecode, array(typecode, steps).tobytes()
+
+def decode_tokens(encoded):
+    types, values, typecode, line_steps = encoded
+    steps = array(typecode)
+    steps.frombytes(line_steps)
+    values = iter(values)
+    tokens = []
+    line = 1
+    for code, step in zip(types, steps):
+        type = TOKEN_TYPES[code]
+        line += step
+        tokens.append(Token(type, FIXED_LEXEMES.get(type) or next(values), line))
+    return tokens
+
+class ParsedSource:
+    # A cache hit: the program ready for analysis and the token stream,
+    # which is only decoded if someone asks for it
+    def __init__(self, program, token_count, encoded_tokens):
+        self.program = program
+        self.token_count = token_count
+        self.encoded_tokens = encoded_tokens
+
+    def tokens(self):
+        return decode_tokens(self.encoded_tokens)
+
+class ParseCache:
+    # One file per source named by the hash of the compiler version, the
+    # encoding version and the source. Entries are written under a
+    # temporary name and renamed into place, a hit touches the entry and
+    # once the cache outgrows max_bytes the least recently used go.
+    def __init__(self, directory, version, max_bytes=DEFAULT_PARSE_CACHE_BYTES):
+        self.directory = directory
+        self.version = version
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source_code):
+        digest = hashlib.sha256(f"{self.version}\0{FORMAT_VERSION}\0".encode())
+        digest.update(source_code.encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        path = os.path.join(self.directory, key + '.ast')
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # Nothing decoded refers back to itself, so the cycle collector is
+        # paused rather than left to rescan every new node as they pile up
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            token_count, statements, encoded_tokens = marshal.loads(data)
+            program = decode_program(statements)
+        except (EOFError, ValueError, TypeError, IndexError):
+            # Truncated or written by something else, parse it again
+            _remove(path)
+            return None
+        finally:
+            if collecting:
+                gc.enable()
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted since it was read, what was read is still good
+            pass
+        return ParsedSource(program, token_count, encoded_tokens)
+
+    def put(self, key, tokens, program):
+        data = marshal.dumps((len(tokens), encode_program(program), encode_tokens(tokens)))
+        descriptor, temporary = tempfile.mkstemp(prefix='.tmp-', dir=self.directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                f.write(data)
+            os.replace(temporary, os.path.join(self.directory, key + '.ast'))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self.evict(keep=key + '.ast')
+
+    def evict(self, keep=None):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith('.tmp-') or not entry.name.endswith('.ast'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.name))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            _remove(os.path.join(self.directory, name))
+            total -= size
+
+def _remove(path):
+    # Another compile sharing the cache may have removed it already
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,65 @@
+from visitor import Node
+
+class RegisterDecleration(Node):
+    # value_type is the literal's token type, None for an add expression
+    def __init__(self, name=None, storage=None, type=None, register=None, value=None, value_type=None):
+        self.name = name
+        self.storage = storage
+        self.type = type
+        self.register = register
+        self.value = value
+        self.value_type = value_type
+        self.symbol_id = None
+
+class StackDecleration(Node):
+    def __init__(self, name=None, storage=None, type=None, value=None, offset=None, size=None, value_type=None):
+        self.name = name
+        self.storage = storage
+        self.type = type
+        self.value = value
+        self.value_type = value_type
+        self.offset = offset
+        self.size = size
+        self.symbol_id = None
+
+class AddOperator(Node):
+    def __init__(self, left=None, right=None):
+        self.left = left
+        self.right = right
+        # Symbol ids of identifier operands, None for literals and nested adds
+        self.left_symbol_id = None
+        self.right_symbol_id = None
+
+class VariableAssignment(Node):
+    def __init__(self, identifier=None, value=None, value_type=None):
+        self.identifier = identifier
+        self.value = value
+        self.value_type = value_type
+        self.symbol_id = None
+        self.value_symbol_id = None
+
+class MemoryAlloc(Node):
+    def __init__(self, storage=None, value=None):
+        self.storage = storage
+        self.value = value
+
+class Program(Node):
+    def __init__(self, statements=None):
+        self.statements = statements or []
+
+def read_symbol_ids(statement):
+    # Symbol ids a declaration or assignment reads, set during analysis
+    value_symbol_id = getattr(statement, 'value_symbol_id', None)
+    if value_symbol_id is not None:
+        yield value_symbol_id
+
+    pending = [statement.value]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, AddOperator):
+            if node.left_symbol_id is not None:
+                yield node.left_symbol_id
+            if node.right_symbol_id is not None:
+                yield node.right_symbol_id
+            pending.append(node.left)
+            pending.append(node.right)
@@ -0,0 +1,436 @@
+from tokens import TokenType
+from ast_nodes import RegisterDecleration, VariableAssignment, AddOperator, StackDecleration, MemoryAlloc
+from visitor import Visitor, visits
+from assembly import AsmInstruction, Address, PRE_INDEX, POST_INDEX, render, count_instructions, w_register, is_immediate, immediate_value
+from immediates import materialize, add_immediate, cost
+
+class Codegen(Visitor):
+    # x8 carries values to and from the stack, x17 addends too wide for an
+    # add immediate and the address of stack slots too far from sp to
+    # reach, x0-x7 are free for intermediate results since _start makes no
+    # calls
+    STACK_TEMP_REGISTER = 'x8'
+    IMMEDIATE_TEMP_REGISTER = 'x17'
+    SCRATCH_REGISTERS = ['x0', 'x1', 'x2', 'x3', 'x4', 'x5', 'x6', 'x7']
+
+    # Stack variables are stored at their type's width from the w view of
+    # a register and loaded back extended to the whole x register, signed
+    # types sign extended
+    STORES = {1: 'strb', 2: 'strh', 4: 'str'}
+    LOADS = {1: 'ldrb', 2: 'ldrh', 4: 'ldr'}
+    SIGNED_LOADS = {1: 'ldrsb', 2: 'ldrsh', 4: 'ldrsw'}
+
+    # Widest store a run of constant stack bytes is written with, 16 is an
+    # stp of two x registers whose offset has to fit its 7 bit scaled
+    # immediate
+    COALESCED_WIDTHS = (16, 8, 4, 2, 1)
+    STP_MAX_OFFSET = 504
+
+    def __init__(self, symbol_table, statements):
+        self.symbol_table = symbol_table
+        self.statements = statements
+        self.assembly_code = []
+        self.free_scratch = list(reversed(self.SCRATCH_REGISTERS))
+        self.pushed_bytes = 0
+        self.stack_size = 0
+        self.frame_index = 0
+
+    def generate(self):
+        return render(self.generate_lines())
+
+    def generate_lines(self):
+        # Instructions as AsmInstruction, labels, directives and blank
+        # separators as strings
+        self._header()
+        self._generate_statements(self.statements)
+        self._footer()
+        return self.assembly_code
+
+    def _generate_statements(self, statements):
+        # Consecutive statements storing a constant to the stack are
+        # collected and written together, see _generate_constant_stores
+        stores = []
+        for statement in statements:
+            store = self._constant_store(statement)
+            if store is not None:
+                stores.append(store)
+                continue
+            self._generate_constant_stores(stores)
+            stores = []
+            self.visit(statement)
+        self._generate_constant_stores(stores)
+
+    def _header(self):
+        # TODO: Add allocation for functions
+        self.assembly_code.append('.global _start')
+        self.assembly_code.append('.align 2')
+        self.assembly_code.append('')
+        self.assembly_code.append('_start:')
+        # The frame is reserved here once its size is known, see _footer
+        self.frame_index = len(self.assembly_code)
+        self.assembly_code.append('')
+
+    def _footer(self):
+        # Spill slots from the register allocator sit past the alloc'd
+        # bytes, sp has to stay 16 byte aligned so the frame is rounded up
+        frame_end = self.stack_size
+        for symbol in self.symbol_table:
+            if symbol.storage == 'stack':
+                frame_end = max(frame_end, symbol.offset + symbol.size)
+        self.stack_size = (frame_end + 15) & ~15
+
+        # Frames past 4095 bytes don't fit one add/sub immediate
+        if self.stack_size > 0:
+            self.assembly_code[self.frame_index:self.frame_index] = add_immediate(
+                'sp', 'sp', -self.stack_size, self.IMMEDIATE_TEMP_REGISTER)
+            self._emit_add_immediate('sp', 'sp', self.stack_size)
+
+        self.assembly_code.append('')
+        self._emit_constant('x0', 0)
+        self._emit_constant('x16', 1)
+        self._emit('svc', '#0x80')
+
+    @visits(MemoryAlloc)
+    def _generate_memory_alloc(self, statement):
+        self.stack_size = int(statement.value)
+
+    @visits(RegisterDecleration, StackDecleration)
+    def _generate_decleration(self, statement):
+        # Storage comes from the symbol, unpinned register variables may
+        # have been spilled to the stack by the register allocator
+        symbol = self.symbol_table[statement.symbol_id]
+        if symbol.storage == 'register':
+            self._generate_declared_value(statement.type, statement.value, symbol.register)
+        else:
+            self._generate_declared_value(statement.type, statement.value, self.STACK_TEMP_REGISTER)
+            self._store(self.STACK_TEMP_REGISTER, symbol, symbol.offset)
+
+        self.assembly_code.append('')
+
+    @visits(VariableAssignment)
+    def _generate_variable_assignment(self, statement):
+        target = self.symbol_table[statement.symbol_id]
+        if target.storage == 'register':
+            register = target.register
+        else:
+            register = self.STACK_TEMP_REGISTER
+
+        if isinstance(statement.value, AddOperator):
+            self._generate_add_operator(statement.value, register)
+        elif statement.value_type == TokenType.IDENTIFIER:
+            source = self.symbol_table[statement.value_symbol_id]
+            if source.storage == 'register':
+                self._emit('mov', register, source.register)
+            else:
+                self._load(register, source, source.offset)
+        elif statement.value_type == TokenType.INTEGER_VALUE:
+            self._emit_constant(register, int(statement.value))
+        elif statement.value_type == TokenType.CHARACTER:
+            self._emit_constant(register, ord(statement.value))
+        elif statement.value_type == TokenType.TRUE:
+            self._emit_constant(register, 1)
+        elif statement.value_type == TokenType.FALSE:
+            self._emit_constant(register, 0)
+
+        if target.storage == 'stack':
+            self._store(register, target, target.offset)
+
+        self.assembly_code.append('')
+
+    def _constant_store(self, statement):
+        # (symbol, value) when statement stores a literal to a stack variable
+        if isinstance(statement, (RegisterDecleration, StackDecleration)):
+            symbol = self.symbol_table[statement.symbol_id]
+            if symbol.storage != 'stack' or isinstance(statement.value, AddOperator):
+                return None
+            if statement.type == 'bool':
+                return symbol, 1 if statement.value == 'true' else 0
+            if statement.type == 'char':
+                return symbol, ord(statement.value)
+            return symbol, int(statement.value)
+
+        if isinstance(statement, VariableAssignment):
+            symbol = self.symbol_table[statement.symbol_id]
+            if symbol.storage != 'stack':
+                return None
+            if statement.value_type == TokenType.INTEGER_VALUE:
+                return symbol, int(statement.value)
+            if statement.value_type == TokenType.CHARACTER:
+                return symbol, ord(statement.value)
+            if statement.value_type == TokenType.TRUE:
+                return symbol, 1
+            if statement.value_type == TokenType.FALSE:
+                return symbol, 0
+        return None
+
+    def _generate_constant_stores(self, stores):
+        # The bytes the stores leave in the frame, later stores winning, are
+        # written back a contiguous run at a time with the widest naturally
+        # aligned store that fits, zeros come straight from xzr
+        if not stores:
+            return
+
+        frame = {}
+        for symbol, value in stores:
+            for byte in range(symbol.type.size):
+                frame[symbol.offset + byte] = (value >> (8 * byte)) & 0xff
+
+        offsets = sorted(frame)
+        index = 0
+        while index < len(offsets):
+            start = end = offsets[index]
+            while end in frame:
+                end += 1
+            index += end - start
+
+            offset = start
+            while offset < end:
+                for width in self.COALESCED_WIDTHS:
+                    if offset % width == 0 and offset + width <= end and (width < 16 or offset <= self.STP_MAX_OFFSET):
+                        break
+                value = sum(frame[offset + byte] << (8 * byte) for byte in range(width))
+                self._emit_constant_store(offset, width, value)
+                offset += width
+
+        self.assembly_code.append('')
+
+    def _emit_constant_store(self, offset, width, value):
+        if width == 16:
+            low, high = value & 0xffffffffffffffff, value >> 64
+            first = self._constant_register(low, self.STACK_TEMP_REGISTER)
+            if high == low:
+                second = first
+            else:
+                scratch = self._claim()
+                second = self._constant_register(high, scratch)
+                self._release(scratch)
+            self._emit('stp', first, second, self._stack_address(offset, 16))
+        elif width == 8:
+            register = self._constant_register(value, self.STACK_TEMP_REGISTER)
+            self._emit('str', register, self._stack_address(offset, 8))
+        else:
+            # Only the low bytes are stored, some 32 bit patterns are
+            # cheaper to build in the w register
+            register, register_width = self.STACK_TEMP_REGISTER, 64
+            if cost(materialize(w_register(register), value, 32)) < cost(materialize(register, value)):
+                register, register_width = w_register(register), 32
+            register = self._constant_register(value, register, register_width)
+            self._emit(self.STORES[width], w_register(register), self._stack_address(offset, width))
+
+    def _constant_register(self, value, register, width=64):
+        if value == 0:
+            return register[0] + 'zr'
+        self._emit_constant(register, value, width)
+        return register
+
+    def _emit_constant(self, register, value, width=64):
+        self.assembly_code.extend(materialize(register, value, width))
+
+    def _emit_add_immediate(self, target, source, value):
+        self.assembly_code.extend(add_immediate(target, source, value, self.IMMEDIATE_TEMP_REGISTER))
+
+    def _generate_declared_value(self, type, value, register):
+        # Emitted from the declaration itself, the symbol table only holds
+        # the value a variable ends the program with
+        if isinstance(value, AddOperator):
+            self._generate_add_operator(value, register)
+        elif type == 'bool':
+            if value == 'true':
+                self._emit_constant(register, 1)
+            else:
+                self._emit_constant(register, 0)
+        elif type == 'char':
+            self._emit_constant(register, ord(value))
+        else:
+            self._emit_constant(register, int(value))
+
+    def _generate_add_operator(self, addOperator, destination):
+        self._generate_add((addOperator, None), destination)
+
+    def _generate_add(self, root, destination):
+        # Sethi-Ullman style: the operand needing more scratch registers is
+        # evaluated first, the root writes straight into destination. When
+        # scratch registers run out a pending result is pushed to the stack.
+        # Walks an explicit stack so nesting depth isn't recursion bound.
+        # Operands are handles only looked at through _is_add, _operands,
+        # _operand and _leaf_need, here (value, symbol id) pairs from the
+        # AST, so other backends can share the emission.
+        needs = self._scratch_needs(root)
+        results = []
+        pending = [(root, 0)]
+
+        while pending:
+            operand, stage = pending.pop()
+            if not self._is_add(operand):
+                results.append(self._operand(operand))
+                continue
+
+            first, second = self._operands(operand)
+            swapped = self._need(second, needs) > self._need(first, needs)
+            if swapped:
+                first, second = second, first
+
+            if stage == 0:
+                pending.append((operand, 1))
+                pending.append((first, 0))
+            elif stage == 1:
+                if results[-1] in self.SCRATCH_REGISTERS and self._need(second, needs) > len(self.free_scratch):
+                    self._push(results[-1])
+                    results[-1] = None
+                pending.append((operand, 2))
+                pending.append((second, 0))
+            else:
+                second_result = results.pop()
+                first_result = results.pop()
+                if first_result is None:
+                    first_result = self._pop()
+                self._release(first_result)
+                self._release(second_result)
+
+                target = destination if operand is root else self._claim()
+                if swapped:
+                    self._emit_add(target, second_result, first_result)
+                else:
+                    self._emit_add(target, first_result, second_result)
+                results.append(target)
+
+    def _emit(self, opcode, *operands):
+        self.assembly_code.append(AsmInstruction(opcode, *operands))
+
+    def _store(self, register, symbol, offset):
+        size = symbol.type.size
+        if size == 8:
+            self._emit('str', register, self._stack_address(offset, size))
+        else:
+            self._emit(self.STORES[size], w_register(register), self._stack_address(offset, size))
+
+    def _load(self, register, symbol, offset):
+        size = symbol.type.size
+        if size == 8:
+            self._emit('ldr', register, self._stack_address(offset, size))
+        elif symbol.type.signed:
+            self._emit(self.SIGNED_LOADS[size], register, self._stack_address(offset, size))
+        else:
+            self._emit(self.LOADS[size], w_register(register), self._stack_address(offset, size))
+
+    def _stack_address(self, offset, size):
+        # [sp, #offset] while the offset fits the access's unsigned 12 bit
+        # immediate, scaled by size, or stp's 7 bit one. Further out sp plus
+        # everything above the low bits is built in x17 and the access
+        # goes through that.
+        limit = self.STP_MAX_OFFSET if size == 16 else 4095 * size
+        if offset <= limit:
+            return Address('sp', offset)
+        low = offset % (self.STP_MAX_OFFSET + 8 if size == 16 else 4096)
+        self._emit_add_immediate(self.IMMEDIATE_TEMP_REGISTER, 'sp', offset - low)
+        return Address(self.IMMEDIATE_TEMP_REGISTER, low)
+
+    def _emit_add(self, target, left, right):
+        # add only takes an immediate as its last operand
+        if is_immediate(left) and is_immediate(right):
+            self._emit_constant(target, immediate_value(left))
+            self._emit_add_immediate(target, target, immediate_value(right))
+        elif is_immediate(left):
+            self._emit_add_immediate(target, right, immediate_value(left))
+        elif is_immediate(right):
+            self._emit_add_immediate(target, left, immediate_value(right))
+        else:
+            self._emit('add', target, left, right)
+
+    def _is_add(self, operand):
+        return isinstance(operand[0], AddOperator)
+
+    def _node(self, operand):
+        return operand[0]
+
+    def _operands(self, operand):
+        node = operand[0]
+        return (node.left, node.left_symbol_id), (node.right, node.right_symbol_id)
+
+    def _operand(self, operand):
+        value, symbol_id = operand
+        if symbol_id is None:
+            return f'#{value}'
+
+        symbol = self.symbol_table[symbol_id]
+        if symbol.storage == 'register':
+            return symbol.register
+
+        register = self._claim()
+        self._load(register, symbol, symbol.offset + self.pushed_bytes)
+        return register
+
+    def _scratch_needs(self, root):
+        # Scratch registers held at once while evaluating each add node,
+        # keyed by node id, leaves only need one when loaded from the stack
+        needs = {}
+        pending = [(root, False)]
+        while pending:
+            operand, operands_done = pending.pop()
+            if not self._is_add(operand):
+                continue
+            left, right = self._operands(operand)
+            if not operands_done:
+                pending.append((operand, True))
+                pending.append((right, False))
+                pending.append((left, False))
+                continue
+
+            first, second = sorted((self._need(left, needs), self._need(right, needs)), reverse=True)
+            needs[id(self._node(operand))] = max(first, second + min(first, 1), 1)
+
+        return needs
+
+    def _need(self, operand, needs):
+        if self._is_add(operand):
+            return needs[id(self._node(operand))]
+        return self._leaf_need(operand)
+
+    def _leaf_need(self, operand):
+        symbol_id = operand[1]
+        if symbol_id is not None and self.symbol_table[symbol_id].storage == 'stack':
+            return 1
+        return 0
+
+    def _claim(self):
+        return self.free_scratch.pop()
+
+    def _release(self, register):
+        if register in self.SCRATCH_REGISTERS:
+            self.free_scratch.append(register)
+
+    def _push(self, register):
+        # Pre-indexed push keeps sp 16 byte aligned, stack operands read
+        # while something is pushed are offset by pushed_bytes
+        self._emit('str', register, Address('sp', -16, PRE_INDEX))
+        self.pushed_bytes += 16
+        self._release(register)
+
+    def _pop(self):
+        register = self._claim()
+        self._emit('ldr', register, Address('sp', 16, POST_INDEX))
+        self.pushed_bytes -= 16
+        return register
+
+class InstructionCount:
+    # The instructions Codegen emits for a list of statements, for the
+    # passes that report what they saved by counting before and after.
+    # Those run before register allocation, so unpinned register variables
+    # are counted as if they got a register, spilled they would take a
+    # load or store more.
+    PLACEHOLDER_REGISTER = 'x9'
+
+    def __init__(self, symbol_table):
+        self.symbol_table = symbol_table
+
+    def count(self, statements):
+        unallocated = [symbol for symbol in self.symbol_table if symbol.storage == 'register' and symbol.register is None]
+        for symbol in unallocated:
+            symbol.register = self.PLACEHOLDER_REGISTER
+        try:
+            codegen = Codegen(self.symbol_table, [])
+            codegen._generate_statements(statements)
+            return count_instructions(codegen.assembly_code)
+        finally:
+            for symbol in unallocated:
+                symbol.register = None
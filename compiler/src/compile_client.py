@@ -0,0 +1,90 @@
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+
+from errors import BuildError
+from options import FLAGS
+
+# Sends sources to a running compile_server.py and prints what comes back.
+# Besides the standard library only errors and options are imported here,
+# neither pulls in the compiler, so a run skips the imports that the
+# server keeps warm.
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), f'gala-compiler-{os.getuid()}.sock')
+
+def request(message, socket_path=DEFAULT_SOCKET):
+    # One JSON object per line each way, a connection per request
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(message).encode() + b'\n')
+        with connection.makefile('rb') as reader:
+            line = reader.readline()
+    if not line:
+        raise BuildError("Compile server closed the connection")
+    response = json.loads(line)
+    if 'error' in response:
+        raise BuildError(response['error'])
+    return response
+
+def compile_inputs(inputs, flags=(), socket_path=DEFAULT_SOCKET):
+    # inputs are {'path': ...} or {'source': ...} dicts, paths are read by
+    # the server. Returns an {'assembly': ...} or {'error': ...} dict per
+    # input, in input order.
+    message = {'command': 'compile', 'flags': list(flags), 'inputs': inputs}
+    return request(message, socket_path)['results']
+
+def stop(socket_path=DEFAULT_SOCKET):
+    request({'command': 'shutdown'}, socket_path)
+
+def main(argv=None):
+    argument_parser = argparse.ArgumentParser(description="Compile .gala programs on a running compile server")
+    argument_parser.add_argument('sources', nargs='*')
+    argument_parser.add_argument('--source-text', action='append', default=[], help="compile this text as a program")
+    argument_parser.add_argument('-o', '--output', help="assembly path for a single input, stdout by default")
+    argument_parser.add_argument('--build-dir', default='build', help="where the assembly of several inputs is written")
+    for flag in FLAGS:
+        argument_parser.add_argument(f'--{flag}', dest='flags', action='append_const', const=flag, default=[])
+    argument_parser.add_argument('--socket', default=DEFAULT_SOCKET)
+    argument_parser.add_argument('--stop', action='store_true', help="shut the server down once its compiles finish")
+    args = argument_parser.parse_args(argv)
+
+    labels = args.sources + [f"<text {i + 1}>" for i in range(len(args.source_text))]
+    if args.output and len(labels) > 1:
+        argument_parser.error("-o needs a single input")
+
+    try:
+        results = []
+        if labels:
+            inputs = [{'path': os.path.abspath(path)} for path in args.sources]
+            inputs += [{'source': text} for text in args.source_text]
+            results = compile_inputs(inputs, args.flags, args.socket)
+        if args.stop:
+            stop(args.socket)
+    except (OSError, BuildError) as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    failed = False
+    for index, (label, result) in enumerate(zip(labels, results)):
+        if 'error' in result:
+            print(result['error'] if len(labels) == 1 else f"{label}: {result['error']}", file=sys.stderr)
+            failed = True
+        elif len(labels) == 1 and not args.output:
+            sys.stdout.write(result['assembly'])
+        else:
+            if args.output:
+                output_path = args.output
+            elif index < len(args.sources):
+                output_path = os.path.join(args.build_dir, os.path.splitext(os.path.basename(label))[0] + '.s')
+            else:
+                output_path = os.path.join(args.build_dir, f"text{index - len(args.sources) + 1}.s")
+            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+            with open(output_path, 'w') as f:
+                f.write(result['assembly'])
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from drivers import compile_file
+from options import FLAGS
+from compile_client import DEFAULT_SOCKET
+
+class CompileServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    # A long lived compiler on a Unix socket, so a compile doesn't pay for
+    # starting Python and importing the compiler. Each connection gets a
+    # thread that queues its inputs on a pool of worker processes, at most
+    # max_pending inputs at a time with later ones waiting their turn. A
+    # worker dying breaks the whole pool, the first submit to find it
+    # broken replaces it. shutdown stops accepting connections and
+    # server_close then waits for the ones in flight before the pool and
+    # the socket go away.
+    daemon_threads = False
+    block_on_close = True
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, jobs=None, max_pending=None):
+        jobs = max(1, jobs or os.cpu_count() or 1)
+        self.socket_path = socket_path
+        self.jobs = jobs
+        self.pool = ProcessPoolExecutor(max_workers=jobs)
+        self.pool_lock = threading.Lock()
+        self.pending = threading.BoundedSemaphore(max_pending or jobs * 4)
+        # Starts every worker now rather than on the first requests
+        list(self.pool.map(compile_file, [''] * jobs))
+
+        _remove_stale_socket(socket_path)
+        super().__init__(socket_path, CompileRequestHandler)
+
+    def respond(self, message):
+        command = message.get('command')
+        if command == 'compile':
+            return self.compile(message['inputs'], message.get('flags', []))
+        if command == 'shutdown':
+            # shutdown waits for serve_forever to return, which can't
+            # happen while this thread is blocked in it
+            threading.Thread(target=self.shutdown).start()
+            return {'stopping': True}
+        return {'error': f"Unknown command {command!r}"}
+
+    def compile(self, inputs, flags):
+        unknown = set(flags) - set(FLAGS)
+        if unknown:
+            return {'error': f"Unknown flags {', '.join(sorted(unknown))}"}
+        flags = tuple(sorted(flags))
+
+        futures = []
+        for item in inputs:
+            if 'source' in item:
+                source_code = item['source']
+            else:
+                try:
+                    with open(item['path'], 'r') as f:
+                        source_code = f.read()
+                except OSError as error:
+                    futures.append(str(error))
+                    continue
+            futures.append(self.submit(source_code, flags))
+
+        results = []
+        for future in futures:
+            if isinstance(future, str):
+                results.append({'error': future})
+                continue
+            try:
+                assembly, error = future.result()
+            except Exception as crash:
+                # A worker that died takes its input with it, not the
+                # whole request
+                assembly, error = None, f"INTERNAL ERROR: {type(crash).__name__}: {crash}"
+            results.append({'assembly': assembly} if error is None else {'error': error})
+        return {'results': results}
+
+    def submit(self, source_code, flags):
+        self.pending.acquire()
+        try:
+            pool = self.pool
+            try:
+                future = pool.submit(compile_file, source_code, flags)
+            except BrokenProcessPool:
+                future = self._replace_pool(pool).submit(compile_file, source_code, flags)
+        except BaseException:
+            self.pending.release()
+            raise
+        future.add_done_callback(lambda _: self.pending.release())
+        return future
+
+    def _replace_pool(self, broken):
+        # Threads that found the same pool broken share one replacement
+        with self.pool_lock:
+            if self.pool is broken:
+                broken.shutdown(wait=False)
+                self.pool = ProcessPoolExecutor(max_workers=self.jobs)
+            return self.pool
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+class CompileRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            response = self.server.respond(json.loads(line))
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            response = {'error': f"Bad request: {error}"}
+        self.wfile.write(json.dumps(response).encode() + b'\n')
+
+def _remove_stale_socket(socket_path):
+    # A socket file nothing answers on is left from a server that didn't
+    # get to clean up
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            os.unlink(socket_path)
+            return
+    raise OSError(f"A compile server is already running on {socket_path}")
+
+def _stop(signum, frame):
+    raise SystemExit(0)
+
+def main(argv=None):
+    argument_parser = argparse.ArgumentParser(description="Serve .gala compiles on a Unix socket")
+    argument_parser.add_argument('--socket', default=DEFAULT_SOCKET)
+    argument_parser.add_argument('-j', '--jobs', type=int, help="compiler processes, one per core by default")
+    argument_parser.add_argument('--max-pending', type=int, help="inputs queued on the pool at once, 4 per job by default")
+    args = argument_parser.parse_args(argv)
+
+    try:
+        server = CompileServer(args.socket, args.jobs, args.max_pending)
+    except OSError as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    # SIGTERM stops the server like Ctrl-C or a shutdown request does,
+    # letting the compiles in flight finish
+    signal.signal(signal.SIGTERM, _stop)
+    print(f"Serving on {args.socket}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+from tokens import TokenType
+from ast_nodes import RegisterDecleration, StackDecleration, VariableAssignment, AddOperator
+from symbols import TYPES, INTEGER_TYPES
+from visitor import Visitor, visits
+from codegen import InstructionCount
+
+class ConstantFolder(Visitor):
+    # Runs between analysis and codegen. Walks the statements in order
+    # keeping the value each variable holds at that point, rewrites reads of
+    # known variables into literals and folds add trees whose operands are
+    # all known into a single literal. Sums outside the declared type's
+    # range are left for codegen, the analyzer reports those as errors.
+    # saved_instructions is what codegen emits for the statements before
+    # the pass less what it emits after. Counting takes two codegen runs,
+    # count_instructions=False skips them and leaves it at 0.
+    def __init__(self, symbol_table, count_instructions=True):
+        self.symbol_table = symbol_table
+        self.count_instructions = count_instructions
+        self.values = {}
+        self.folded_adds = 0
+        self.propagated_reads = 0
+        self.saved_instructions = 0
+
+    def fold(self, program):
+        if self.count_instructions:
+            before = InstructionCount(self.symbol_table).count(program.statements)
+        self.visit_all(program.statements)
+        if self.count_instructions:
+            self.saved_instructions = before - InstructionCount(self.symbol_table).count(program.statements)
+        return program
+
+    @visits(RegisterDecleration, StackDecleration)
+    def _fold_decleration(self, statement):
+        if isinstance(statement.value, AddOperator):
+            number = self._fold_add_operator(statement.value, statement.type)
+            if number is not None:
+                statement.value = str(number)
+
+        self._record(statement.symbol_id, statement.type, statement.value)
+
+    @visits(VariableAssignment)
+    def _fold_variable_assignment(self, statement):
+        type = self.symbol_table[statement.symbol_id].type.name
+
+        if isinstance(statement.value, AddOperator):
+            number = self._fold_add_operator(statement.value, type)
+            if number is not None:
+                statement.value = str(number)
+                statement.value_type = TokenType.INTEGER_VALUE
+        elif statement.value_type == TokenType.IDENTIFIER and statement.value_symbol_id in self.values:
+            # Only an identifier is a read, codegen emits any other value
+            # type as the literal it spells
+            statement.value, statement.value_type = self._literal(self.values[statement.value_symbol_id], type)
+            statement.value_symbol_id = None
+            self.propagated_reads += 1
+
+        self._record(statement.symbol_id, type, statement.value)
+
+    def _record(self, symbol_id, type, value):
+        if isinstance(value, AddOperator):
+            self.values.pop(symbol_id, None)
+        elif type in INTEGER_TYPES:
+            self.values[symbol_id] = int(value)
+        else:
+            self.values[symbol_id] = value
+
+    def _literal(self, value, type):
+        if type in INTEGER_TYPES:
+            return str(value), TokenType.INTEGER_VALUE
+        if type == "char":
+            return value, TokenType.CHARACTER
+        if value == "true":
+            return value, TokenType.TRUE
+        return value, TokenType.FALSE
+
+    def _fold_add_operator(self, addOperator, type):
+        # Post-order over an explicit stack. Returns the folded value, or
+        # None when some operand isn't known, in which case every subtree
+        # that could be folded has been replaced by its literal.
+        info = TYPES[type]
+        values = []
+        pending = [(addOperator, False)]
+        while pending:
+            node, operands_done = pending.pop()
+            if not operands_done:
+                pending.append((node, True))
+                if isinstance(node.right, AddOperator):
+                    pending.append((node.right, False))
+                if isinstance(node.left, AddOperator):
+                    pending.append((node.left, False))
+                continue
+
+            right = values.pop() if isinstance(node.right, AddOperator) else self._operand(node.right, node.right_symbol_id)
+            left = values.pop() if isinstance(node.left, AddOperator) else self._operand(node.left, node.left_symbol_id)
+
+            if right is not None and not isinstance(node.right, AddOperator) and node.right_symbol_id is not None:
+                node.right, node.right_symbol_id = str(right), None
+                self.propagated_reads += 1
+            if left is not None and not isinstance(node.left, AddOperator) and node.left_symbol_id is not None:
+                node.left, node.left_symbol_id = str(left), None
+                self.propagated_reads += 1
+
+            if left is None or right is None or not info.minimum <= left + right <= info.maximum:
+                # Children that did fold become literals under this node
+                if isinstance(node.right, AddOperator) and right is not None:
+                    node.right = str(right)
+                if isinstance(node.left, AddOperator) and left is not None:
+                    node.left = str(left)
+                values.append(None)
+            else:
+                self.folded_adds += 1
+                values.append(left + right)
+
+        return values[0]
+
+    def _operand(self, operand, symbol_id):
+        if symbol_id is None:
+            return int(operand)
+        return self.values.get(symbol_id)
@@ -0,0 +1,55 @@
+from ast_nodes import RegisterDecleration, StackDecleration, VariableAssignment, read_symbol_ids
+from codegen import InstructionCount
+from visitor import Visitor, visits
+
+class DeadStoreEliminator(Visitor):
+    # Backwards liveness over the statement list: a declaration or
+    # assignment whose variable isn't read before its next write, and isn't
+    # observable at the end of the program, is dropped. Registers named in
+    # observable_registers hold outputs, their final value is kept. None
+    # treats every pinned register variable as an output, an empty set
+    # none. Unpinned variables have no fixed register and the stack frame
+    # is released on exit, so neither is ever observable.
+    # eliminated_instructions is what codegen emits for the statements
+    # before the pass less what it emits after. Counting takes two codegen
+    # runs, count_instructions=False skips them and leaves it at 0.
+    def __init__(self, symbol_table, observable_registers=None, count_instructions=True):
+        self.symbol_table = symbol_table
+        self.observable_registers = observable_registers
+        self.count_instructions = count_instructions
+        self.live = set()
+        self.eliminated_statements = 0
+        self.eliminated_instructions = 0
+
+    def eliminate(self, program):
+        self.live = set()
+        for symbol in self.symbol_table:
+            if symbol.pinned and (self.observable_registers is None or symbol.register in self.observable_registers):
+                self.live.add(symbol.id)
+
+        if self.count_instructions:
+            before = InstructionCount(self.symbol_table).count(program.statements)
+        kept = []
+        for statement in reversed(program.statements):
+            if self.visit(statement):
+                kept.append(statement)
+            else:
+                self.eliminated_statements += 1
+        kept.reverse()
+        program.statements[:] = kept
+        if self.count_instructions:
+            self.eliminated_instructions = before - InstructionCount(self.symbol_table).count(kept)
+        return program
+
+    def generic_visit(self, node):
+        # Statements this pass doesn't know about are kept
+        return True
+
+    @visits(RegisterDecleration, StackDecleration, VariableAssignment)
+    def _visit_store(self, statement):
+        if statement.symbol_id not in self.live:
+            return False
+
+        self.live.discard(statement.symbol_id)
+        self.live.update(read_symbol_ids(statement))
+        return True
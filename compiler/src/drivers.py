@@ -0,0 +1,445 @@
+import argparse
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from lexer import Lexer
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from constant_folding import ConstantFolder
+from dead_store_elimination import DeadStoreEliminator
+from register_allocation import LinearScanAllocator
+from codegen import Codegen
+from ir import IRBuilder
+from ir_codegen import IRCodegen
+from peephole import PeepholeOptimizer
+from assembly import render, count_instructions
+from pass_timing import PassTimer, NO_TIMER, write_json
+from ast_cache import ParseCache, DEFAULT_PARSE_CACHE_BYTES
+from errors import LexerError, ParserError, SemanticError, BuildError
+from options import FLAGS
+
+# Part of every build and parse cache key, bump it with any change to
+# what the compiler emits or to the lexer, parser or AST nodes so nothing
+# cached by an older compiler is ever reused
+COMPILER_VERSION = "0.4.0"
+
+# What a build stops after and the artifacts it leaves, in order
+STAGES = ('assembly', 'object', 'binary')
+ARTIFACTS = ('program.s', 'program.o', 'program')
+EXTENSIONS = ('.s', '.o', '')
+
+ASSEMBLER = ['as']
+LINKER = ['ld', '-lSystem', '-e', '_start', '-arch', 'arm64']
+
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+def compile_source(source_code, flags=(), timer=NO_TIMER, parse_cache=None):
+    # Counts are added to each phase's record after it has been timed,
+    # the instruction counts only when someone is looking at them
+    parsed = None
+    if parse_cache is not None:
+        with timer.phase('load') as phase:
+            key = parse_cache.key(source_code)
+            parsed = parse_cache.get(key)
+        phase['hit'] = parsed is not None
+
+    if parsed is None:
+        with timer.phase('lex') as phase:
+            tokens = Lexer(source_code).tokenize()
+        phase['tokens'] = len(tokens)
+        with timer.phase('parse') as phase:
+            program = Parser(tokens).parse()
+        phase['statements'] = len(program.statements)
+        # Stored before analysis, which fills in symbol ids on the nodes
+        if parse_cache is not None:
+            with timer.phase('store'):
+                parse_cache.put(key, tokens, program)
+    else:
+        program = parsed.program
+        phase['tokens'] = parsed.token_count
+        phase['statements'] = len(program.statements)
+    with timer.phase('analyze') as phase:
+        analyzer = SemanticAnalyzer()
+        symbol_table = analyzer.analyze(program)
+    phase['symbols'] = len(symbol_table)
+
+    if 'fold' in flags:
+        with timer.phase('fold') as phase:
+            folder = ConstantFolder(symbol_table, count_instructions=timer.enabled)
+            folder.fold(program)
+        phase['folded_adds'] = folder.folded_adds
+        phase['propagated_reads'] = folder.propagated_reads
+        if timer.enabled:
+            phase['saved_instructions'] = folder.saved_instructions
+    if 'dse' in flags:
+        with timer.phase('dse') as phase:
+            eliminator = DeadStoreEliminator(symbol_table, count_instructions=timer.enabled)
+            eliminator.eliminate(program)
+        phase['statements'] = len(program.statements)
+        phase['eliminated_statements'] = eliminator.eliminated_statements
+        if timer.enabled:
+            phase['eliminated_instructions'] = eliminator.eliminated_instructions
+    # Unpinned register variables have no register until this runs
+    with timer.phase('allocate'):
+        LinearScanAllocator(symbol_table, analyzer.stack_frame).allocate(program)
+
+    with timer.phase('codegen') as phase:
+        if 'ir' in flags:
+            lines = IRCodegen(symbol_table, IRBuilder(symbol_table).build(program)).generate_lines()
+        else:
+            lines = Codegen(symbol_table, program.statements).generate_lines()
+    if timer.enabled:
+        phase['instructions'] = count_instructions(lines)
+    if 'peephole' in flags:
+        with timer.phase('peephole') as phase:
+            lines = PeepholeOptimizer().optimize(lines)
+        if timer.enabled:
+            phase['instructions'] = count_instructions(lines)
+    with timer.phase('render') as phase:
+        assembly = render(lines) + '\n'
+    phase['bytes'] = len(assembly)
+    return assembly
+
+def compile_file(source_code, flags=(), parse_cache=None):
+    # What a build_all worker process runs. Compile errors come back as
+    # their message, the error classes can't be rebuilt from a pickle. A
+    # crash in the compiler itself is reported the same way, as this
+    # source's internal error, so the other sources still get built.
+    try:
+        return compile_source(source_code, flags, parse_cache=parse_cache), None
+    except (LexerError, ParserError, SemanticError) as error:
+        return None, str(error)
+    except Exception as error:
+        return None, _internal_error(error)
+
+class BuildCache:
+    # Content addressed: an entry is a directory named by the hash of
+    # everything that decides its artifacts, the source, compiler version,
+    # flags, stage and tool commands. Entries are written under a temporary
+    # name and renamed into place so readers only ever see complete ones,
+    # a hit touches the entry and once the cache outgrows max_bytes the
+    # least recently used entries are removed.
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source_code, flags, stage, tools):
+        digest = hashlib.sha256()
+        for part in (COMPILER_VERSION, ' '.join(sorted(flags)), stage, '\0'.join(tools)):
+            digest.update(part.encode())
+            digest.update(b'\0')
+        digest.update(source_code.encode())
+        return digest.hexdigest()
+
+    def get(self, key, names):
+        entry = os.path.join(self.directory, key)
+        paths = {name: os.path.join(entry, name) for name in names}
+        if not all(os.path.exists(path) for path in paths.values()):
+            return None
+        os.utime(entry)
+        return paths
+
+    def put(self, key, files):
+        # files maps artifact names to the paths they were built at
+        entry = os.path.join(self.directory, key)
+        staging = tempfile.mkdtemp(prefix='.tmp-', dir=self.directory)
+        try:
+            for name, path in files.items():
+                shutil.copy2(path, os.path.join(staging, name))
+            os.rename(staging, entry)
+        except OSError:
+            # Another build of the same key got there first
+            shutil.rmtree(staging, ignore_errors=True)
+            if not os.path.isdir(entry):
+                raise
+        self.evict(keep=key)
+        return {name: os.path.join(entry, name) for name in files}
+
+    def evict(self, keep=None):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith('.tmp-') or not entry.is_dir():
+                continue
+            try:
+                size = sum(item.stat().st_size for item in os.scandir(entry.path))
+            except FileNotFoundError:
+                # Evicted by a build running alongside this one
+                continue
+            entries.append((entry.stat().st_mtime, size, entry.name))
+            total += size
+
+        entries.sort()
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            total -= size
+
+class Driver:
+    # Builds a .gala source into assembly, an object file or an executable,
+    # going through the cache when there is one. Only the artifact the
+    # stage asks for is written to the output path. A parse cache lets
+    # sources whose build isn't cached, say under other flags, skip the
+    # lexer and parser.
+    def __init__(self, build_dir, cache=None, flags=(), assembler=ASSEMBLER, linker=LINKER, parse_cache=None):
+        unknown = set(flags) - set(FLAGS)
+        if unknown:
+            raise BuildError(f"Unknown flags {', '.join(sorted(unknown))}")
+        self.build_dir = build_dir
+        self.cache = cache
+        self.parse_cache = parse_cache
+        self.flags = tuple(sorted(flags))
+        self.assembler = list(assembler)
+        self.linker = list(linker)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.sdk_arguments = None
+
+    def build(self, source_path, output_path=None, stage='binary', timer=NO_TIMER):
+        # A timed build always compiles and skips both caches, a parse cache
+        # hit would leave lex and parse out of the timings
+        with open(source_path, 'r') as f:
+            source_code = f.read()
+
+        names = ARTIFACTS[:STAGES.index(stage) + 1]
+        output_path = output_path or self._output_path(source_path, names)
+
+        key = None
+        if self.cache is not None and not timer.enabled:
+            key = self.cache.key(source_code, self.flags, stage, self.assembler + self.linker)
+            paths = self.cache.get(key, names)
+            if paths is not None:
+                self.cache_hits += 1
+                _atomic_copy(paths[names[-1]], output_path)
+                return output_path
+            self.cache_misses += 1
+        parse_cache = None if timer.enabled else self.parse_cache
+        assembly = compile_source(source_code, self.flags, timer, parse_cache)
+        return self._finish(assembly, names, output_path, key, timer)
+
+    def build_all(self, source_paths, stage='binary', jobs=None):
+        # Cache hits are copied out first, the misses compiled in a pool of
+        # at most jobs processes, one per core by default. as and ld run in
+        # a thread pool as each source's assembly comes back. A failing
+        # source doesn't stop the others, the result is an (output path,
+        # error message) pair per source in input order.
+        jobs = max(1, jobs or os.cpu_count() or 1)
+        names = ARTIFACTS[:STAGES.index(stage) + 1]
+        output_paths = [self._output_path(source_path, names) for source_path in source_paths]
+        for index, output_path in enumerate(output_paths):
+            if output_path in output_paths[:index]:
+                raise BuildError(f"{source_paths[index]} and {source_paths[output_paths.index(output_path)]} "
+                                 f"would both be written to {output_path}")
+
+        results = [None] * len(source_paths)
+        pending = {}
+        for index, (source_path, output_path) in enumerate(zip(source_paths, output_paths)):
+            try:
+                with open(source_path, 'r') as f:
+                    source_code = f.read()
+            except OSError as error:
+                results[index] = (None, str(error))
+                continue
+
+            key = None
+            if self.cache is not None:
+                key = self.cache.key(source_code, self.flags, stage, self.assembler + self.linker)
+                paths = self.cache.get(key, names)
+                if paths is not None:
+                    self.cache_hits += 1
+                    _atomic_copy(paths[names[-1]], output_path)
+                    results[index] = (output_path, None)
+                    continue
+                self.cache_misses += 1
+            pending[index] = (source_code, output_path, key)
+
+        if not pending:
+            return results
+        if 'program' in names:
+            # Asked here so the tool threads don't all ask at once
+            self._sdk_arguments()
+
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as compilers, \
+                ThreadPoolExecutor(max_workers=jobs) as tools:
+            # A worker dying breaks the pool, the sources it takes down with
+            # it get an internal error and the rest are still reported
+            compiling = {}
+            for index, (source_code, _, _) in pending.items():
+                try:
+                    compiling[compilers.submit(compile_file, source_code, self.flags, self.parse_cache)] = index
+                except BrokenProcessPool as error:
+                    results[index] = (None, _internal_error(error))
+            finishing = {}
+            for future in as_completed(compiling):
+                index = compiling[future]
+                try:
+                    assembly, error = future.result()
+                except BrokenProcessPool as crash:
+                    assembly, error = None, _internal_error(crash)
+                if error is not None:
+                    results[index] = (None, error)
+                    continue
+                _, output_path, key = pending[index]
+                finishing[index] = tools.submit(self._finish, assembly, names, output_path, key)
+
+            for index, future in finishing.items():
+                try:
+                    results[index] = (future.result(), None)
+                except (OSError, BuildError) as error:
+                    results[index] = (None, str(error))
+        return results
+
+    def _output_path(self, source_path, names):
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        return os.path.join(self.build_dir, stem + EXTENSIONS[len(names) - 1])
+
+    def _finish(self, assembly, names, output_path, key, timer=NO_TIMER):
+        # Assembles and links what the stage needs, stores the artifacts
+        # under key when caching and copies the last one to output_path
+        with tempfile.TemporaryDirectory() as work:
+            paths = self._build_artifacts(assembly, names, work, timer)
+            if key is not None:
+                paths = self.cache.put(key, paths)
+            _atomic_copy(paths[names[-1]], output_path)
+        return output_path
+
+    def _build_artifacts(self, assembly, names, work, timer=NO_TIMER):
+        paths = {name: os.path.join(work, name) for name in names}
+        with open(paths['program.s'], 'w') as f:
+            f.write(assembly)
+
+        if 'program.o' in paths:
+            with timer.phase('assemble'):
+                self._run(self.assembler + ['-o', paths['program.o'], paths['program.s']], "Assembly")
+        if 'program' in paths:
+            sdk_arguments = self._sdk_arguments()
+            with timer.phase('link'):
+                self._run(self.linker + sdk_arguments + ['-o', paths['program'], paths['program.o']], "Linking")
+        return paths
+
+    def _sdk_arguments(self):
+        # Only macOS needs the SDK for -lSystem, asked for once per driver
+        if self.sdk_arguments is None:
+            self.sdk_arguments = []
+            if shutil.which('xcrun'):
+                sdk_path = subprocess.run(['xcrun', '-sdk', 'macosx', '--show-sdk-path'],
+                                          capture_output=True, text=True).stdout.strip()
+                self.sdk_arguments = ['-syslibroot', sdk_path]
+        return self.sdk_arguments
+
+    def _run(self, command, step):
+        try:
+            result = subprocess.run(command, capture_output=True, text=True)
+        except OSError as error:
+            raise BuildError(f"{step} failed: {error}")
+        if result.returncode != 0:
+            raise BuildError(f"{step} failed:\n{result.stderr}")
+
+def _internal_error(error):
+    return f"INTERNAL ERROR: {type(error).__name__}: {error}"
+
+def _atomic_copy(source, destination):
+    directory = os.path.dirname(os.path.abspath(destination))
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(prefix='.tmp-', dir=directory)
+    os.close(descriptor)
+    try:
+        shutil.copy2(source, temporary)
+        os.replace(temporary, destination)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+def main(argv=None):
+    argument_parser = argparse.ArgumentParser(description="Compile .gala programs")
+    argument_parser.add_argument('sources', nargs='+')
+    argument_parser.add_argument('-o', '--output', help="output path for a single source, build/<name> by default")
+    argument_parser.add_argument('-S', dest='stage', action='store_const', const='assembly', default='binary',
+                                 help="stop after writing assembly")
+    argument_parser.add_argument('-c', dest='stage', action='store_const', const='object',
+                                 help="stop after assembling an object file")
+    for flag in FLAGS:
+        argument_parser.add_argument(f'--{flag}', dest='flags', action='append_const', const=flag, default=[])
+    argument_parser.add_argument('--build-dir', default='build')
+    argument_parser.add_argument('--cache-dir', help="build/cache by default")
+    argument_parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_BYTES, help="bytes kept in the build cache")
+    argument_parser.add_argument('--parse-cache-dir', help="build/parse-cache by default")
+    argument_parser.add_argument('--parse-cache-size', type=int, default=DEFAULT_PARSE_CACHE_BYTES,
+                                 help="bytes kept in the parse cache")
+    argument_parser.add_argument('--no-cache', action='store_true', help="use neither the build nor the parse cache")
+    argument_parser.add_argument('-j', '--jobs', type=int, help="compiler processes for several sources, one per core by default")
+    argument_parser.add_argument('--time-passes', action='store_true',
+                                 help="time each phase, compiling the sources one at a time without the build or parse cache")
+    argument_parser.add_argument('--time-passes-json', metavar='PATH', help="also write the timings as JSON, - for stdout")
+    argument_parser.add_argument('--profile-dir', help="dump a cProfile of each phase here when timing passes")
+    argument_parser.add_argument('--no-trace-memory', action='store_true', help="don't measure memory when timing passes")
+    args = argument_parser.parse_args(argv)
+    if args.output and len(args.sources) > 1:
+        argument_parser.error("-o needs a single source")
+
+    cache = parse_cache = None
+    if not args.no_cache:
+        cache = BuildCache(args.cache_dir or os.path.join(args.build_dir, 'cache'), args.cache_size)
+        parse_cache = ParseCache(args.parse_cache_dir or os.path.join(args.build_dir, 'parse-cache'),
+                                 COMPILER_VERSION, args.parse_cache_size)
+
+    timing = args.time_passes or args.time_passes_json is not None
+    try:
+        driver = Driver(args.build_dir, cache, args.flags, parse_cache=parse_cache)
+        if timing:
+            return _time_passes(driver, args)
+        if len(args.sources) == 1:
+            driver.build(args.sources[0], args.output, args.stage)
+            return 0
+        results = driver.build_all(args.sources, args.stage, args.jobs)
+    except (OSError, LexerError, ParserError, SemanticError, BuildError) as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    failed = False
+    for source_path, (_, error) in zip(args.sources, results):
+        if error is not None:
+            print(f"{source_path}: {error}", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+def _time_passes(driver, args):
+    # One source after another so the timings don't compete for cores, a
+    # failing source is reported with the phases it got through
+    report = {'compiler_version': COMPILER_VERSION, 'flags': list(driver.flags), 'stage': args.stage, 'sources': []}
+    failed = False
+    for source_path in args.sources:
+        profile_dir = None
+        if args.profile_dir is not None:
+            profile_dir = os.path.join(args.profile_dir, os.path.splitext(os.path.basename(source_path))[0])
+        timer = PassTimer(not args.no_trace_memory, profile_dir)
+        entry = {'source': source_path, 'phases': timer.phases}
+        try:
+            driver.build(source_path, args.output, args.stage, timer)
+        except (OSError, LexerError, ParserError, SemanticError, BuildError) as error:
+            entry['error'] = str(error)
+            failed = True
+        entry['total'] = timer.totals()
+        report['sources'].append(entry)
+
+        if args.time_passes:
+            print(source_path, file=sys.stderr)
+            print(timer.report(), file=sys.stderr)
+            if 'error' in entry:
+                print(f"  {entry['error']}", file=sys.stderr)
+    if args.time_passes_json is not None:
+        write_json(args.time_passes_json, report)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,4 +3,23 @@ class LexerError(Exception):
         self.message = message
         self.line = line
         error_msg = f"LEXER ERROR @ Line {line}: {message}"
-        super().__init__(error_msg)  # Pass to Exception
\ No newline at end of file
+        super().__init__(error_msg)  # Pass to Exception
+
+class ParserError(Exception):
+    def __init__(self, message, line):
+        self.message = message
+        self.line = line
+        error_msg = f"PARSER ERROR @ Line {line}: {message}"
+        super().__init__(error_msg)
+
+class SemanticError(Exception):
+    def __init__(self, message):
+        self.message = message
+        error_msg = f"SEMANTIC ERROR: {message}"
+        super().__init__(error_msg)
+
+class BuildError(Exception):
+    def __init__(self, message):
+        self.message = message
+        error_msg = f"BUILD ERROR: {message}"
+        super().__init__(error_msg)
@@ -0,0 +1,96 @@
+from assembly import AsmInstruction
+
+# Picks the cheapest instruction sequence for putting a constant in a
+# register or adding one to a register. Every candidate is built and the
+# one with the lowest cost kept, the first listed winning a tie.
+
+# Cycles per instruction, every move-wide, logical and add/sub immediate
+# form issues in one on the cores we target
+INSTRUCTION_COST = {
+    'mov': 1,
+    'movz': 1,
+    'movn': 1,
+    'movk': 1,
+    'orr': 1,
+    'add': 1,
+    'sub': 1,
+}
+
+def cost(instructions):
+    return sum(INSTRUCTION_COST[instruction.opcode] for instruction in instructions)
+
+def is_logical_immediate(value, width=64):
+    # A bitmask immediate is one 2, 4, ..., 64 bit element repeated across
+    # the register, the element a rotated run of ones. All zeros and all
+    # ones aren't encodable.
+    mask = (1 << width) - 1
+    value &= mask
+    if value == 0 or value == mask:
+        return False
+
+    size = width
+    while size > 2:
+        half = size // 2
+        half_mask = (1 << half) - 1
+        if value & half_mask != (value >> half) & half_mask:
+            break
+        size = half
+
+    element_mask = (1 << size) - 1
+    element = value & element_mask
+    run = (1 << bin(element).count('1')) - 1
+    for rotation in range(size):
+        if ((run >> rotation) | (run << (size - rotation))) & element_mask == element:
+            return True
+    return False
+
+def materialize(register, value, width=64):
+    # register is an x register for width 64, a w register for 32. Values
+    # are taken modulo the width so negative ones come out two's complement.
+    value &= (1 << width) - 1
+    halfwords = [(value >> shift) & 0xffff for shift in range(0, width, 16)]
+
+    candidates = [_move_wide(register, halfwords, 'movz', 0), _move_wide(register, halfwords, 'movn', 0xffff)]
+    if is_logical_immediate(value, width):
+        zero = 'xzr' if width == 64 else 'wzr'
+        candidates.append([AsmInstruction('orr', register, zero, f'#{value:#x}')])
+    return min(candidates, key=cost)
+
+def add_immediate(target, source, value, scratch, width=64):
+    # add/sub take a 12 bit immediate, optionally shifted left by 12, so a
+    # 24 bit value splits into two. Anything wider is materialized into
+    # scratch first.
+    opcode = 'add' if value >= 0 else 'sub'
+    magnitude = abs(value)
+    low, high = magnitude & 0xfff, magnitude >> 12
+
+    candidates = []
+    if high == 0:
+        candidates.append([AsmInstruction(opcode, target, source, f'#{low}')])
+    elif high <= 0xfff:
+        shifted = AsmInstruction(opcode, target, source, f'#{high}', 'lsl #12')
+        if low == 0:
+            candidates.append([shifted])
+        else:
+            candidates.append([AsmInstruction(opcode, target, source, f'#{low}'),
+                               AsmInstruction(opcode, target, target, f'#{high}', 'lsl #12')])
+    candidates.append(materialize(scratch, value, width) + [AsmInstruction('add', target, source, scratch)])
+    return min(candidates, key=cost)
+
+def _move_wide(register, halfwords, opcode, fill):
+    # One movz (movn) for the first halfword that isn't fill, a movk for
+    # each after it. mov is the assembler's spelling of an unshifted movz.
+    instructions = []
+    indexes = [index for index, halfword in enumerate(halfwords) if halfword != fill] or [0]
+    for index in indexes:
+        halfword = halfwords[index]
+        shift = [f'lsl #{index * 16}'] if index else []
+        if instructions:
+            instructions.append(AsmInstruction('movk', register, f'#{halfword}', *shift))
+        elif opcode == 'movn':
+            instructions.append(AsmInstruction('movn', register, f'#{halfword ^ 0xffff}', *shift))
+        elif index == 0:
+            instructions.append(AsmInstruction('mov', register, f'#{halfword}'))
+        else:
+            instructions.append(AsmInstruction('movz', register, f'#{halfword}', *shift))
+    return instructions
@@ -0,0 +1,179 @@
+from ast_nodes import RegisterDecleration, StackDecleration, VariableAssignment, AddOperator, MemoryAlloc
+from symbols import INTEGER_TYPES
+from visitor import Visitor, visits
+
+# Opcodes
+CONST = "const"
+ADD = "add"
+LOAD = "load"
+STORE = "store"
+ALLOCA = "alloca"
+
+# Type of the address an alloca defines
+POINTER = "ptr"
+
+class VirtualRegister:
+    # An SSA value: defined by exactly one instruction, uses lists every
+    # instruction reading it in program order
+    __slots__ = ('id', 'type', 'definition', 'uses')
+
+    def __init__(self, id, type):
+        self.id = id
+        self.type = type
+        self.definition = None
+        self.uses = []
+
+    def __str__(self):
+        return f"%{self.id}"
+
+class Instruction:
+    # value is the constant of a const, symbol_id the variable an alloca
+    # gives a home to
+    __slots__ = ('opcode', 'result', 'operands', 'value', 'symbol_id')
+
+    def __init__(self, opcode, result=None, operands=(), value=None, symbol_id=None):
+        self.opcode = opcode
+        self.result = result
+        self.operands = operands
+        self.value = value
+        self.symbol_id = symbol_id
+
+class IRProgram:
+    # A single straight-line block. Every variable lives in the memory an
+    # alloca names and is written with store and read with load, the
+    # values computed in between are SSA virtual registers.
+    def __init__(self, symbol_table):
+        self.symbol_table = symbol_table
+        self.instructions = []
+        self.registers = []
+        self.stack_size = 0
+
+    def emit(self, opcode, type=None, operands=(), value=None, symbol_id=None):
+        result = None
+        if type is not None:
+            result = VirtualRegister(len(self.registers), type)
+            self.registers.append(result)
+
+        instruction = Instruction(opcode, result, operands, value, symbol_id)
+        if result is not None:
+            result.definition = instruction
+        for operand in operands:
+            operand.uses.append(instruction)
+
+        self.instructions.append(instruction)
+        return result
+
+    def dump(self):
+        lines = []
+        if self.stack_size:
+            lines.append(f"; alloc(stack, {self.stack_size})")
+        for instruction in self.instructions:
+            lines.append(self._format(instruction))
+        return '\n'.join(lines)
+
+    def _format(self, instruction):
+        opcode = instruction.opcode
+        result = instruction.result
+        if opcode == CONST:
+            return f"{result} = const {result.type} {instruction.value}"
+        if opcode == ADD:
+            left, right = instruction.operands
+            return f"{result} = add {result.type} {left}, {right}"
+        if opcode == LOAD:
+            return f"{result} = load {result.type} {instruction.operands[0]}"
+        if opcode == STORE:
+            address, value = instruction.operands
+            return f"store {value.type} {value}, {address}"
+
+        symbol = self.symbol_table[instruction.symbol_id]
+        if symbol.storage == 'register':
+            home = f"register {symbol.register}" if symbol.register else "register"
+        else:
+            home = f"stack +{symbol.offset}"
+        return f"{result} = alloca {symbol.type.name} ; {symbol.name}, {home}"
+
+class IRBuilder(Visitor):
+    # Lowers an analyzed program: each declaration or assignment becomes
+    # the loads, consts and adds computing its value followed by one store
+    def __init__(self, symbol_table):
+        self.symbol_table = symbol_table
+        self.program = IRProgram(symbol_table)
+        self.addresses = {}
+
+    def build(self, program):
+        self.visit_all(program.statements)
+        return self.program
+
+    @visits(MemoryAlloc)
+    def _lower_memory_alloc(self, statement):
+        self.program.stack_size = int(statement.value)
+
+    @visits(RegisterDecleration, StackDecleration)
+    def _lower_decleration(self, statement):
+        symbol = self.symbol_table[statement.symbol_id]
+        if isinstance(statement.value, AddOperator):
+            value = self._lower_add_operator(statement.value, symbol.type.name)
+        else:
+            value = self._const(self._literal(statement.value, symbol.type.name), symbol.type.name)
+        self.program.emit(STORE, operands=(self._address(symbol.id), value))
+
+    @visits(VariableAssignment)
+    def _lower_variable_assignment(self, statement):
+        type = self.symbol_table[statement.symbol_id].type.name
+
+        if isinstance(statement.value, AddOperator):
+            value = self._lower_add_operator(statement.value, type)
+        elif statement.value_symbol_id is not None:
+            value = self._load(statement.value_symbol_id)
+        else:
+            value = self._const(self._literal(statement.value, type), type)
+        self.program.emit(STORE, operands=(self._address(statement.symbol_id), value))
+
+    def _lower_add_operator(self, addOperator, type):
+        # Post-order over an explicit stack, operands before the add
+        values = []
+        pending = [(addOperator, False)]
+        while pending:
+            node, operands_done = pending.pop()
+            if operands_done:
+                right = values.pop() if isinstance(node.right, AddOperator) else None
+                left = values.pop() if isinstance(node.left, AddOperator) else None
+                if left is None:
+                    left = self._leaf(node.left, node.left_symbol_id, type)
+                if right is None:
+                    right = self._leaf(node.right, node.right_symbol_id, type)
+                values.append(self.program.emit(ADD, type, (left, right)))
+            else:
+                pending.append((node, True))
+                if isinstance(node.right, AddOperator):
+                    pending.append((node.right, False))
+                if isinstance(node.left, AddOperator):
+                    pending.append((node.left, False))
+
+        return values[0]
+
+    def _leaf(self, operand, symbol_id, type):
+        if symbol_id is None:
+            return self._const(int(operand), type)
+        return self._load(symbol_id)
+
+    def _load(self, symbol_id):
+        return self.program.emit(LOAD, self.symbol_table[symbol_id].type.name, (self._address(symbol_id),))
+
+    def _address(self, symbol_id):
+        # The alloca is emitted where the variable is first used rather than
+        # at its declaration, which dead store elimination may have dropped
+        address = self.addresses.get(symbol_id)
+        if address is None:
+            address = self.addresses[symbol_id] = self.program.emit(ALLOCA, POINTER, symbol_id=symbol_id)
+        return address
+
+    def _const(self, value, type):
+        return self.program.emit(CONST, type, value=value)
+
+    def _literal(self, value, type):
+        if type in INTEGER_TYPES:
+            return int(value)
+        if type == "char":
+            return ord(value)
+        return 1 if value == "true" else 0
@@ -0,0 +1,92 @@
+from codegen import Codegen
+from ir import CONST, ADD, LOAD, STORE
+
+class IRCodegen(Codegen):
+    # AArch64 backend over an IRProgram. Stores are the roots: each one is
+    # emitted with the tree of values it stores, so loads and consts fold
+    # into their users exactly as Codegen emits them from the AST. Homes
+    # come from the symbol an alloca names. Operand handles in the shared
+    # add emission are virtual registers.
+    def __init__(self, symbol_table, ir_program):
+        super().__init__(symbol_table, [])
+        self.ir_program = ir_program
+
+    def generate_lines(self):
+        self.stack_size = self.ir_program.stack_size
+        self._header()
+        stores = []
+        for instruction in self.ir_program.instructions:
+            if instruction.opcode != STORE:
+                continue
+            store = self._constant_store(instruction)
+            if store is not None:
+                stores.append(store)
+                continue
+            self._generate_constant_stores(stores)
+            stores = []
+            self._generate_store(instruction)
+        self._generate_constant_stores(stores)
+        self._footer()
+        return self.assembly_code
+
+    def _generate_store(self, instruction):
+        address, value = instruction.operands
+        symbol = self.symbol_table[address.definition.symbol_id]
+        if symbol.storage == 'register':
+            self._generate_value(value, symbol.register)
+        else:
+            self._generate_value(value, self.STACK_TEMP_REGISTER)
+            self._store(self.STACK_TEMP_REGISTER, symbol, symbol.offset)
+
+        self.assembly_code.append('')
+
+    def _constant_store(self, instruction):
+        address, value = instruction.operands
+        symbol = self.symbol_table[address.definition.symbol_id]
+        if symbol.storage == 'stack' and value.definition.opcode == CONST:
+            return symbol, value.definition.value
+        return None
+
+    def _generate_value(self, value, register):
+        definition = value.definition
+        if definition.opcode == ADD:
+            self._generate_add(value, register)
+        elif definition.opcode == CONST:
+            self._emit_constant(register, definition.value)
+        else:
+            source = self._home(definition)
+            if source.storage == 'register':
+                self._emit('mov', register, source.register)
+            else:
+                self._load(register, source, source.offset)
+
+    def _home(self, load):
+        return self.symbol_table[load.operands[0].definition.symbol_id]
+
+    def _is_add(self, operand):
+        return operand.definition.opcode == ADD
+
+    def _node(self, operand):
+        return operand
+
+    def _operands(self, operand):
+        return operand.definition.operands
+
+    def _operand(self, operand):
+        definition = operand.definition
+        if definition.opcode == CONST:
+            return f'#{definition.value}'
+
+        symbol = self._home(definition)
+        if symbol.storage == 'register':
+            return symbol.register
+
+        register = self._claim()
+        self._load(register, symbol, symbol.offset + self.pushed_bytes)
+        return register
+
+    def _leaf_need(self, operand):
+        definition = operand.definition
+        if definition.opcode == LOAD and self._home(definition).storage == 'stack':
+            return 1
+        return 0
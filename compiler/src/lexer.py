@@ -1,15 +1,349 @@
-from tokens import TokenType, Token, KEYWORDS
+import codecs
+import mmap
+import re
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from tokens import TokenType, Token, TokenBuffer, LineTable, KEYWORDS, SYMBOLS, TOKEN_TYPE_CODES
 from errors import LexerError
 
+def _build_offset_pattern(word_types, symbols):
+    # One group per fixed lexeme so the index of the group that matched is
+    # enough to know the token type, then identifiers, integers and a
+    # catch-all for unexpected characters
+    alternatives = []
+    group_codes = [None]
+    for word, type in word_types.items():
+        alternatives.append(f"({re.escape(word)})(?![A-Za-z0-9])")
+        group_codes.append(TOKEN_TYPE_CODES[type])
+    for symbol, type in symbols.items():
+        alternatives.append(f"({re.escape(symbol)})")
+        group_codes.append(TOKEN_TYPE_CODES[type])
+
+    alternatives += ["([A-Za-z][A-Za-z0-9]*)", "([0-9]+)", "'([^'\n]*)'", "([^ \n])"]
+    group_codes += [
+        TOKEN_TYPE_CODES[TokenType.IDENTIFIER],
+        TOKEN_TYPE_CODES[TokenType.INTEGER_VALUE],
+        TOKEN_TYPE_CODES[TokenType.CHARACTER],
+        None
+    ]
+
+    pattern = "[ \n]*(?:" + "|".join(alternatives) + ")"
+    return re.compile(pattern.encode('ascii')), group_codes
+
 class Lexer:
     GENERAL_PURPOSE_REGISTERS = ['x9', 'x10', 'x11', 'x12', 'x13', 'x14', 'x15']
 
+    # Every word lexeme resolves to its token type with a single lookup,
+    # anything not listed here is an identifier
+    WORD_TYPES = {**dict.fromkeys(GENERAL_PURPOSE_REGISTERS, TokenType.REGISTER), **KEYWORDS}
+
+    # Master pattern applied to one line at a time, one group per lexeme class:
+    # word, integer, symbol, character literal (quotes included), and a
+    # catch-all for unexpected characters. Leading spaces are consumed in
+    # front of every lexeme.
+    TOKEN_PATTERN = re.compile(r" *(?:([A-Za-z][A-Za-z0-9]*)|([0-9]+)|([:@=(),+])|('[^']*')|([^ ]))")
+
+    # Characters read per step when streaming from a file or mmap
+    CHUNK_SIZE = 1 << 16
+
+    # Byte pattern for the offsets-only lexer, see _build_offset_pattern
+    OFFSET_PATTERN, OFFSET_GROUP_CODES = _build_offset_pattern(WORD_TYPES, SYMBOLS)
+    INTERNED_LEXEMES = {lexeme.encode('ascii'): sys.intern(lexeme) for lexeme in {**WORD_TYPES, **SYMBOLS}}
+    NON_ASCII = re.compile(b'[\x80-\xff]')
+
+    # Byte classes for the vectorized lexer, anything unlisted is invalid
+    INVALID, ALPHA, DIGIT, SPACE, NEWLINE, SYMBOL, QUOTE = range(7)
+    CHAR_CLASSES = bytearray(256)
+    for char in b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz':
+        CHAR_CLASSES[char] = ALPHA
+    for char in b'0123456789':
+        CHAR_CLASSES[char] = DIGIT
+    for char in b':@=(),+':
+        CHAR_CLASSES[char] = SYMBOL
+    CHAR_CLASSES[ord("'")] = QUOTE
+    CHAR_CLASSES[ord(' ')] = SPACE
+    CHAR_CLASSES[ord('\n')] = NEWLINE
+    del char
+
     def __init__(self, source_code):
+        # source_code is a string, or a file object / mmap to stream from
         self.source_code = source_code
         self.position = 0
         self.line = 1
 
     def tokenize(self):
+        if not isinstance(self.source_code, str):
+            return list(self.iter_tokens())
+
+        # The pattern only knows ASCII character classes, str.isalpha/isdigit
+        # also accept other scripts so those sources keep the scalar path
+        if self.source_code.isascii():
+            return self._tokenize_pattern()
+        return self._tokenize_scalar()
+
+    def iter_tokens(self, chunk_size=None):
+        chunk_size = chunk_size or self.CHUNK_SIZE
+        if isinstance(self.source_code, str):
+            chunks = (self.source_code[i:i + chunk_size] for i in range(0, len(self.source_code), chunk_size))
+        else:
+            chunks = self._read_chunks(chunk_size)
+
+        # Lexemes never span a newline, so everything up to the last newline
+        # seen is complete and can be lexed while the rest waits for more input
+        pending = []
+        for chunk in chunks:
+            cut = chunk.rfind('\n') + 1
+            if cut == 0:
+                pending.append(chunk)
+                continue
+
+            pending.append(chunk[:cut])
+            yield from self._tokenize_fragment(''.join(pending))
+            pending = [chunk[cut:]]
+
+        yield from self._tokenize_fragment(''.join(pending))
+
+    def tokenize_buffer(self):
+        if not isinstance(self.source_code, str):
+            self.source_code = ''.join(self._read_chunks(self.CHUNK_SIZE))
+
+        buffer = TokenBuffer(self.source_code)
+        add_type = buffer.types.append
+        add_start = buffer.starts.append
+        add_end = buffer.ends.append
+        add_line = buffer.lines.append
+        word_codes = {word: TOKEN_TYPE_CODES[type] for word, type in self.WORD_TYPES.items()}
+        symbol_codes = {symbol: TOKEN_TYPE_CODES[type] for symbol, type in SYMBOLS.items()}
+        identifier = TOKEN_TYPE_CODES[TokenType.IDENTIFIER]
+        integer = TOKEN_TYPE_CODES[TokenType.INTEGER_VALUE]
+        character = TOKEN_TYPE_CODES[TokenType.CHARACTER]
+        finditer = self.TOKEN_PATTERN.finditer
+
+        offset = 0
+        for line, text in enumerate(self.source_code.split('\n'), 1):
+            if not text.isascii():
+                self._buffer_scalar_line(buffer, text, offset, line)
+                offset += len(text) + 1
+                continue
+
+            for match in finditer(text):
+                group = match.lastindex
+                start, end = match.span(group)
+                if group == 1:
+                    add_type(word_codes.get(match.group(1), identifier))
+                elif group == 2:
+                    add_type(integer)
+                elif group == 3:
+                    add_type(symbol_codes[match.group(3)])
+                elif group == 4:
+                    add_type(character)
+                    start += 1
+                    end -= 1
+                else:
+                    raise self._unexpected(match.group(5), line)
+
+                add_start(offset + start)
+                add_end(offset + end)
+                add_line(line)
+
+            offset += len(text) + 1
+
+        self.position = len(self.source_code)
+        self.line = line
+        return buffer
+
+    def tokenize_offsets(self):
+        source_code = self.source_code
+        if isinstance(source_code, str):
+            if not source_code.isascii():
+                return self.tokenize_buffer()
+            source_code = source_code.encode('ascii')
+        elif not isinstance(source_code, (bytes, bytearray, memoryview, mmap.mmap)):
+            self.source_code = ''.join(self._read_chunks(self.CHUNK_SIZE))
+            return self.tokenize_offsets()
+        elif self.NON_ASCII.search(source_code):
+            self.source_code = bytes(source_code).decode('utf-8')
+            return self.tokenize_buffer()
+
+        # Tokens only record offsets into the shared view, lines are looked
+        # up lazily from the line table and no lexeme is copied out
+        view = memoryview(source_code)
+        line_table = LineTable(view)
+        buffer = TokenBuffer(view, line_table, self.INTERNED_LEXEMES)
+        add_type = buffer.types.append
+        add_start = buffer.starts.append
+        add_end = buffer.ends.append
+        group_codes = self.OFFSET_GROUP_CODES
+
+        for match in self.OFFSET_PATTERN.finditer(view, self.position):
+            group = match.lastindex
+            start, end = match.span(group)
+            code = group_codes[group]
+            if code is None:
+                self.position = start
+                self.line = line_table.line(start)
+                raise self._unexpected(chr(view[start]), self.line)
+
+            add_type(code)
+            add_start(start)
+            add_end(end)
+
+        self.position = len(view)
+        return buffer
+
+    def tokenize_vectorized(self):
+        if np is None:
+            raise ImportError("tokenize_vectorized requires numpy")
+
+        if not isinstance(self.source_code, str):
+            self.source_code = ''.join(self._read_chunks(self.CHUNK_SIZE))
+        source_code = self.source_code
+        if not source_code.isascii():
+            return self.tokenize()
+
+        data = np.frombuffer(source_code.encode('ascii'), dtype=np.uint8)
+        classes = np.frombuffer(self.CHAR_CLASSES, dtype=np.uint8)[data]
+        newlines_before = np.cumsum(classes == self.NEWLINE)
+
+        # Quotes pair up in order, a pair is a character literal unless a
+        # newline falls between them, which leaves the opening one unterminated
+        quotes = np.flatnonzero(classes == self.QUOTE)
+        opens, closes = quotes[0::2], quotes[1::2]
+        broken = np.flatnonzero(newlines_before[closes] != newlines_before[opens[:len(closes)]])
+        literal_count = int(broken[0]) if broken.size else len(closes)
+        opens, closes = opens[:literal_count + 1], closes[:literal_count]
+        unterminated = [int(opens[-1])] if len(opens) > literal_count else []
+        opens = opens[:literal_count]
+
+        # Bytes inside a literal are its content, never tokens of their own
+        opened = np.zeros(len(classes) + 1, dtype=np.int64)
+        closed = np.zeros(len(classes) + 1, dtype=np.int64)
+        opened[opens] = 1
+        closed[closes + 1] = 1
+        literal = (np.cumsum(opened) - np.cumsum(closed))[:-1] > 0
+        classes = np.where(literal, self.QUOTE, classes)
+
+        invalid = np.flatnonzero(classes == self.INVALID)[:1].tolist()
+        if invalid or unterminated:
+            position = min(invalid + unterminated)
+            self.line = 1 + int(newlines_before[position])
+            raise self._unexpected(source_code[position], self.line)
+
+        alpha = classes == self.ALPHA
+        alnum = alpha | (classes == self.DIGIT)
+        symbol = classes == self.SYMBOL
+        indexes = np.arange(len(classes))
+
+        # Runs of letters and digits, a run that starts with digits splits
+        # into an integer and a word at its first letter
+        previous_alnum = np.concatenate(([False], alnum[:-1]))
+        run_starts = alnum & ~previous_alnum
+        run_start_index = np.maximum.accumulate(np.where(run_starts, indexes, 0))
+        alpha_before = np.cumsum(alpha) - alpha
+        splits = alpha & ~run_starts & (alpha_before == alpha_before[run_start_index])
+
+        starts = np.zeros(len(classes), dtype=bool)
+        starts[opens] = True
+        starts = np.flatnonzero(starts | run_starts | splits | symbol)
+        ends = np.zeros(len(classes) + 1, dtype=bool)
+        ends[1:] = (alnum & ~np.concatenate((alnum[1:], [False]))) | symbol
+        ends[:-1] |= splits
+        ends[closes + 1] = True
+        ends = np.flatnonzero(ends)
+        lines = 1 + newlines_before[starts]
+
+        # Words and symbols are typed by lexeme, integers and literals by
+        # their first byte
+        lexeme_types = {**self.WORD_TYPES, **SYMBOLS}.get
+        identifier = TokenType.IDENTIFIER
+        values = [source_code[start:end] for start, end in zip(starts.tolist(), ends.tolist())]
+        types = [lexeme_types(value, identifier) for value in values]
+        for index in np.flatnonzero(classes[starts] == self.DIGIT).tolist():
+            types[index] = TokenType.INTEGER_VALUE
+        for index in np.flatnonzero(classes[starts] == self.QUOTE).tolist():
+            types[index] = TokenType.CHARACTER
+            values[index] = values[index][1:-1]
+        tokens = list(map(Token, types, values, lines.tolist()))
+
+        self.position = len(source_code)
+        self.line = 1 + int(newlines_before[-1]) if len(classes) else self.line
+        return tokens
+
+    def _buffer_scalar_line(self, buffer, text, offset, line):
+        lexer = Lexer(text)
+        lexer.line = line
+        # Tokens on a line are separated by spaces only, so each lexeme is
+        # the first occurrence of its value after the previous one
+        position = 0
+        for token in lexer._tokenize_scalar():
+            if token.type == TokenType.CHARACTER:
+                start = text.index("'", position) + 1
+                end = start + len(token.value)
+                position = end + 1
+            else:
+                start = text.index(token.value, position)
+                end = position = start + len(token.value)
+            buffer.append(token.type, offset + start, offset + end, line)
+
+    def _read_chunks(self, chunk_size):
+        decoder = None
+        while True:
+            chunk = self.source_code.read(chunk_size)
+            if not chunk:
+                break
+
+            # Binary files and mmaps hand back bytes, a multi-byte character
+            # may be split across reads so decode incrementally
+            if isinstance(chunk, bytes):
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder('utf-8')()
+                chunk = decoder.decode(chunk)
+            yield chunk
+
+        if decoder is not None:
+            yield decoder.decode(b'', final=True)
+
+    def _tokenize_fragment(self, fragment):
+        lexer = Lexer(fragment)
+        lexer.line = self.line
+        try:
+            return lexer.tokenize()
+        finally:
+            self.line = lexer.line
+
+    def _tokenize_pattern(self):
+        tokens = []
+        append = tokens.append
+        word_types = self.WORD_TYPES
+        identifier = TokenType.IDENTIFIER
+        integer = TokenType.INTEGER_VALUE
+        findall = self.TOKEN_PATTERN.findall
+
+        # Lexemes never span a newline, so lines can be scanned independently
+        for line, text in enumerate(self.source_code[self.position:].split('\n'), self.line):
+            for word, number, symbol, character, unexpected in findall(text):
+                if word:
+                    append(Token(word_types.get(word, identifier), word, line))
+                elif number:
+                    append(Token(integer, number, line))
+                elif symbol:
+                    append(Token(SYMBOLS[symbol], symbol, line))
+                elif character:
+                    append(Token(TokenType.CHARACTER, character[1:-1], line))
+                else:
+                    self.line = line
+                    raise self._unexpected(unexpected, line)
+
+        self.position = len(self.source_code)
+        self.line = line
+        return tokens
+
+    def _tokenize_scalar(self):
         tokens = []
 
         while self.position < len(self.source_code):
@@ -19,7 +353,7 @@ class Lexer:
                 self.line += 1
                 self.position += 1
                 continue
-            
+
             elif char == ' ':
                 self.position += 1
                 continue
@@ -53,24 +387,49 @@ class Lexer:
                 tokens.append(Token(TokenType.R_PAREN, ")", self.line))
                 self.position += 1
 
+            elif char == ",":
+                tokens.append(Token(TokenType.COMMA, ",", self.line))
+                self.position += 1
+
+            elif char == "+":
+                tokens.append(Token(TokenType.PLUS, "+", self.line))
+                self.position += 1
+
+            elif char == "'":
+                character = self._read_character()
+                tokens.append(Token(TokenType.CHARACTER, character, self.line))
+
             else:
-                raise LexerError(f"Unexpected character '{char}'", self.line)
+                raise self._unexpected(char, self.line)
 
         return tokens
 
     def _read_word(self):
-        word = ''
+        start = self.position
         while self.position < len(self.source_code) and self.source_code[self.position].isalnum():
-            word += self.source_code[self.position]
             self.position += 1
-        return word
+        return self.source_code[start:self.position]
 
     def _read_number(self):
-        number = ''
+        start = self.position
         while self.position < len(self.source_code) and self.source_code[self.position].isdigit():
-            number += self.source_code[self.position]
             self.position += 1
-        return number
+        return self.source_code[start:self.position]
+
+    def _read_character(self):
+        start = self.position + 1
+        end = self.source_code.find("'", start)
+        newline = self.source_code.find('\n', start)
+        if end == -1 or newline != -1 and newline < end:
+            raise self._unexpected("'", self.line)
+
+        self.position = end + 1
+        return self.source_code[start:end]
+
+    def _unexpected(self, char, line):
+        if char == "'":
+            return LexerError("Unterminated character literal", line)
+        return LexerError(f"Unexpected character '{char}'", line)
 
     def _classify_word(self, word):
         if word in KEYWORDS:
@@ -81,4 +440,83 @@ class Lexer:
             return Token(TokenType.IDENTIFIER, word, self.line)
 
     def _is_register(self, word):
-        return word in self.GENERAL_PURPOSE_REGISTERS
\ No newline at end of file
+        return word in self.GENERAL_PURPOSE_REGISTERS
+
+
+class IncrementalLexer:
+    # Keeps the token stream bucketed by line so an edit only re-lexes the
+    # lines it touches. A bucket's index is its line number, so line values
+    # of the tokens after an edit that adds or removes lines are fixed up
+    # lazily when the stream is read instead of on every edit.
+
+    def __init__(self, source_code):
+        self.lines = source_code.split('\n')
+        self.line_tokens = [[] for _ in self.lines]
+        self.stale_from = len(self.lines)
+
+        try:
+            for token in Lexer(source_code).tokenize():
+                self.line_tokens[token.line - 1].append(token)
+        except LexerError:
+            self.line_tokens = [self._lex_line(text, line) for line, text in enumerate(self.lines, 1)]
+
+    @property
+    def source_code(self):
+        return '\n'.join(self.lines)
+
+    def apply_edit(self, start_line, start_column, end_line, end_column, replacement):
+        # Lines are 1-based like Token.line, columns 0-based, end exclusive
+        first = start_line - 1
+        last = end_line - 1
+        if not (0 <= first <= last < len(self.lines)):
+            raise IndexError(f"Edit range {start_line}:{start_column}-{end_line}:{end_column} is outside the source")
+
+        text = self.lines[first][:start_column] + replacement + self.lines[last][end_column:]
+        new_lines = text.split('\n')
+        new_tokens = [self._lex_line(line_text, start_line + i) for i, line_text in enumerate(new_lines)]
+
+        self.lines[first:last + 1] = new_lines
+        self.line_tokens[first:last + 1] = new_tokens
+
+        if len(new_lines) != last - first + 1:
+            self.stale_from = min(self.stale_from, first + len(new_lines))
+
+    def tokens(self):
+        self._refresh_lines()
+        tokens = []
+        for bucket in self.line_tokens:
+            if isinstance(bucket, LexerError):
+                raise LexerError(bucket.message, bucket.line)
+            tokens.extend(bucket)
+        return tokens
+
+    def tokens_for_line(self, line):
+        bucket = self.line_tokens[line - 1]
+        if isinstance(bucket, LexerError):
+            raise LexerError(bucket.message, line)
+
+        if line - 1 >= self.stale_from:
+            for token in bucket:
+                token.line = line
+        return bucket
+
+    def _lex_line(self, text, line):
+        lexer = Lexer(text)
+        lexer.line = line
+        try:
+            return lexer.tokenize()
+        except LexerError as error:
+            # Kept in place of the line's tokens, reading the stream raises it
+            # just like a full re-lex would
+            return error
+
+    def _refresh_lines(self):
+        for index in range(self.stale_from, len(self.line_tokens)):
+            line = index + 1
+            bucket = self.line_tokens[index]
+            if isinstance(bucket, LexerError):
+                bucket.line = line
+                continue
+            for token in bucket:
+                token.line = line
+        self.stale_from = len(self.line_tokens)
@@ -0,0 +1,4 @@
+# Optional passes and the IR backend, each switched on by name. Kept apart
+# from drivers so compile_client can offer them without importing the
+# compiler.
+FLAGS = ('fold', 'dse', 'peephole', 'ir')
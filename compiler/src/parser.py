@@ -0,0 +1,239 @@
+from ast_nodes import RegisterDecleration, StackDecleration, VariableAssignment, AddOperator, MemoryAlloc, Program
+from tokens import TokenType
+from errors import ParserError
+
+TYPE_KEYWORDS = frozenset({TokenType.INT8, TokenType.UINT8, TokenType.BOOL, TokenType.CHAR})
+LITERAL_VALUES = frozenset({TokenType.INTEGER_VALUE, TokenType.CHARACTER, TokenType.TRUE, TokenType.FALSE})
+ASSIGNMENT_VALUES = LITERAL_VALUES | {TokenType.IDENTIFIER}
+ADD_OPERANDS = frozenset({TokenType.IDENTIFIER, TokenType.INTEGER_VALUE})
+EXPRESSION_STARTS = ADD_OPERANDS | {TokenType.ADD, TokenType.L_PAREN}
+
+# Infix operators, higher binding power binds tighter
+INFIX_BINDING_POWER = {TokenType.PLUS: 10}
+INFIX_NODES = {TokenType.PLUS: AddOperator}
+
+# Frames the expression parser keeps on its operator stack next to infix
+# operators, each with the error raised when it isn't closed properly
+ADD_FIRST_OPERAND = "add("
+ADD_SECOND_OPERAND = "add(,"
+GROUP = "("
+FRAME_ERRORS = {
+    ADD_FIRST_OPERAND: "ADD OPERATOR: Expected ,",
+    ADD_SECOND_OPERAND: "ADD OPERATOR: Expected )",
+    GROUP: "EXPRESSION: Expected )"
+}
+
+class TokenCursor:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+        self.length = len(tokens)
+
+    def at_end(self):
+        return self.position >= self.length
+
+    def peek(self, offset=0):
+        index = self.position + offset
+        if index < self.length:
+            return self.tokens[index]
+        return None
+
+    def advance(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def expect(self, type, message):
+        if self.position < self.length:
+            token = self.tokens[self.position]
+            if token.type == type:
+                self.position += 1
+                return token
+        raise ParserError(message, self.line())
+
+    def expect_one_of(self, types, message):
+        if self.position < self.length:
+            token = self.tokens[self.position]
+            if token.type in types:
+                self.position += 1
+                return token
+        raise ParserError(message, self.line())
+
+    def line(self):
+        # Errors at the end of input point at the last token's line
+        if self.position < self.length:
+            return self.tokens[self.position].line
+        if self.length:
+            return self.tokens[self.length - 1].line
+        return 1
+
+class Parser:
+    def __init__(self, tokens):
+        self.cursor = TokenCursor(tokens)
+        self.statement_parsers = {
+            TokenType.REG: self._parse_register_decleration,
+            TokenType.STACK: self._parse_stack_decleration,
+            TokenType.IDENTIFIER: self._parse_variable_assignment,
+            TokenType.ALLOC: self._parse_memory_allocation
+        }
+
+    def parse(self):
+        program = Program()
+        statements = program.statements
+        cursor = self.cursor
+        statement_parsers = self.statement_parsers
+
+        while not cursor.at_end():
+            token = cursor.peek()
+            parse_statement = statement_parsers.get(token.type)
+            if parse_statement is None:
+                raise ParserError(f"Unexpected '{token.value}' at start of statement", token.line)
+            statements.append(parse_statement())
+
+        return program
+
+    def _parse_register_decleration(self):
+        cursor = self.cursor
+        cursor.advance()
+
+        registerDecleration = RegisterDecleration(storage="register")
+        registerDecleration.name = cursor.expect(TokenType.IDENTIFIER, "REGISTER DECLERATION: Expected identifier").value
+        cursor.expect(TokenType.COLON, "REGISTER DECLERATION: Expected colon")
+        registerDecleration.type = cursor.expect_one_of(TYPE_KEYWORDS, "REGISTER DECLERATION: Expected Type").value
+
+        # Without @ the register is left to the register allocator
+        token = cursor.peek()
+        if token is not None and token.type == TokenType.AT:
+            cursor.advance()
+            registerDecleration.register = cursor.expect(TokenType.REGISTER, "REGISTER DECLERATION: Expected General Purpose Register Value ('x9', 'x10', 'x11', 'x12', 'x13', 'x14', 'x15')").value
+            cursor.expect(TokenType.EQUALS, "REGISTER DECLERATION: Expected =")
+        else:
+            cursor.expect(TokenType.EQUALS, "REGISTER DECLERATION: Expected @ or =")
+        registerDecleration.value, registerDecleration.value_type = self._parse_declared_value("REGISTER DECLERATION: Expecting Value")
+
+        return registerDecleration
+
+    def _parse_stack_decleration(self):
+        cursor = self.cursor
+        cursor.advance()
+
+        stackDecleration = StackDecleration(storage="stack")
+        stackDecleration.name = cursor.expect(TokenType.IDENTIFIER, "STACK DECLERATION: Expected identifier").value
+        cursor.expect(TokenType.COLON, "STACK DECLERATION: Expected colon")
+        stackDecleration.type = cursor.expect_one_of(TYPE_KEYWORDS, "STACK DECLERATION: Expected Type").value
+        cursor.expect(TokenType.EQUALS, "STACK DECLERATION: Expected =")
+        stackDecleration.value, stackDecleration.value_type = self._parse_declared_value("STACK DECLERATION: Expecting Value")
+
+        return stackDecleration
+
+    def _parse_declared_value(self, message):
+        # Returns (value, value_type) like _parse_expression
+        token = self.cursor.peek()
+        if token is not None and token.type in EXPRESSION_STARTS:
+            value, value_type = self._parse_expression()
+            if value_type == TokenType.IDENTIFIER:
+                raise ParserError(message, token.line)
+            return value, value_type
+        token = self.cursor.expect_one_of(LITERAL_VALUES, message)
+        return token.value, token.type
+
+    def _parse_variable_assignment(self):
+        cursor = self.cursor
+        variableAssignment = VariableAssignment()
+        variableAssignment.identifier = cursor.advance().value
+
+        # check for missing register
+        token = cursor.peek()
+        if token is not None and token.type == TokenType.COLON:
+            raise ParserError("VARIABLE ASSIGNMENT: Missing reg Keyword", token.line)
+
+        cursor.expect(TokenType.EQUALS, "VARIABLE ASSIGNMENT: Expected =")
+
+        token = cursor.peek()
+        if token is not None and token.type in EXPRESSION_STARTS:
+            variableAssignment.value, variableAssignment.value_type = self._parse_expression()
+        else:
+            token = cursor.expect_one_of(ASSIGNMENT_VALUES, "VARIABLE ASSIGNMENT: Expected Value")
+            variableAssignment.value = token.value
+            variableAssignment.value_type = token.type
+
+        return variableAssignment
+
+    def _parse_expression(self):
+        # Operator precedence parsing over explicit operand and operator
+        # stacks, so nesting depth is bounded by memory rather than the
+        # recursion limit. Returns (value, value_type): a bare operand keeps
+        # its token value and type, anything else is an AddOperator tree with
+        # no value type.
+        cursor = self.cursor
+        operands = []
+        operators = []
+        expect_operand = True
+
+        while True:
+            token = cursor.peek()
+            type = token.type if token is not None else None
+
+            if expect_operand:
+                if type == TokenType.ADD:
+                    cursor.advance()
+                    cursor.expect(TokenType.L_PAREN, "ADD OPERATOR: Expected (")
+                    operators.append(ADD_FIRST_OPERAND)
+                elif type == TokenType.L_PAREN:
+                    cursor.advance()
+                    operators.append(GROUP)
+                else:
+                    in_add = operators and operators[-1] in (ADD_FIRST_OPERAND, ADD_SECOND_OPERAND)
+                    message = "ADD OPERATOR: Expected a number" if in_add else "EXPRESSION: Expected a number"
+                    token = cursor.expect_one_of(ADD_OPERANDS, message)
+                    operands.append((token.value, token.type))
+                    expect_operand = False
+                continue
+
+            if type in INFIX_BINDING_POWER:
+                self._reduce_infix(operands, operators, INFIX_BINDING_POWER[type])
+                operators.append(type)
+                cursor.advance()
+                expect_operand = True
+                continue
+
+            self._reduce_infix(operands, operators, 0)
+            frame = operators[-1] if operators else None
+            if frame is None:
+                return operands.pop()
+
+            if type == TokenType.COMMA and frame == ADD_FIRST_OPERAND:
+                operators[-1] = ADD_SECOND_OPERAND
+                expect_operand = True
+            elif type == TokenType.R_PAREN and frame == ADD_SECOND_OPERAND:
+                operators.pop()
+                right, _ = operands.pop()
+                left, _ = operands.pop()
+                operands.append((AddOperator(left, right), None))
+            elif type == TokenType.R_PAREN and frame == GROUP:
+                operators.pop()
+            else:
+                raise ParserError(FRAME_ERRORS[frame], cursor.line())
+            cursor.advance()
+
+    def _reduce_infix(self, operands, operators, binding_power):
+        # Operators of equal power reduce first, which makes them left associative
+        while operators and INFIX_BINDING_POWER.get(operators[-1], -1) >= binding_power:
+            node = INFIX_NODES[operators.pop()]
+            right, _ = operands.pop()
+            left, _ = operands.pop()
+            operands.append((node(left, right), None))
+
+    def _parse_memory_allocation(self):
+        cursor = self.cursor
+        cursor.advance()
+
+        memoryAlloc = MemoryAlloc()
+        cursor.expect(TokenType.L_PAREN, "ALLOC: Expected (")
+        cursor.expect(TokenType.STACK, "ALLOC: Expected a storage type")
+        memoryAlloc.storage = "stack"
+        cursor.expect(TokenType.COMMA, "ALLOC: Expected ,")
+        memoryAlloc.value = cursor.expect(TokenType.INTEGER_VALUE, "ALLOC: Expected a byte allocation").value
+        cursor.expect(TokenType.R_PAREN, "ALLOC: Expected )")
+
+        return memoryAlloc
@@ -0,0 +1,96 @@
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+class PassTimer:
+    # Records each pipeline phase run under phase(): wall and CPU time, the
+    # most memory it had allocated at once (measured by tracemalloc from the
+    # phase's start), what it left allocated and whatever counts the
+    # caller adds to the phase's record. Tracing memory slows allocation
+    # heavy phases more than others, so leave it off when only the times
+    # matter. With a profile_dir each phase is also run under cProfile and
+    # its stats dumped to <profile_dir>/<index>-<phase>.prof.
+    enabled = True
+
+    def __init__(self, trace_memory=True, profile_dir=None):
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        record = {'name': name}
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+        profiler = None
+        if self.profile_dir is not None:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        wall, cpu = time.perf_counter(), time.process_time()
+
+        try:
+            yield record
+        finally:
+            record['wall_seconds'] = time.perf_counter() - wall
+            record['cpu_seconds'] = time.process_time() - cpu
+            if profiler is not None:
+                profiler.disable()
+            if self.trace_memory:
+                traced_after, peak = tracemalloc.get_traced_memory()
+                record['peak_bytes'] = peak - traced_before
+                record['retained_bytes'] = traced_after - traced_before
+                if started_tracing:
+                    tracemalloc.stop()
+            if profiler is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profile_path = os.path.join(self.profile_dir, f"{len(self.phases):02}-{name}.prof")
+                profiler.dump_stats(profile_path)
+                record['profile'] = profile_path
+            self.phases.append(record)
+
+    def totals(self):
+        return {
+            'wall_seconds': sum(record['wall_seconds'] for record in self.phases),
+            'cpu_seconds': sum(record['cpu_seconds'] for record in self.phases),
+        }
+
+    def report(self):
+        # A table for people, one line per phase with its counts at the end
+        lines = [f"  {'phase':<12}{'wall ms':>10}{'cpu ms':>10}{'peak KiB':>10}  counts"]
+        for record in self.phases:
+            counts = '  '.join(f"{key} {value}" for key, value in record.items() if key not in _MEASUREMENTS)
+            peak = f"{record['peak_bytes'] / 1024:.0f}" if 'peak_bytes' in record else '-'
+            lines.append(f"  {record['name']:<12}{record['wall_seconds'] * 1e3:>10.2f}"
+                         f"{record['cpu_seconds'] * 1e3:>10.2f}{peak:>10}  {counts}".rstrip())
+        totals = self.totals()
+        lines.append(f"  {'total':<12}{totals['wall_seconds'] * 1e3:>10.2f}{totals['cpu_seconds'] * 1e3:>10.2f}")
+        return '\n'.join(lines)
+
+class NullTimer:
+    # Stands in for a PassTimer when nothing is being measured
+    enabled = False
+
+    @contextmanager
+    def phase(self, name):
+        yield {}
+
+NO_TIMER = NullTimer()
+
+_MEASUREMENTS = ('name', 'wall_seconds', 'cpu_seconds', 'peak_bytes', 'retained_bytes', 'profile')
+
+def write_json(path, report):
+    # '-' writes to stdout
+    text = json.dumps(report, indent=2) + '\n'
+    if path == '-':
+        print(text, end='')
+        return
+    with open(path, 'w') as f:
+        f.write(text)
@@ -0,0 +1,175 @@
+from assembly import AsmInstruction, Address, is_immediate, immediate_value
+from codegen import Codegen
+from immediates import materialize, cost
+
+class PeepholeOptimizer:
+    # Rewrites generated assembly in two passes over the structured line
+    # list. Forwards, the constant each register is known to hold is
+    # tracked: a mov of a constant the register already holds (typically
+    # x8 between stack stores) or a mov of a register to itself is dropped,
+    # an add of known values becomes a move when the sum takes only one
+    # instruction to build and a store of a register known to hold 0
+    # stores xzr instead. Backwards, a register definition
+    # overwritten before anything reads it is dropped, which removes the
+    # movs the forward rewrites leave unread. Labels, directives and svc
+    # end what is known. Pinned registers hold the program's outputs so
+    # every register is read at svc, except the temporaries codegen only
+    # uses within a statement, exit itself reads x0 and x16.
+    DEFINITIONS = frozenset({'mov', 'movz', 'movn', 'movk', 'orr', 'add', 'sub', 'ldr', 'ldrb', 'ldrh', 'ldrsb', 'ldrsh', 'ldrsw'})
+    STORES = frozenset({'str', 'strb', 'strh', 'stp'})
+    DEAD_AT_EXIT = frozenset(Codegen.SCRATCH_REGISTERS + [Codegen.STACK_TEMP_REGISTER, Codegen.IMMEDIATE_TEMP_REGISTER]) - {'x0', 'x16'}
+
+    def __init__(self):
+        self.self_moves = 0
+        self.reused_constants = 0
+        self.merged_adds = 0
+        self.zero_stores = 0
+        self.dead_definitions = 0
+
+    def optimize(self, lines):
+        return self._remove_dead_definitions(self._propagate_constants(lines))
+
+    def _propagate_constants(self, lines):
+        known = {}
+        optimized = []
+        for line in lines:
+            if not isinstance(line, AsmInstruction):
+                if line:
+                    known.clear()
+                optimized.append(line)
+                continue
+
+            opcode, operands = line.opcode, line.operands
+            if opcode in self.DEFINITIONS and operands[0] != 'sp':
+                if opcode == 'mov' and operands[0] == operands[1]:
+                    self.self_moves += 1
+                    continue
+                destination = self._x(operands[0])
+                value = self._evaluate(opcode, operands, known)
+                if value is not None and known.get(destination) == value:
+                    self.reused_constants += 1
+                    continue
+                if value is not None and opcode in ('add', 'sub'):
+                    # Only worth it when the sum is a single instruction
+                    replacement = materialize(operands[0], value, self._width(operands[0]))
+                    if cost(replacement) == 1:
+                        self.merged_adds += 1
+                        line = replacement[0]
+                self._set(known, destination, value)
+            elif opcode in self.STORES:
+                register, address = operands[0], operands[-1]
+                if len(operands) == 2 and register[1:] != 'zr' and known.get(self._x(register)) == 0:
+                    self.zero_stores += 1
+                    line = AsmInstruction(opcode, register[0] + 'zr', address)
+            elif opcode not in self.DEFINITIONS:
+                known.clear()
+            optimized.append(line)
+
+        return optimized
+
+    def _remove_dead_definitions(self, lines):
+        # overwritten holds registers written further down before any read
+        overwritten = set()
+        kept = []
+        for line in reversed(lines):
+            if not isinstance(line, AsmInstruction):
+                if line:
+                    overwritten.clear()
+                kept.append(line)
+                continue
+
+            opcode, operands = line.opcode, line.operands
+            if opcode == 'movk':
+                # Keeps the rest of the register, a read as well as a write
+                if self._x(operands[0]) in overwritten:
+                    self.dead_definitions += 1
+                    continue
+            elif opcode in self.DEFINITIONS:
+                # Frame adjustments and pops also move sp, never dropped
+                destination = self._x(operands[0])
+                if destination in overwritten and not self._writes_back(operands):
+                    self.dead_definitions += 1
+                    continue
+                if destination != 'sp':
+                    overwritten.add(destination)
+                overwritten.difference_update(self._reads(operands[1:]))
+            elif opcode in self.STORES:
+                overwritten.difference_update(self._reads(operands))
+            elif opcode == 'svc':
+                overwritten = set(self.DEAD_AT_EXIT)
+            else:
+                overwritten.clear()
+            kept.append(line)
+
+        kept.reverse()
+        return kept
+
+    def _reads(self, operands):
+        for operand in operands:
+            if isinstance(operand, Address):
+                yield operand.base
+            elif not is_immediate(operand) and not operand.startswith('lsl'):
+                yield self._x(operand)
+
+    def _x(self, register):
+        # w registers are tracked as the x register they are the low half of,
+        # writing one zeroes the upper half
+        return 'x' + register[1:] if register.startswith('w') else register
+
+    def _width(self, register):
+        return 32 if register.startswith('w') else 64
+
+    def _shift(self, operands):
+        # The optional lsl #n last operand of a move-wide or add
+        if len(operands) > 1 and isinstance(operands[-1], str) and operands[-1].startswith('lsl'):
+            return immediate_value(operands[-1].split()[1])
+        return 0
+
+    def _writes_back(self, operands):
+        return isinstance(operands[-1], Address) and operands[-1].mode is not None
+
+    def _evaluate(self, opcode, operands, known):
+        # The value a definition leaves in its register when it only
+        # depends on constants and registers with known values
+        mask = (1 << self._width(operands[0])) - 1
+        shift = self._shift(operands)
+        if opcode == 'mov':
+            value = self._value(operands[1], known)
+        elif opcode == 'movz':
+            value = immediate_value(operands[1]) << shift
+        elif opcode == 'movn':
+            value = ~(immediate_value(operands[1]) << shift)
+        elif opcode == 'movk':
+            value = self._value(operands[0], known)
+            if value is not None:
+                value = value & ~(0xffff << shift) | immediate_value(operands[1]) << shift
+        elif opcode == 'orr':
+            left, right = self._value(operands[1], known), self._value(operands[2], known)
+            value = None if left is None or right is None else left | right << shift
+        elif opcode in ('add', 'sub'):
+            left, right = self._value(operands[1], known), self._value(operands[2], known)
+            if left is None or right is None:
+                value = None
+            elif opcode == 'add':
+                value = left + (right << shift)
+            else:
+                value = left - (right << shift)
+        else:
+            value = None
+        return None if value is None else value & mask
+
+    def _value(self, operand, known):
+        if is_immediate(operand):
+            return immediate_value(operand) & 0xffffffffffffffff
+        if operand[1:] == 'zr':
+            return 0
+        value = known.get(self._x(operand))
+        if value is not None and operand.startswith('w'):
+            value &= 0xffffffff
+        return value
+
+    def _set(self, known, register, value):
+        if value is None:
+            known.pop(register, None)
+        else:
+            known[register] = value
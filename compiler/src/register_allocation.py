@@ -0,0 +1,119 @@
+import heapq
+from bisect import insort
+from ast_nodes import RegisterDecleration, StackDecleration, VariableAssignment, read_symbol_ids
+from lexer import Lexer
+from symbols import TYPES
+from visitor import Visitor, visits
+
+class LinearScanAllocator(Visitor):
+    # Assigns registers to register variables declared without @. A live
+    # range runs from a variable's declaration to the last statement that
+    # reads or writes it. Ranges are scanned by start, a register is handed
+    # back once its range has ended and when none is free the range ending
+    # last is spilled to a stack slot past the alloc'd bytes. Pinned
+    # variables hold their register from their declaration to the end of
+    # the program, an unpinned range only gets that register if it ends
+    # before the pin.
+    # A spill slot fits and is aligned for any type
+    SPILL_SLOT_SIZE = max(type.size for type in TYPES.values())
+
+    def __init__(self, symbol_table, stack_frame, registers=Lexer.GENERAL_PURPOSE_REGISTERS):
+        self.symbol_table = symbol_table
+        self.stack_frame = stack_frame
+        self.registers = registers
+        self.starts = {}
+        self.ends = {}
+        self.pin_starts = {}
+        self.index = 0
+        self.spilled_symbols = 0
+        self.spill_bytes = 0
+        self.registers_used = set()
+
+    def allocate(self, program):
+        for self.index, statement in enumerate(program.statements):
+            self.visit(statement)
+
+        ranges = sorted((self.starts[symbol_id], self.ends[symbol_id], symbol_id) for symbol_id in self.starts)
+        self._scan(ranges)
+        return self.symbol_table
+
+    @visits(RegisterDecleration, StackDecleration, VariableAssignment)
+    def _visit_statement(self, statement):
+        self._touch(statement.symbol_id)
+        for symbol_id in read_symbol_ids(statement):
+            self._touch(symbol_id)
+
+    def _touch(self, symbol_id):
+        symbol = self.symbol_table[symbol_id]
+        if symbol.pinned:
+            self.pin_starts.setdefault(symbol.register, self.index)
+        elif symbol.storage == 'register':
+            self.starts.setdefault(symbol_id, self.index)
+            self.ends[symbol_id] = self.index
+
+    def _scan(self, ranges):
+        # Spill slots start past the alloc'd bytes
+        slot_size = self.SPILL_SLOT_SIZE
+        frame_end = max(self.stack_frame.allocated or 0, self.stack_frame.used)
+        spill_base = -(-frame_end // slot_size) * slot_size
+        next_slot = spill_base
+        free_slots = []
+        spilled = []
+        active = []
+        free_registers = list(self.registers)
+
+        for start, end, symbol_id in ranges:
+            # A value whose last read is the statement this range starts at
+            # can hand over its register or slot, an add's destination is
+            # only written after every operand has been read
+            while active and active[0][0] <= start:
+                _, expired = active.pop(0)
+                free_registers.append(self.symbol_table[expired].register)
+            while spilled and spilled[0][0] <= start:
+                heapq.heappush(free_slots, heapq.heappop(spilled))
+
+            symbol = self.symbol_table[symbol_id]
+            register = self._free_register(free_registers, end)
+            if register is not None:
+                free_registers.remove(register)
+                self._assign(symbol, register)
+                insort(active, (end, symbol_id))
+                continue
+
+            if active and active[-1][0] > end:
+                # The range ending last gives up its register and is spilled
+                # instead, any pin on that register starts after it ends
+                victim_end, victim_id = active.pop()
+                self._assign(symbol, self.symbol_table[victim_id].register)
+                insort(active, (end, symbol_id))
+                symbol, start, end = self.symbol_table[victim_id], self.starts[victim_id], victim_end
+
+            # Slots are kept by the end of their last range, a spilled
+            # victim started earlier and can only take one freed by then
+            if free_slots and free_slots[0][0] <= start:
+                offset = heapq.heappop(free_slots)[1]
+            else:
+                offset = next_slot
+                next_slot += slot_size
+            self._spill(symbol, offset, slot_size)
+            heapq.heappush(spilled, (end, offset))
+
+        self.spill_bytes = next_slot - spill_base
+        self.registers_used = {symbol.register for symbol in self.symbol_table if symbol.storage == 'register' and not symbol.pinned}
+
+    def _free_register(self, free_registers, end):
+        for register in free_registers:
+            pin_start = self.pin_starts.get(register)
+            if pin_start is None or pin_start > end:
+                return register
+        return None
+
+    def _assign(self, symbol, register):
+        symbol.register = register
+
+    def _spill(self, symbol, offset, size):
+        symbol.storage = 'stack'
+        symbol.register = None
+        symbol.offset = offset
+        symbol.size = size
+        self.spilled_symbols += 1
@@ -0,0 +1,239 @@
+from tokens import TokenType
+from ast_nodes import RegisterDecleration, StackDecleration, VariableAssignment, AddOperator, MemoryAlloc
+from errors import SemanticError
+from symbols import Symbol, TYPES, INTEGER_TYPES
+from visitor import Visitor, visits
+
+class StackFrame:
+    # Allocation state of the single stack frame. Variables are reserved as
+    # declarations are analyzed and laid out once analysis is done: largest
+    # alignment first, so every variable sits at its natural alignment with
+    # no padding between them and the frame is exactly the bytes they need.
+    def __init__(self):
+        self.allocated = None
+        self.used = 0
+        self.symbols = []
+
+    def allocate(self, size):
+        if self.allocated is not None:
+            raise SemanticError(f"Stack memory already allocated ({self.allocated} bytes)")
+        self.allocated = size
+
+    def reserve(self, symbol):
+        if self.allocated is None:
+            raise SemanticError(f"You must allocate memory before using stack decleration.")
+
+        if self.used + symbol.type.size > self.allocated:
+            raise SemanticError(f"Variable '{symbol.name}' needs {self.used + symbol.type.size} bytes of stack but only {self.allocated} were allocated")
+
+        symbol.size = symbol.type.size
+        self.used += symbol.size
+        self.symbols.append(symbol)
+
+    def layout(self):
+        offset = 0
+        for symbol in sorted(self.symbols, key=lambda symbol: -symbol.type.alignment):
+            symbol.offset = offset
+            offset += symbol.size
+
+class SemanticAnalyzer(Visitor):
+    RESERVED_KEYWORDS = [
+        'int8',
+        'uint8',
+        'char',
+        'bool',
+        'reg',
+        'true',
+        'false',
+        'add',
+        'stack',
+        'alloc'
+    ]
+
+    def __init__(self):
+        # Symbols indexed by id, names are resolved to ids once here and the
+        # ids stored on the AST for codegen
+        self.symbol_table = []
+        self.symbol_ids = {}
+        self.used_registers = set()
+        self.stack_frame = StackFrame()
+
+    def analyze(self, program):
+        self.visit_all(program.statements)
+        self.stack_frame.layout()
+        return self.symbol_table
+
+    @visits(MemoryAlloc)
+    def _analyze_memory_alloc(self, statement):
+        self.stack_frame.allocate(int(statement.value))
+
+    @visits(RegisterDecleration)
+    def _analyze_register_declaration(self, statement):
+        self._check_declarable(statement.name)
+
+        # Only pinned registers are reserved here, unpinned variables get
+        # theirs from the register allocator
+        if statement.register is not None:
+            if statement.register in self.used_registers:
+                raise SemanticError(f"Register {statement.register} already in use")
+
+            self.used_registers.add(statement.register)
+
+        value = self._analyze_declared_value(statement.type, statement.value, statement.value_type)
+        symbol = self._declare(statement.name, statement.type, "register", value)
+        symbol.register = statement.register
+        symbol.pinned = statement.register is not None
+        statement.symbol_id = symbol.id
+
+    @visits(StackDecleration)
+    def _analyze_stack_decleration(self, statement):
+        self._check_declarable(statement.name)
+
+        value = self._analyze_declared_value(statement.type, statement.value, statement.value_type)
+        symbol = self._declare(statement.name, statement.type, "stack", value)
+        self.stack_frame.reserve(symbol)
+        statement.symbol_id = symbol.id
+
+    def _check_declarable(self, name):
+        if name in self.RESERVED_KEYWORDS:
+            raise SemanticError(f"Variable '{name}' cannot be a reserved word")
+
+        if name in self.symbol_ids:
+            raise SemanticError(f"Variable '{name}' already declared")
+
+    def _analyze_declared_value(self, type, value, value_type):
+        if type in INTEGER_TYPES:
+            if isinstance(value, AddOperator):
+                return self._analyze_add_operator(type, value)
+            if value_type != TokenType.INTEGER_VALUE:
+                raise SemanticError(f"Type {type} expects an integer value, got {value}")
+            return self._check_range(int(value), type)
+
+        elif type == "char":
+            if isinstance(value, str) and len(value) == 1:
+                return value
+            raise SemanticError(f"Only 1 character allowed for type CHAR")
+
+        elif type == "bool":
+            if value == "true" or value == "false":
+                return value
+            raise SemanticError(f"Only true or false values allowed for boolean type")
+
+        else:
+            raise SemanticError(f"No Type declared")
+
+    def _declare(self, name, type, storage, value):
+        symbol = Symbol(len(self.symbol_table), name, TYPES[type], storage, value=value)
+        self.symbol_table.append(symbol)
+        self.symbol_ids[name] = symbol.id
+        return symbol
+
+    @visits(VariableAssignment)
+    def _analyze_variable_assignment(self, statement):
+        symbol_id = self.symbol_ids.get(statement.identifier)
+        if symbol_id is None:
+            raise SemanticError(f"Variable '{statement.identifier}' hasn't been declared yet")
+
+        target = self.symbol_table[symbol_id]
+        target_type = target.type.name
+        statement.symbol_id = symbol_id
+
+        if target_type in INTEGER_TYPES:
+            if isinstance(statement.value, AddOperator):
+                number = self._analyze_add_operator(target_type, statement.value)
+            else:
+                number, statement.value_symbol_id = self._analyze_operand(statement.value, target_type, statement.value_type)
+
+            target.value = number
+
+        elif target_type == "char":
+            character = ''
+
+            if statement.value_type == TokenType.IDENTIFIER and statement.value in self.symbol_ids:
+                source = self._resolve_assignable(statement.value, target_type)
+                statement.value_symbol_id = source.id
+                character = source.value
+            else:
+                character = statement.value
+
+            if isinstance(character, str) and len(character) == 1:
+                target.value = character
+            else:
+                raise SemanticError(f"{statement.value} can only be 1 character")
+
+        elif target_type == "bool":
+            boolean = ''
+
+            if statement.value_type == TokenType.IDENTIFIER and statement.value in self.symbol_ids:
+                source = self._resolve_assignable(statement.value, target_type)
+                statement.value_symbol_id = source.id
+                boolean = source.value
+            else:
+                boolean = statement.value
+
+            if boolean == 'true' or boolean == 'false':
+                target.value = boolean
+            else:
+                raise SemanticError(f"{statement.identifier} can only be true or false")
+
+    def _analyze_add_operator(self, type, addOperator):
+        if type not in INTEGER_TYPES:
+            raise SemanticError(f"Cannot add values of type {type}")
+
+        # Post-order walk over an explicit stack so deeply nested adds don't
+        # hit the recursion limit, every intermediate sum must fit the type.
+        # Identifier operands get their symbol ids recorded on the node.
+        values = []
+        pending = [(addOperator, False)]
+        while pending:
+            node, operands_done = pending.pop()
+            if operands_done:
+                if isinstance(node.right, AddOperator):
+                    right = values.pop()
+                else:
+                    right, node.right_symbol_id = self._analyze_operand(node.right, type, self._add_operand_type(node.right))
+                if isinstance(node.left, AddOperator):
+                    left = values.pop()
+                else:
+                    left, node.left_symbol_id = self._analyze_operand(node.left, type, self._add_operand_type(node.left))
+                values.append(self._check_range(left + right, type))
+            else:
+                pending.append((node, True))
+                if isinstance(node.right, AddOperator):
+                    pending.append((node.right, False))
+                if isinstance(node.left, AddOperator):
+                    pending.append((node.left, False))
+
+        return values[0]
+
+    def _analyze_operand(self, operand, type, operand_type):
+        # Returns (value, symbol id), the id is None for literals. Only an
+        # identifier token reads a variable, a character or boolean literal
+        # that happens to spell a variable's name is still a literal.
+        if operand_type == TokenType.IDENTIFIER:
+            if operand not in self.symbol_ids:
+                raise SemanticError(f"Variable '{operand}' hasn't been declared yet")
+            symbol = self._resolve_assignable(operand, type)
+            return int(symbol.value), symbol.id
+
+        if operand_type != TokenType.INTEGER_VALUE:
+            raise SemanticError(f"Type {type} expects an integer value, got {operand}")
+
+        return self._check_range(int(operand), type), None
+
+    def _add_operand_type(self, operand):
+        # Add operands are only ever identifiers or integers, and the parser
+        # keeps no token type for them. An identifier can't start with a digit.
+        return TokenType.INTEGER_VALUE if operand.isdecimal() else TokenType.IDENTIFIER
+
+    def _resolve_assignable(self, name, type):
+        symbol = self.symbol_table[self.symbol_ids[name]]
+        if symbol.type.name != type:
+            raise SemanticError(f"Cannot assign value of type {symbol.type.name} to a variable of type {type}")
+        return symbol
+
+    def _check_range(self, number, type):
+        info = TYPES[type]
+        if number < info.minimum or number > info.maximum:
+            raise SemanticError(f"{number} is outside of range for type {type}")
+        return number
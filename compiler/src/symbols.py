@@ -0,0 +1,41 @@
+class TypeInfo:
+    # Scalars are naturally aligned unless given an alignment
+    __slots__ = ('name', 'minimum', 'maximum', 'size', 'alignment')
+
+    def __init__(self, name, minimum, maximum, size, alignment=None):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.size = size
+        self.alignment = alignment or size
+
+    @property
+    def signed(self):
+        return self.minimum < 0
+
+TYPES = {
+        "int8": TypeInfo("int8", -128, 127, 1),
+        "uint8": TypeInfo("uint8", 0, 255, 1),
+        "char": TypeInfo("char", 0, 255, 1),
+        "bool": TypeInfo("bool", 0, 1, 1)
+    }
+
+INTEGER_TYPES = frozenset({"int8", "uint8"})
+
+class Symbol:
+    # One per declared variable, its id is the index into the analyzer's
+    # symbol list and is what AST nodes refer to after analysis. Register
+    # variables declared without @ aren't pinned, the register allocator
+    # picks their register or spills them to the stack.
+    __slots__ = ('id', 'name', 'type', 'storage', 'register', 'offset', 'size', 'value', 'pinned')
+
+    def __init__(self, id, name, type, storage, register=None, offset=None, size=None, value=None, pinned=False):
+        self.id = id
+        self.name = name
+        self.type = type
+        self.storage = storage
+        self.register = register
+        self.offset = offset
+        self.size = size
+        self.value = value
+        self.pinned = pinned
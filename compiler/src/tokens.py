@@ -1,25 +1,163 @@
+from array import array
+from bisect import bisect_right
+import re
+
 class TokenType():
     # Keywords
     REG = "REG"
+    STACK = "STACK"
+    ALLOC = "ALLOC"
+    ADD = "ADD"
+    TRUE = "TRUE"
+    FALSE = "FALSE"
+
+    # Types
     INT8 = "INT8"
+    UINT8 = "UINT8"
+    BOOL = "BOOL"
+    CHAR = "CHAR"
 
     # Values
     REGISTER = "REGISTER"
     IDENTIFIER = "IDENTIFIER"
     INTEGER_VALUE = "INTEGER"
+    CHARACTER = "CHARACTER"
 
     # symbols
     COLON = ":"
     AT = "@"
     EQUALS = "="
+    L_PAREN = "("
+    R_PAREN = ")"
+    COMMA = ","
+    PLUS = "+"
 
 KEYWORDS = {
         "reg": TokenType.REG,
-        "int8": TokenType.INT8
+        "stack": TokenType.STACK,
+        "alloc": TokenType.ALLOC,
+        "add": TokenType.ADD,
+        "true": TokenType.TRUE,
+        "false": TokenType.FALSE,
+        "int8": TokenType.INT8,
+        "uint8": TokenType.UINT8,
+        "bool": TokenType.BOOL,
+        "char": TokenType.CHAR
+    }
+
+SYMBOLS = {
+        ":": TokenType.COLON,
+        "@": TokenType.AT,
+        "=": TokenType.EQUALS,
+        "(": TokenType.L_PAREN,
+        ")": TokenType.R_PAREN,
+        ",": TokenType.COMMA,
+        "+": TokenType.PLUS
     }
 
 class Token:
     def __init__(self, type, value, line=None):
         self.type = type
         self.value = value
-        self.line = line
\ No newline at end of file
+        self.line = line
+
+# Small integer codes for token types, the index into this list is the code
+TOKEN_TYPES = [
+        TokenType.REG,
+        TokenType.STACK,
+        TokenType.ALLOC,
+        TokenType.ADD,
+        TokenType.TRUE,
+        TokenType.FALSE,
+        TokenType.INT8,
+        TokenType.UINT8,
+        TokenType.BOOL,
+        TokenType.CHAR,
+        TokenType.REGISTER,
+        TokenType.IDENTIFIER,
+        TokenType.INTEGER_VALUE,
+        TokenType.CHARACTER,
+        TokenType.COLON,
+        TokenType.AT,
+        TokenType.EQUALS,
+        TokenType.L_PAREN,
+        TokenType.R_PAREN,
+        TokenType.COMMA,
+        TokenType.PLUS
+    ]
+
+TOKEN_TYPE_CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+class LineTable:
+    # Offsets where each line of a bytes-like source starts. Built on the
+    # first lookup, a line number is then a binary search away.
+    def __init__(self, source_code):
+        self.source_code = source_code
+        self.line_starts = None
+
+    def line(self, offset):
+        if self.line_starts is None:
+            self.line_starts = array('I', [0])
+            self.line_starts.extend(match.end() for match in re.finditer(b'\n', self.source_code))
+        return bisect_right(self.line_starts, offset)
+
+class TokenBuffer:
+    # Struct-of-arrays token stream: one entry per token in each parallel
+    # array, lexemes stay in the source and are only sliced out on demand.
+    # With a line table the lines array stays empty and lines are looked up
+    # from the token's offset instead.
+    def __init__(self, source_code, line_table=None, interned=None):
+        self.source_code = source_code
+        self.line_table = line_table
+        self.interned = interned or {}
+        self.types = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.lines = array('I')
+
+    def append(self, type, start, end, line):
+        self.types.append(TOKEN_TYPE_CODES[type])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+
+    def type(self, index):
+        return TOKEN_TYPES[self.types[index]]
+
+    def value(self, index):
+        lexeme = self.source_code[self.starts[index]:self.ends[index]]
+        if isinstance(lexeme, str):
+            return lexeme
+
+        # Slice of a memoryview, keywords, registers and symbols come back as
+        # one shared string each
+        lexeme = lexeme.tobytes()
+        return self.interned.get(lexeme) or lexeme.decode('ascii')
+
+    def line(self, index):
+        if self.line_table is not None:
+            return self.line_table.line(self.starts[index])
+        return self.lines[index]
+
+    def nbytes(self):
+        arrays = (self.types, self.starts, self.ends, self.lines)
+        return sum(len(values) * values.itemsize for values in arrays)
+
+    def __len__(self):
+        return len(self.types)
+
+    # Token view for callers written against a list of Token objects
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return Token(self.type(index), self.value(index), self.line(index))
+
+    def __iter__(self):
+        if self.line_table is not None:
+            for index in range(len(self)):
+                yield self[index]
+            return
+
+        source_code = self.source_code
+        for code, start, end, line in zip(self.types, self.starts, self.ends, self.lines):
+            yield Token(TOKEN_TYPES[code], source_code[start:end], line)
@@ -0,0 +1,59 @@
+# Every AST node class, in definition order. Node subclasses add themselves
+NODE_CLASSES = []
+
+class Node:
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        NODE_CLASSES.append(cls)
+
+def visits(*node_classes):
+    # Marks a Visitor method as the handler for the given node classes
+    def register(method):
+        method.visits = node_classes
+        return method
+    return register
+
+class DispatchTable(dict):
+    # Node class -> handler function. Registered node classes are filled in
+    # up front, anything else is resolved through its MRO on first sight
+    # and cached, so dispatch is a single dict lookup per node.
+    def __init__(self, visitor_class, handler_names):
+        super().__init__()
+        self.visitor_class = visitor_class
+        self.handler_names = handler_names
+        for node_class in NODE_CLASSES:
+            self[node_class]
+
+    def __missing__(self, node_class):
+        handler = self.visitor_class.generic_visit
+        for base in node_class.__mro__:
+            if base in self.handler_names:
+                handler = getattr(self.visitor_class, self.handler_names[base])
+                break
+        self[node_class] = handler
+        return handler
+
+class Visitor:
+    # A pass over the AST. Subclasses mark handlers with @visits(NodeClass),
+    # nodes without a handler go to generic_visit. Handlers are looked up
+    # by name when the table is built so overriding one in a subclass works
+    # without repeating the decorator.
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        handler_names = {}
+        for klass in reversed(cls.__mro__):
+            for name, attribute in vars(klass).items():
+                for node_class in getattr(attribute, 'visits', ()):
+                    handler_names[node_class] = name
+        cls.dispatch = DispatchTable(cls, handler_names)
+
+    def visit(self, node):
+        return self.dispatch[node.__class__](self, node)
+
+    def visit_all(self, nodes):
+        dispatch = self.dispatch
+        for node in nodes:
+            dispatch[node.__class__](self, node)
+
+    def generic_visit(self, node):
+        pass